@@ -1,26 +1,239 @@
-import schedule
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
 import time
-from sentiment_pipeline import sentiment_analysis_pipeline
+import schedule
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+from config import INCREMENTAL_SETTINGS, SCHEDULER_CONFIG, SCHEDULER_SETTINGS
+
+# The pipeline modules (pandas, scikit-learn, and the models behind them) are imported
+# inside the job functions, so the scheduler process stays small and only the job
+# processes it spawns load them
 
 def scheduled_pipeline_run():
     """
     Triggers the sentiment analysis pipeline to process new data periodically.
+    Only reviews added since the last run are extracted and cleaned; models are
+    retrained on the stored training window only when new reviews arrived.
 
     Returns:
         None
     """
     try:
-        # SQL query to fetch recent reviews
-        sql_query = """
-        SELECT * FROM customer_reviews 
-        WHERE review_date >= CURDATE() - INTERVAL 7 DAY
-        """
-        # Run the pipeline
-        sentiment_analysis_pipeline(sql_query)
+        from data_cleaning import load_stem_cache, save_stem_cache
+        from sentiment_pipeline import ANALYSIS_STAGES, incremental_extract_and_clean, load_training_window, run_pipeline
+        
+        # Start from the stems cached by the previous run and persist them for the next one
+        load_stem_cache()
+        new_rows = incremental_extract_and_clean()
+        save_stem_cache()
+        if new_rows == 0:
+            print("No new reviews since the last run. Skipping model training.")
+            return
+        
+        # Retrain on the cleaned reviews in the training window; unchanged stages load from cache
+        run_pipeline({}, stages=ANALYSIS_STAGES, inputs={"clean": load_training_window()})
         print("Scheduled pipeline run completed successfully.")
     except Exception as e:
         print(f"Error during scheduled pipeline run: {e}")
 
+def incremental_scoring_job():
+    """
+    Extracts and cleans the reviews added since the last run and scores them
+    into the predictions dataset with the saved models.
+
+    Returns:
+        int: Number of reviews scored.
+    """
+    from data_cleaning import load_stem_cache, save_stem_cache
+    from data_extraction import load_watermark
+    from sentiment_pipeline import incremental_extract_and_clean
+    from sentiment_scoring import score_reviews_to_store
+    
+    watermark = load_watermark(INCREMENTAL_SETTINGS["watermark_path"])
+    load_stem_cache()
+    new_rows = incremental_extract_and_clean()
+    save_stem_cache()
+    if new_rows == 0:
+        print("No new reviews since the last run. Skipping scoring.")
+        return 0
+    
+    # Re-score whole days from the previous watermark on; their partitions are replaced
+    if watermark:
+        start_date = watermark[INCREMENTAL_SETTINGS["date_column"]]
+    else:
+        start_date = datetime.now() - timedelta(days=INCREMENTAL_SETTINGS["initial_lookback_days"])
+    scored = score_reviews_to_store(start_date=start_date)
+    if scored == 0:
+        raise Exception(f"Scoring failed for {new_rows} new reviews.")
+    return scored
+
+def retrain_job():
+    """
+    Extracts any reviews not picked up yet and retrains the models on the
+    training window; unchanged stages load from the stage cache.
+
+    Returns:
+        int: Number of reviews in the training window.
+    """
+    from data_cleaning import load_stem_cache, save_stem_cache
+    from sentiment_pipeline import ANALYSIS_STAGES, incremental_extract_and_clean, load_training_window, run_pipeline
+    
+    load_stem_cache()
+    incremental_extract_and_clean()
+    save_stem_cache()
+    training_window = load_training_window()
+    run_pipeline({}, stages=ANALYSIS_STAGES, inputs={"clean": training_window})
+    return len(training_window)
+
+# Jobs the parallel scheduler can run, by name; cadences and locks are in SCHEDULER_SETTINGS["jobs"]
+JOBS = {
+    "incremental_scoring": incremental_scoring_job,
+    "nightly_retrain": retrain_job
+}
+
+@contextmanager
+def job_lock(name, wait_seconds=0):
+    """
+    Holds an exclusive file lock, waiting up to wait_seconds for it. The lock is
+    released by the operating system if the process dies, so a crashed run
+    never blocks the next.
+
+    Args:
+        name (str): Lock name; jobs sharing a name never run at the same time.
+        wait_seconds (float): How long to wait for a held lock before giving up.
+
+    Yields:
+        bool: Whether the lock was acquired.
+    """
+    os.makedirs(SCHEDULER_SETTINGS["lock_dir"], exist_ok=True)
+    with open(os.path.join(SCHEDULER_SETTINGS["lock_dir"], f"{name}.lock"), "w") as lock_file:
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    yield False
+                    return
+                time.sleep(SCHEDULER_SETTINGS["poll_seconds"])
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def record_run(record, history_path=None):
+    """
+    Appends one run to the JSON Lines run history.
+
+    Args:
+        record (dict): Job name, timestamps, duration, rows processed, and status.
+        history_path (str): Run history file (defaults to SCHEDULER_SETTINGS).
+
+    Returns:
+        None
+    """
+    history_path = history_path or SCHEDULER_SETTINGS["history_path"]
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+def run_job(name):
+    """
+    Runs one job under its file lock and records the run in the run history.
+    A run that finds the lock held, because another run is still going, waits
+    up to the job's lock_wait_seconds and is recorded as skipped if the lock
+    was not released by then.
+
+    Args:
+        name (str): Job name from JOBS.
+
+    Returns:
+        dict: The run history record.
+    """
+    record = {"job": name, "started_at": datetime.now().isoformat(timespec="seconds"), "pid": os.getpid()}
+    start_time = time.perf_counter()
+    job = SCHEDULER_SETTINGS["jobs"][name]
+    with job_lock(job["lock"], job.get("lock_wait_seconds", 0)) as acquired:
+        if not acquired:
+            record.update(status="skipped", rows=0, error="Another run still holds the lock.")
+        else:
+            try:
+                record.update(status="success", rows=JOBS[name]())
+            except Exception as e:
+                record.update(status="failed", rows=None, error=str(e))
+    record["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    record["seconds"] = round(time.perf_counter() - start_time, 3)
+    record_run(record)
+    print(f"Job '{name}' {record['status']} in {record['seconds']:.2f}s ({record['rows']} rows).")
+    return record
+
+def _run_job_process(name):
+    """
+    Runs a job in a child process, so a crash or memory blow-up in the job
+    never takes the scheduler down. Runs killed before they could record
+    themselves are recorded here.
+    """
+    started_at = datetime.now().isoformat(timespec="seconds")
+    start_time = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--job", name])
+    if result.returncode not in (0, 1):
+        record_run({
+            "job": name,
+            "started_at": started_at,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - start_time, 3),
+            "status": "crashed",
+            "rows": None,
+            "error": f"Job process exited with code {result.returncode}."
+        })
+
+def _check_job_future(name, future):
+    """
+    Reports an error raised in a scheduler thread, e.g. while recording a
+    crashed run, which the thread pool would otherwise swallow.
+    """
+    error = future.exception()
+    if error is not None:
+        print(f"Error running job '{name}' from the scheduler: {error!r}")
+
+def _submit_job(executor, name):
+    """
+    Hands a due job to the thread pool without waiting for it.
+    """
+    executor.submit(_run_job_process, name).add_done_callback(partial(_check_job_future, name))
+
+def start_parallel_scheduler():
+    """
+    Starts a scheduler that runs every job in SCHEDULER_SETTINGS["jobs"] on its
+    own cadence. Due jobs are handed to a thread pool that runs each one in a
+    child process, so the scheduling loop never waits for a run to finish.
+
+    Returns:
+        None
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=SCHEDULER_SETTINGS["max_concurrent_jobs"]) as executor:
+            for name, job in SCHEDULER_SETTINGS["jobs"].items():
+                scheduled = getattr(schedule.every(), job["every"])
+                if job.get("at"):
+                    scheduled = scheduled.at(job["at"])
+                scheduled.do(_submit_job, executor, name)
+                print(f"Scheduled job '{name}' every {job['every']}{' at ' + job['at'] if job.get('at') else ''}.")
+            
+            while True:
+                schedule.run_pending()
+                time.sleep(SCHEDULER_SETTINGS["poll_seconds"])
+    except Exception as e:
+        print(f"Error initializing the scheduler: {e}")
+
 def start_scheduler():
     """
     Starts the scheduler to run the pipeline at specified intervals.
@@ -30,7 +243,7 @@ def start_scheduler():
     """
     try:
         # Schedule the pipeline to run daily at a specific time
-        schedule.every().day.at("02:00").do(scheduled_pipeline_run)
+        schedule.every().day.at(SCHEDULER_CONFIG["run_time"]).do(scheduled_pipeline_run)
         print("Scheduler initialized. Waiting for the next scheduled run...")
         
         # Keep the script running to execute scheduled tasks
@@ -41,5 +254,15 @@ def start_scheduler():
         print(f"Error initializing the scheduler: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schedule the sentiment analysis pipeline.")
+    parser.add_argument("--job", choices=sorted(JOBS), help="Run one job now instead of starting the scheduler")
+    args = parser.parse_args()
+    if args.job:
+        # Exit code 1 marks a failed run for the parallel scheduler
+        sys.exit(1 if run_job(args.job)["status"] == "failed" else 0)
+    
     # Start the automation scheduler
-    start_scheduler()
+    if SCHEDULER_SETTINGS["mode"] == "parallel":
+        start_parallel_scheduler()
+    else:
+        start_scheduler()
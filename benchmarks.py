@@ -0,0 +1,402 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import BENCHMARK_SETTINGS
+from data_cleaning import clean_text, preprocess_data, stem_cache
+
+# Common review words; sampled with Zipf-like weights to mimic real vocabulary
+REVIEW_VOCABULARY = [
+    "the", "product", "is", "great", "and", "i", "love", "it", "not", "worth", "money",
+    "quality", "was", "terrible", "delivery", "fast", "arrived", "broken", "would", "buy",
+    "again", "recommend", "this", "to", "everyone", "poor", "customer", "service", "size",
+    "fits", "perfectly", "cheap", "material", "returned", "excellent", "battery", "life",
+    "screen", "works", "as", "expected", "disappointed", "with", "packaging", "stopped",
+    "working", "after", "two", "weeks", "amazing", "value", "for", "price", "comfortable",
+    "color", "looks", "different", "from", "pictures", "easy", "setup", "instructions"
+]
+# Entry points whose cold-start import time is reported, and the heavy
+# dependencies that must stay unloaded until first use
+STARTUP_MODULES = ["sentiment_pipeline", "automation", "sentiment_scoring", "scoring_service", "data_cleaning"]
+HEAVY_MODULES = ["torch", "transformers", "matplotlib", "seaborn", "wordcloud", "spacy", "nltk"]
+# Scoring processes must never load these
+SCORING_MODULES = ["sentiment_scoring", "scoring_service"]
+SCORING_FORBIDDEN = ["torch", "matplotlib"]
+REVIEW_NOISE = ["!", "!!", ".", ",", "?", ":)", "5/5", "10/10", "$20", "#1", "...", "-"]
+# First day of the synthetic review dates, fixed so results never depend on the run date
+SYNTHETIC_EPOCH = pd.Timestamp("2024-01-01")
+
+def generate_synthetic_reviews(n_rows, seed=42, min_words=5, max_words=60, length_distribution="uniform",
+                               n_days=365):
+    """
+    Generates a deterministic DataFrame of synthetic customer reviews. The data
+    depends only on the arguments: a local random state is used, so the global
+    seeds are left alone, and dates start at SYNTHETIC_EPOCH rather than today.
+
+    Args:
+        n_rows (int): Number of reviews to generate.
+        seed (int): Seed of the local np.random.RandomState.
+        min_words (int): Minimum number of words per review.
+        max_words (int): Maximum number of words per review.
+        length_distribution (str): "uniform" spreads review lengths evenly between
+            min_words and max_words; "lognormal" skews them towards short reviews
+            with a long tail, as in real review data.
+        n_days (int): Number of days, starting at SYNTHETIC_EPOCH, the review dates span.
+
+    Returns:
+        pd.DataFrame: Reviews with 'review_id', 'review_text', 'rating',
+            'sentiment', and 'review_date' columns.
+    """
+    rng = np.random.RandomState(seed)
+    weights = 1 / np.arange(1, len(REVIEW_VOCABULARY) + 1)
+    if length_distribution == "lognormal":
+        # Median of the lognormal lengths sits a quarter of the way into the range
+        median_words = min_words + (max_words - min_words) / 4
+        lengths = np.clip(rng.lognormal(math.log(median_words), 0.6, size=n_rows), min_words, max_words).astype(int)
+    else:
+        lengths = rng.randint(min_words, max_words + 1, size=n_rows)
+    n_words = int(lengths.sum())
+    word_ids = rng.choice(len(REVIEW_VOCABULARY), size=n_words, p=weights / weights.sum())
+    # Sprinkle in capitalization and punctuation that cleaning has to strip
+    rolls = rng.random_sample(n_words)
+    noise = np.array(REVIEW_NOISE, dtype=object)[rng.randint(len(REVIEW_NOISE), size=n_words)]
+    vocabulary = np.array(REVIEW_VOCABULARY, dtype=object)
+    capitalized = np.array([word.capitalize() for word in REVIEW_VOCABULARY], dtype=object)
+    words = np.where(
+        rolls < 0.1, capitalized[word_ids], np.where(rolls < 0.2, vocabulary[word_ids] + noise, vocabulary[word_ids])
+    )
+    texts = [" ".join(review) for review in np.split(words, np.cumsum(lengths)[:-1])]
+    ratings = rng.randint(1, 6, size=n_rows)
+    sentiments = np.where(ratings <= 2, "negative", np.where(ratings == 3, "neutral", "positive"))
+    dates = SYNTHETIC_EPOCH + pd.to_timedelta(rng.randint(n_days * 86400, size=n_rows), unit="s")
+    return pd.DataFrame({
+        "review_id": range(1, n_rows + 1),
+        "review_text": texts,
+        "rating": ratings,
+        "sentiment": sentiments,
+        "review_date": dates
+    })
+
+def _legacy_preprocess(data, text_column):
+    """
+    Reproduces the original row-at-a-time cleaning path for comparison.
+    """
+    data[text_column] = data[text_column].apply(lambda x: clean_text(x) if isinstance(x, str) else "")
+    return data
+
+def benchmark_cleaning(n_rows=1_000_000, seed=42):
+    """
+    Compares the original per-row cleaning path with the vectorized prefilter path.
+
+    Args:
+        n_rows (int): Number of synthetic reviews to clean.
+        seed (int): Random seed for the synthetic reviews.
+
+    Returns:
+        dict: Timings, throughput, and whether both paths produced identical output.
+    """
+    reviews = generate_synthetic_reviews(n_rows, seed=seed)
+    results = {"rows": n_rows}
+    outputs = {}
+    for name, preprocess in [("per_row", _legacy_preprocess), ("vectorized", preprocess_data)]:
+        # Start each path from a cold stem cache so neither benefits from the other
+        stem_cache.clear()
+        start_time = time.perf_counter()
+        outputs[name] = preprocess(reviews.copy(), "review_text")["review_text"]
+        elapsed = time.perf_counter() - start_time
+        results[f"{name}_seconds"] = elapsed
+        results[f"{name}_rows_per_sec"] = n_rows / elapsed if elapsed else 0.0
+        print(f"{name}: {elapsed:.2f}s ({results[f'{name}_rows_per_sec']:.0f} rows/sec)")
+    results["speedup"] = results["per_row_seconds"] / results["vectorized_seconds"]
+    results["outputs_match"] = outputs["per_row"].equals(outputs["vectorized"])
+    print(f"Speedup: {results['speedup']:.2f}x, outputs match: {results['outputs_match']}")
+    return results
+
+def benchmark_bert_data_path(n_rows=2000, seed=42):
+    """
+    Compares the original fixed-length BERT data path with batched tokenization,
+    dynamic padding, and length bucketing on CPU.
+
+    Args:
+        n_rows (int): Number of synthetic reviews to tokenize and train on.
+        seed (int): Random seed for the synthetic reviews.
+
+    Returns:
+        dict: Tokenization throughput, padding overhead, and seconds per epoch.
+    """
+    # Hide any GPU so both paths are timed on CPU, as on the scoring workers
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    from transformers import BertForSequenceClassification, BertTokenizerFast
+    from config import BERT_SETTINGS
+    from sentiment_model import create_bert_trainer, prepare_bert_datasets
+
+    tokenizer = BertTokenizerFast.from_pretrained(BERT_SETTINGS["pretrained_model"])
+    reviews = generate_synthetic_reviews(n_rows, seed=seed)
+    texts = reviews["review_text"].tolist()
+    results = {"rows": n_rows}
+
+    # Tokenization: one padded call per row versus one batched unpadded call
+    start_time = time.perf_counter()
+    for text in texts:
+        tokenizer(text, padding="max_length", truncation=True, return_tensors="pt")
+    per_row_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    encodings = tokenizer(texts, truncation=True, max_length=BERT_SETTINGS["max_length"])
+    batched_seconds = time.perf_counter() - start_time
+    real_tokens = sum(len(ids) for ids in encodings["input_ids"])
+    results["per_row_tokens_per_sec"] = real_tokens / per_row_seconds
+    results["batched_tokens_per_sec"] = real_tokens / batched_seconds
+    results["max_length_padding_share"] = 1 - real_tokens / (n_rows * BERT_SETTINGS["max_length"])
+    print(
+        f"Tokenization: per-row {results['per_row_tokens_per_sec']:.0f} tokens/sec, "
+        f"batched {results['batched_tokens_per_sec']:.0f} tokens/sec; "
+        f"max_length padding would be {results['max_length_padding_share']:.0%} of tokens."
+    )
+
+    # Training: one epoch padded to max_length versus dynamic padding with length grouping
+    train_dataset, eval_dataset, label_names = prepare_bert_datasets(reviews, "review_text", "sentiment", tokenizer)
+    for name, pad_to_max_length in [("max_length", True), ("dynamic", False)]:
+        model = BertForSequenceClassification.from_pretrained(
+            BERT_SETTINGS["pretrained_model"], num_labels=len(label_names)
+        )
+        with tempfile.TemporaryDirectory() as output_dir:
+            trainer = create_bert_trainer(
+                model, tokenizer, train_dataset, eval_dataset,
+                output_dir=output_dir, num_train_epochs=1, pad_to_max_length=pad_to_max_length
+            )
+            start_time = time.perf_counter()
+            trainer.train()
+            results[f"{name}_seconds_per_epoch"] = time.perf_counter() - start_time
+        print(f"{name} padding: {results[f'{name}_seconds_per_epoch']:.1f}s per epoch")
+    results["epoch_speedup"] = results["max_length_seconds_per_epoch"] / results["dynamic_seconds_per_epoch"]
+    print(f"Epoch speedup: {results['epoch_speedup']:.2f}x")
+    return results
+
+def _time_step(results, name, rows, func):
+    """
+    Runs one benchmark step and records its seconds and rows/sec.
+
+    Returns:
+        The step's return value.
+    """
+    start_time = time.perf_counter()
+    output = func()
+    elapsed = time.perf_counter() - start_time
+    results[name] = {"seconds": elapsed, "rows_per_sec": rows / elapsed if elapsed else 0.0}
+    print(f"  {name:<24}{elapsed:>10.3f}s {results[name]['rows_per_sec']:>14.0f} rows/sec")
+    return output
+
+def benchmark_hot_paths(n_rows, seed=42, work_dir=None):
+    """
+    Times every hot path of the pipeline on one synthetic dataset: cleaning,
+    TF-IDF fit/transform, Logistic Regression training, batch scoring,
+    extraction from a local SQLite stand-in, and plot aggregation.
+
+    Args:
+        n_rows (int): Number of synthetic reviews.
+        seed (int): Random seed for the synthetic reviews.
+        work_dir (str): Directory for the SQLite database and model artifacts.
+
+    Returns:
+        dict: Seconds and rows/sec per step.
+    """
+    # Imported here so the cleaning and BERT benchmarks do not need these dependencies
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from config import GENERAL_SETTINGS
+    from data_extraction import extract_from_sql, extract_from_sql_chunks, get_engine
+    from rollups import compute_daily_rollup, sentiment_trends_from_rollup
+    from sentiment_scoring import save_model_artifacts, score_dataframe
+    from visualization import count_sentiment_trends, count_sentiments
+
+    work_dir = work_dir or tempfile.mkdtemp(prefix="satej_benchmark_")
+    reviews = generate_synthetic_reviews(n_rows, seed=seed, length_distribution="lognormal")
+    results = {}
+    print(f"{n_rows} rows:")
+
+    # Cleaning: the per-row function on a sample, then the column path on every row
+    sample = reviews["review_text"].head(BENCHMARK_SETTINGS["clean_text_sample"]).tolist()
+    stem_cache.clear()
+    _time_step(results, "clean_text", len(sample), lambda: [clean_text(text) for text in sample])
+    stem_cache.clear()
+    cleaned = _time_step(results, "preprocess_data", n_rows, lambda: preprocess_data(reviews.copy(), "review_text"))
+
+    # Features and training
+    vectorizer = TfidfVectorizer(max_features=GENERAL_SETTINGS["max_tfidf_features"])
+    texts = cleaned["review_text"]
+    features = _time_step(results, "tfidf_fit_transform", n_rows, lambda: vectorizer.fit_transform(texts))
+    _time_step(results, "tfidf_transform", n_rows, lambda: vectorizer.transform(texts))
+    model = LogisticRegression(max_iter=1000)
+    _time_step(results, "lr_train", n_rows, lambda: model.fit(features, cleaned["sentiment"]))
+
+    # Batch scoring with artifacts saved outside the production model paths
+    model_path = os.path.join(work_dir, "logistic_regression.pkl")
+    vectorizer_path = os.path.join(work_dir, "vectorizer.pkl")
+    save_model_artifacts(model, vectorizer, model_path, vectorizer_path)
+    predictions = _time_step(results, "batch_scoring", n_rows, lambda: score_dataframe(
+        cleaned, model_path=model_path, vectorizer_path=vectorizer_path
+    ))
+
+    # Extraction from a local SQLite stand-in for the MySQL source
+    database_url = f"sqlite:///{os.path.join(work_dir, f'reviews_{n_rows}.db')}"
+    reviews.to_sql("customer_reviews", get_engine(database_url), if_exists="replace", index=False)
+    query = "SELECT * FROM customer_reviews"
+    _time_step(results, "sql_extract", n_rows, lambda: extract_from_sql(query, database_url=database_url))
+    _time_step(results, "sql_extract_chunks", n_rows, lambda: sum(
+        len(chunk) for chunk in extract_from_sql_chunks(query, database_url=database_url)
+    ))
+
+    # Plot aggregation over raw predictions versus the daily rollup
+    _time_step(results, "aggregate_raw", n_rows, lambda: (
+        count_sentiments(predictions, "predicted_sentiment"),
+        count_sentiment_trends(predictions, "review_date", "predicted_sentiment")
+    ))
+    rollup = _time_step(results, "rollup_build", n_rows, lambda: compute_daily_rollup(predictions))
+    _time_step(results, "aggregate_rollup", n_rows, lambda: sentiment_trends_from_rollup(rollup))
+    return results
+
+def benchmark_import_times(modules=None):
+    """
+    Measures the cold-start import time of entry-point modules, each in a fresh
+    interpreter with `python -X importtime`, and lists the heavy dependencies
+    each one loads.
+
+    Args:
+        modules (list): Modules to import (defaults to STARTUP_MODULES).
+
+    Returns:
+        dict: Seconds and heavy dependencies loaded per module; modules that
+            fail to import are reported with an error instead.
+    """
+    results = {}
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'Module':<24}{'Seconds':>10}  Heavy dependencies loaded")
+    for module in modules or STARTUP_MODULES:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=repo_dir, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import failed"
+            results[module] = {"error": error}
+            print(f"{module:<24}{'failed':>10}  {error}")
+            continue
+        # Lines look like "import time:  self [us] | cumulative | package"
+        loaded = {}
+        for line in completed.stderr.splitlines():
+            fields = line.split("|")
+            if line.startswith("import time:") and len(fields) == 3 and fields[1].strip().isdigit():
+                loaded[fields[2].strip()] = int(fields[1])
+        heavy = sorted({name.split(".")[0] for name in loaded} & set(HEAVY_MODULES))
+        results[module] = {"seconds": loaded.get(module, 0) / 1e6, "heavy_modules": heavy}
+        print(f"{module:<24}{results[module]['seconds']:>10.3f}  {', '.join(heavy) or '-'}")
+        if module in SCORING_MODULES and set(heavy) & set(SCORING_FORBIDDEN):
+            print(f"Warning: scoring module {module} imports {', '.join(sorted(set(heavy) & set(SCORING_FORBIDDEN)))}.")
+    return results
+
+def run_benchmark_suite(sizes=None, seed=42, output_path=None):
+    """
+    Runs the hot-path benchmarks at each dataset size, plus the entry-point
+    import times, and stores the results as JSON.
+
+    Args:
+        sizes (list): Numbers of synthetic reviews (defaults to BENCHMARK_SETTINGS).
+        seed (int): Random seed for the synthetic reviews.
+        output_path (str): Results file (defaults to a timestamped file in
+            BENCHMARK_SETTINGS["results_dir"]).
+
+    Returns:
+        str: Path of the results file.
+    """
+    sizes = sizes or BENCHMARK_SETTINGS["sizes"]
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "seed": seed,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": {}
+    }
+    # Cold-start import times are compared like any other step
+    report["results"]["startup"] = {
+        f"import {module}": result
+        for module, result in benchmark_import_times().items()
+        if "seconds" in result
+    }
+    with tempfile.TemporaryDirectory(prefix="satej_benchmark_") as work_dir:
+        for n_rows in sizes:
+            report["results"][str(n_rows)] = benchmark_hot_paths(n_rows, seed=seed, work_dir=work_dir)
+    output_path = output_path or os.path.join(
+        BENCHMARK_SETTINGS["results_dir"], f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved to {output_path}.")
+    return output_path
+
+def compare_benchmarks(baseline_path, current_path, threshold=None):
+    """
+    Compares two benchmark result files step by step.
+
+    Args:
+        baseline_path (str): Results of the reference run.
+        current_path (str): Results of the run under test.
+        threshold (float): Relative slowdown counted as a regression, e.g. 0.1
+            for 10% (defaults to BENCHMARK_SETTINGS).
+
+    Returns:
+        list: (size, step, baseline seconds, current seconds) for every regression.
+    """
+    threshold = BENCHMARK_SETTINGS["regression_threshold"] if threshold is None else threshold
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+    regressions = []
+    print(f"{'Rows':>10} {'Step':<24}{'Baseline':>10}{'Current':>10}{'Change':>9}")
+    for size, steps in current.items():
+        for step, result in steps.items():
+            reference = baseline.get(size, {}).get(step)
+            if reference is None:
+                continue
+            change = result["seconds"] / reference["seconds"] - 1 if reference["seconds"] else 0.0
+            flag = " REGRESSION" if change > threshold else ""
+            print(f"{size:>10} {step:<24}{reference['seconds']:>10.3f}{result['seconds']:>10.3f}{change:>+9.1%}{flag}")
+            if flag:
+                regressions.append((size, step, reference["seconds"], result["seconds"]))
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}.")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run pipeline benchmarks.")
+    parser.add_argument("benchmark", choices=["cleaning", "bert", "suite", "imports"], nargs="?", default="cleaning")
+    parser.add_argument("--rows", type=int, help="Number of synthetic reviews")
+    parser.add_argument("--sizes", help="Comma-separated dataset sizes for the suite")
+    parser.add_argument("--output", help="Results file for the suite")
+    parser.add_argument("--baseline", help="Results file to compare the suite run against")
+    parser.add_argument("--threshold", type=float, help="Relative slowdown counted as a regression")
+    args = parser.parse_args()
+    if args.benchmark == "suite":
+        # Time every hot path at each size; fail when a step regressed against the baseline
+        sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else None
+        results_path = run_benchmark_suite(sizes=sizes, output_path=args.output)
+        if args.baseline and compare_benchmarks(args.baseline, results_path, args.threshold):
+            sys.exit(1)
+    elif args.benchmark == "imports":
+        # Report cold-start import times of the entry points
+        benchmark_import_times()
+    elif args.benchmark == "bert":
+        # Compare BERT data paths on a small CPU-sized sample
+        benchmark_bert_data_path(n_rows=args.rows or 2000)
+    else:
+        # Compare cleaning paths on 1M synthetic reviews
+        benchmark_cleaning(n_rows=args.rows or 1_000_000)
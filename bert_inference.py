@@ -0,0 +1,222 @@
+import os
+import time
+import numpy as np
+import torch
+from transformers import AutoConfig, BertForSequenceClassification, BertTokenizerFast
+from config import BERT_INFERENCE_SETTINGS, BERT_SETTINGS, MODEL_PATHS, STORAGE_PATHS
+from storage import read_partitioned
+from utils import calculate_metrics
+
+# Tokenizer outputs fed to the model, in the order of its forward() arguments
+MODEL_INPUTS = ["input_ids", "attention_mask", "token_type_ids"]
+
+def load_bert_model(model_dir=None, quantize=False):
+    """
+    Loads the fine-tuned BERT model and tokenizer for CPU inference.
+
+    Args:
+        model_dir (str): Directory of the saved model (defaults to MODEL_PATHS).
+        quantize (bool): Apply dynamic int8 quantization to the linear layers.
+
+    Returns:
+        tuple: The model in eval mode and its tokenizer.
+    """
+    model_dir = model_dir or MODEL_PATHS["bert_model"]
+    model = BertForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    if quantize:
+        # Linear layers dominate BERT inference cost; int8 weights cut it on CPU
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    tokenizer = BertTokenizerFast.from_pretrained(model_dir)
+    return model, tokenizer
+
+def export_bert_to_onnx(model_dir=None, onnx_path=None):
+    """
+    Exports the fine-tuned BERT model to ONNX with dynamic batch and sequence axes.
+
+    Args:
+        model_dir (str): Directory of the saved model (defaults to MODEL_PATHS).
+        onnx_path (str): Output path of the ONNX file (defaults to MODEL_PATHS).
+
+    Returns:
+        str: Path of the exported model, or None if the export failed.
+    """
+    try:
+        onnx_path = onnx_path or MODEL_PATHS["bert_onnx"]
+        model, tokenizer = load_bert_model(model_dir)
+        model.config.return_dict = False  # Export plain tuple outputs
+        sample = tokenizer(["sample review for export"], return_tensors="pt")
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in MODEL_INPUTS}
+        dynamic_axes["logits"] = {0: "batch"}
+        os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in MODEL_INPUTS),
+            onnx_path,
+            input_names=MODEL_INPUTS,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+        print(f"BERT model exported to ONNX at {onnx_path}.")
+        return onnx_path
+    except Exception as e:
+        print(f"Error exporting BERT model to ONNX: {e}")
+        return None
+
+def onnx_export_is_current(model_dir=None, onnx_path=None):
+    """
+    Checks that the ONNX export exists and is newer than every file of the
+    saved model, so a model fine-tuned after the export is never served stale.
+
+    Args:
+        model_dir (str): Directory of the saved model (defaults to MODEL_PATHS).
+        onnx_path (str): Path of the ONNX export (defaults to MODEL_PATHS).
+
+    Returns:
+        bool: Whether the export is up to date.
+    """
+    model_dir = model_dir or MODEL_PATHS["bert_model"]
+    onnx_path = onnx_path or MODEL_PATHS["bert_onnx"]
+    if not os.path.exists(onnx_path):
+        return False
+    model_mtimes = [
+        os.path.getmtime(os.path.join(root, name)) for root, _, names in os.walk(model_dir) for name in names
+    ]
+    return not model_mtimes or os.path.getmtime(onnx_path) >= max(model_mtimes)
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class BertCpuScorer:
+    """
+    Batched CPU inference for the fine-tuned BERT model.
+
+    Reviews are tokenized once, sorted by token length, and scored in batches
+    padded only to the longest review in each batch; results are returned in
+    the original order.
+    """
+
+    def __init__(self, backend=None, model_dir=None, onnx_path=None, batch_size=None, num_threads=None):
+        """
+        Args:
+            backend (str): "fp32", "int8", or "onnx" (defaults to BERT_INFERENCE_SETTINGS).
+            model_dir (str): Directory of the saved model (defaults to MODEL_PATHS).
+            onnx_path (str): ONNX export used by the "onnx" backend (defaults to MODEL_PATHS).
+            batch_size (int): Reviews per forward pass (defaults to BERT_INFERENCE_SETTINGS).
+            num_threads (int): Intra-op CPU threads (defaults to BERT_INFERENCE_SETTINGS).
+        """
+        self.backend = backend or BERT_INFERENCE_SETTINGS["backend"]
+        self.batch_size = batch_size or BERT_INFERENCE_SETTINGS["batch_size"]
+        num_threads = num_threads or BERT_INFERENCE_SETTINGS["num_threads"] or os.cpu_count() or 1
+        model_dir = model_dir or MODEL_PATHS["bert_model"]
+        if self.backend == "onnx":
+            # onnxruntime is only needed when serving the ONNX export
+            import onnxruntime
+            if not onnx_export_is_current(model_dir, onnx_path):
+                export_bert_to_onnx(model_dir, onnx_path)
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = num_threads
+            self.session = onnxruntime.InferenceSession(
+                onnx_path or MODEL_PATHS["bert_onnx"], options, providers=["CPUExecutionProvider"]
+            )
+            self.model = None
+            self.tokenizer = BertTokenizerFast.from_pretrained(model_dir)
+            id2label = AutoConfig.from_pretrained(model_dir).id2label
+        elif self.backend in ("fp32", "int8"):
+            torch.set_num_threads(num_threads)
+            self.model, self.tokenizer = load_bert_model(model_dir, quantize=self.backend == "int8")
+            id2label = self.model.config.id2label
+        else:
+            raise ValueError(f"Unknown BERT inference backend: {self.backend}")
+        self.labels = np.array([id2label[i] for i in range(len(id2label))])
+
+    def _forward(self, batch):
+        if self.backend == "onnx":
+            inputs = {name: batch[name] for name in MODEL_INPUTS}
+            return self.session.run(["logits"], inputs)[0]
+        with torch.inference_mode():
+            inputs = {name: torch.from_numpy(batch[name]) for name in MODEL_INPUTS}
+            return self.model(**inputs).logits.numpy()
+
+    def predict_proba(self, texts):
+        """
+        Computes class probabilities for reviews.
+
+        Args:
+            texts (list): Review texts.
+
+        Returns:
+            np.ndarray: Probabilities with one row per review, in input order.
+        """
+        encodings = self.tokenizer(list(texts), truncation=True, max_length=BERT_SETTINGS["max_length"])
+        order = np.argsort([len(ids) for ids in encodings["input_ids"]], kind="stable")
+        probabilities = np.zeros((len(order), len(self.labels)), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            batch = self.tokenizer.pad(
+                {name: [encodings[name][i] for i in indices] for name in MODEL_INPUTS},
+                return_tensors="np"
+            )
+            probabilities[indices] = _softmax(self._forward(batch))
+        return probabilities
+
+    def predict(self, texts):
+        """
+        Predicts sentiment labels for reviews.
+
+        Args:
+            texts (list): Review texts.
+
+        Returns:
+            tuple: Predicted labels and the probability of each predicted label.
+        """
+        probabilities = self.predict_proba(texts)
+        return self.labels[probabilities.argmax(axis=1)], probabilities.max(axis=1)
+
+def compare_bert_backends(data, text_column, label_column, backends=("fp32", "int8", "onnx"), num_threads=None):
+    """
+    Scores labelled reviews with each CPU backend and reports accuracy deltas
+    against the fp32 model and throughput in reviews/sec.
+
+    Args:
+        data (pd.DataFrame): Labelled reviews, ideally held out from training.
+        text_column (str): Name of the column with text data.
+        label_column (str): Name of the column with sentiment labels.
+        backends (tuple): Backends to compare; fp32 is the reference.
+        num_threads (int): Intra-op CPU threads for every backend.
+
+    Returns:
+        dict: Metrics, accuracy delta, and reviews/sec per backend.
+    """
+    texts = data[text_column].fillna("").tolist()
+    y_true = data[label_column].tolist()
+    results = {}
+    for backend in backends:
+        try:
+            scorer = BertCpuScorer(backend=backend, num_threads=num_threads)
+            start_time = time.perf_counter()
+            labels, _ = scorer.predict(texts)
+            elapsed = time.perf_counter() - start_time
+            results[backend] = {
+                "metrics": calculate_metrics(y_true, labels),
+                "reviews_per_sec": len(texts) / elapsed if elapsed else 0.0
+            }
+        except Exception as e:
+            print(f"Error evaluating BERT backend '{backend}': {e}")
+    reference = results.get("fp32", {}).get("metrics", {}).get("accuracy")
+    for backend, result in results.items():
+        accuracy = result["metrics"].get("accuracy")
+        result["accuracy_delta"] = accuracy - reference if reference is not None and accuracy is not None else None
+        print(
+            f"{backend}: accuracy {accuracy}, delta vs fp32 {result['accuracy_delta']}, "
+            f"{result['reviews_per_sec']:.1f} reviews/sec"
+        )
+    return results
+
+if __name__ == "__main__":
+    # Compare CPU backends on a sample of cleaned, labelled reviews
+    reviews = read_partitioned(STORAGE_PATHS["cleaned_reviews"], columns=["review_text", "sentiment"])
+    sample = reviews.sample(n=min(len(reviews), 2000), random_state=42)
+    compare_bert_backends(sample, text_column="review_text", label_column="sentiment")
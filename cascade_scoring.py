@@ -0,0 +1,258 @@
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from bert_inference import BertCpuScorer
+from config import BERT_SETTINGS, CASCADE_SETTINGS, MODEL_PATHS, TRAINING_SETTINGS
+from sentiment_model import _holdout_mask
+from utils import calculate_metrics
+
+def _linear_predictions(texts, model, vectorizer, feature_store=None):
+    """
+    Scores texts with the linear model.
+
+    Returns:
+        tuple: Predicted labels, the probability of each predicted label, and
+            the margin between the two most likely classes.
+    """
+    features = feature_store.transform(texts) if feature_store is not None else vectorizer.transform(texts)
+    probabilities = model.predict_proba(features)
+    top_two = np.sort(probabilities, axis=1)[:, -2:]
+    labels = model.classes_[probabilities.argmax(axis=1)].astype(object)
+    return labels, top_two[:, 1], top_two[:, 1] - top_two[:, 0]
+
+def cascade_predict(texts, model, vectorizer, bert_scorer, threshold, feature_store=None):
+    """
+    Scores every review with the Logistic Regression model and re-scores only the
+    reviews whose probability margin is below the threshold with BERT.
+
+    Args:
+        texts (list): Cleaned review texts.
+        model (LogisticRegression): Trained classifier.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        bert_scorer (BertCpuScorer): CPU scorer for the fine-tuned BERT model.
+        threshold (float): Margin below which a review is escalated to BERT.
+        feature_store (TfidfFeatureStore): Optional store of cached feature rows
+            for the vectorizer.
+
+    Returns:
+        tuple: Predicted labels, the probability of each predicted label, and a
+            boolean mask of the escalated reviews.
+    """
+    labels, confidence, margins = _linear_predictions(texts, model, vectorizer, feature_store)
+    escalated = margins < threshold
+    if escalated.any():
+        bert_labels, bert_confidence = bert_scorer.predict([texts[i] for i in np.flatnonzero(escalated)])
+        labels[escalated] = bert_labels
+        confidence[escalated] = bert_confidence
+    return labels, confidence, escalated
+
+def tune_cascade_threshold(texts, y_true, model, vectorizer, bert_scorer, target_accuracy=None,
+                           min_reviews_per_sec=None):
+    """
+    Picks the escalation threshold on a labelled holdout set. Both models score
+    the holdout once; every candidate threshold is then simulated from those
+    predictions and the measured per-review cost of each model.
+
+    With target_accuracy, the cheapest threshold reaching it is chosen; with
+    min_reviews_per_sec, the most accurate threshold within the budget. Without
+    either, the most accurate threshold is chosen.
+
+    Args:
+        texts (list): Cleaned holdout texts.
+        y_true (list): Holdout labels.
+        model (LogisticRegression): Trained classifier.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        bert_scorer (BertCpuScorer): CPU scorer for the fine-tuned BERT model.
+        target_accuracy (float): Accuracy the cascade must reach.
+        min_reviews_per_sec (float): Throughput the cascade must sustain.
+
+    Returns:
+        tuple: Chosen threshold and a DataFrame of accuracy, escalation rate, and
+            estimated throughput for every candidate threshold.
+    """
+    y_true = np.asarray(y_true, dtype=object)
+    start_time = time.perf_counter()
+    linear_labels, _, margins = _linear_predictions(texts, model, vectorizer)
+    linear_seconds = (time.perf_counter() - start_time) / len(texts)
+    start_time = time.perf_counter()
+    bert_labels, _ = bert_scorer.predict(texts)
+    bert_seconds = (time.perf_counter() - start_time) / len(texts)
+
+    rows = []
+    for threshold in np.linspace(0, 1, 101):
+        escalated = margins < threshold
+        labels = np.where(escalated, bert_labels, linear_labels)
+        escalation_rate = escalated.mean()
+        rows.append({
+            "threshold": threshold,
+            "accuracy": (labels == y_true).mean(),
+            "escalation_rate": escalation_rate,
+            "reviews_per_sec": 1 / (linear_seconds + escalation_rate * bert_seconds)
+        })
+    candidates = pd.DataFrame(rows)
+
+    if target_accuracy is not None:
+        reaching = candidates[candidates["accuracy"] >= target_accuracy]
+        choice = reaching.iloc[0] if not reaching.empty else candidates.loc[candidates["accuracy"].idxmax()]
+    elif min_reviews_per_sec is not None:
+        within_budget = candidates[candidates["reviews_per_sec"] >= min_reviews_per_sec]
+        choice = within_budget.loc[within_budget["accuracy"].idxmax()] if not within_budget.empty else candidates.iloc[0]
+    else:
+        choice = candidates.loc[candidates["accuracy"].idxmax()]
+    print(
+        f"Cascade threshold {choice['threshold']:.2f}: accuracy {choice['accuracy']:.4f}, "
+        f"escalation rate {choice['escalation_rate']:.1%}, ~{choice['reviews_per_sec']:.0f} reviews/sec."
+    )
+    return float(choice["threshold"]), candidates
+
+def evaluate_cascade(data, text_column, label_column, model, vectorizer, bert_scorer, threshold):
+    """
+    Runs the cascade end to end on labelled reviews and compares it with each
+    model alone.
+
+    Args:
+        data (pd.DataFrame): Labelled, cleaned reviews.
+        text_column (str): Name of the column with text data.
+        label_column (str): Name of the column with sentiment labels.
+        model (LogisticRegression): Trained classifier.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        bert_scorer (BertCpuScorer): CPU scorer for the fine-tuned BERT model.
+        threshold (float): Escalation threshold.
+
+    Returns:
+        dict: Escalation rate, throughput in reviews/sec, and metrics for the
+            cascade, the Logistic Regression model, and BERT.
+    """
+    texts = data[text_column].fillna("").tolist()
+    y_true = data[label_column].tolist()
+
+    start_time = time.perf_counter()
+    cascade_labels, _, escalated = cascade_predict(texts, model, vectorizer, bert_scorer, threshold)
+    elapsed = time.perf_counter() - start_time
+    linear_labels, _, _ = _linear_predictions(texts, model, vectorizer)
+    bert_labels, _ = bert_scorer.predict(texts)
+
+    stats = {
+        "threshold": threshold,
+        "escalation_rate": float(escalated.mean()),
+        "reviews_per_sec": len(texts) / elapsed if elapsed else 0.0,
+        "cascade": calculate_metrics(y_true, cascade_labels),
+        "logistic_regression": calculate_metrics(y_true, linear_labels),
+        "bert": calculate_metrics(y_true, bert_labels)
+    }
+    print(
+        f"Cascade: escalation rate {stats['escalation_rate']:.1%}, {stats['reviews_per_sec']:.0f} reviews/sec; "
+        f"accuracy cascade {stats['cascade'].get('accuracy')}, "
+        f"logistic regression {stats['logistic_regression'].get('accuracy')}, bert {stats['bert'].get('accuracy')}."
+    )
+    return stats
+
+def reserved_eval_split(data, text_column):
+    """
+    Selects the reviews held out from both the Logistic Regression training and
+    the BERT fine-tuning on the same data, so the cascade is tuned on reviews
+    neither model has seen.
+
+    Args:
+        data (pd.DataFrame): Reviews both models were trained on, in the same
+            order (the dedup stage output).
+        text_column (str): Name of the column with cleaned text.
+
+    Returns:
+        pd.DataFrame: The reserved reviews.
+    """
+    positions = np.arange(len(data))
+    if TRAINING_SETTINGS["mode"] == "out_of_core":
+        linear_holdout = np.flatnonzero(_holdout_mask(data[text_column], TRAINING_SETTINGS["holdout_fraction"]))
+    else:
+        # Same split as train_logistic_regression
+        _, linear_holdout = train_test_split(positions, test_size=0.2, random_state=42)
+    # Same split as prepare_bert_datasets
+    _, bert_holdout = train_test_split(positions, test_size=BERT_SETTINGS["eval_fraction"], random_state=42)
+    return data.iloc[np.intersect1d(linear_holdout, bert_holdout)]
+
+def save_cascade_threshold(threshold, path=None):
+    """
+    Saves the tuned escalation threshold for batch scoring.
+
+    Args:
+        threshold (float): Escalation threshold.
+        path (str): Output path (defaults to MODEL_PATHS).
+
+    Returns:
+        None
+    """
+    path = path or MODEL_PATHS["cascade_threshold"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"threshold": threshold}, f)
+
+def load_cascade_threshold(path=None):
+    """
+    Loads the escalation threshold saved by tune_cascade.
+
+    Args:
+        path (str): Path of the saved threshold (defaults to MODEL_PATHS).
+
+    Returns:
+        float: The threshold, or None if none was saved.
+    """
+    path = path or MODEL_PATHS["cascade_threshold"]
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["threshold"]
+
+def tune_cascade(data, text_column, label_column, model, vectorizer, bert_scorer=None):
+    """
+    Tunes the escalation threshold on half of the reviews reserved from both
+    models' training, evaluates it on the other half, and saves it for batch
+    scoring.
+
+    Args:
+        data (pd.DataFrame): Reviews both models were trained on, in the same order.
+        text_column (str): Name of the column with cleaned text.
+        label_column (str): Name of the column with sentiment labels.
+        model (LogisticRegression): Trained classifier.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        bert_scorer (BertCpuScorer): CPU scorer for the fine-tuned BERT model
+            (defaults to one for the saved model).
+
+    Returns:
+        float: The tuned threshold, or None if tuning failed.
+    """
+    try:
+        reserved = reserved_eval_split(data, text_column)
+        reserved = reserved.sample(n=min(len(reserved), CASCADE_SETTINGS["holdout_size"]), random_state=42)
+        if len(reserved) < 2:
+            raise ValueError(f"only {len(reserved)} reserved reviews")
+        bert_scorer = bert_scorer or BertCpuScorer()
+        tuning, evaluation = reserved.iloc[:len(reserved) // 2], reserved.iloc[len(reserved) // 2:]
+        threshold, _ = tune_cascade_threshold(
+            tuning[text_column].fillna("").tolist(),
+            tuning[label_column].tolist(),
+            model,
+            vectorizer,
+            bert_scorer,
+            target_accuracy=CASCADE_SETTINGS["target_accuracy"],
+            min_reviews_per_sec=CASCADE_SETTINGS["min_reviews_per_sec"]
+        )
+        evaluate_cascade(evaluation, text_column, label_column, model, vectorizer, bert_scorer, threshold)
+        save_cascade_threshold(threshold)
+        return threshold
+    except Exception as e:
+        print(f"Error tuning the cascade threshold: {e}")
+        return None
+
+if __name__ == "__main__":
+    from deduplication import deduplicate_reviews
+    from sentiment_pipeline import load_training_window
+    from sentiment_scoring import load_model_artifacts
+
+    # Tune the threshold for the saved models on the reviews reserved from their training window
+    model, vectorizer = load_model_artifacts()
+    training_data = deduplicate_reviews(load_training_window(), text_column="review_text")
+    tune_cascade(training_data, "review_text", "sentiment", model, vectorizer)
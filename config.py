@@ -19,7 +19,105 @@ API_CONFIG = {
 MODEL_PATHS = {
     "logistic_regression": "./satej_models/logistic_regression_model.pkl",
     "vectorizer": "./satej_models/tfidf_vectorizer.pkl",
-    "bert_model": "./satej_models/bert_model/"
+    "bert_model": "./satej_models/bert_model/",
+    "bert_onnx": "./satej_models/bert_model.onnx",  # ONNX export of the fine-tuned BERT model
+    "cascade_threshold": "./satej_models/cascade_threshold.json"  # Escalation threshold tuned for the models above
+}
+
+# Model training settings
+TRAINING_SETTINGS = {
+    # "tfidf" trains in memory; "search" tunes the TF-IDF model first; "out_of_core" streams the full cleaned history from disk
+    "mode": "tfidf",
+    "hashing_features": 2 ** 20,  # Feature space of the stateless hashing vectorizer
+    "chunk_size": 50000,  # Reviews per partial_fit call in out-of-core mode
+    "holdout_fraction": 0.2,  # Share of reviews held out for evaluation
+    "n_epochs": 1  # Passes over the data in out-of-core mode
+}
+
+# Hyperparameter search for the TF-IDF Logistic Regression model (TRAINING_SETTINGS["mode"] = "search")
+MODEL_SELECTION_SETTINGS = {
+    "vectorizer_grid": {"max_features": [5000, 20000], "ngram_range": [(1, 1), (1, 2)]},
+    "classifier_grid": {"C": [0.1, 1.0, 10.0], "class_weight": [None, "balanced"]},
+    "n_folds": 5,
+    "n_workers": None,  # None uses every CPU core
+    "halving_factor": 3,  # Keep the best third of the candidates each round
+    "min_fraction": 0.1,  # Share of each training fold used in the first round
+    "scoring": "f1_score",  # Metric from utils.calculate_metrics used to rank candidates
+    "leaderboard_path": "./satej_models/model_selection_leaderboard.csv"
+}
+
+# Near-duplicate review removal before training (see deduplication.py)
+DEDUP_SETTINGS = {
+    "enabled": True,
+    "index_path": "./satej_state/dedup_index/",  # Signatures of every cluster representative seen so far
+    "num_perm": 128,  # MinHash permutations per signature
+    "bands": 16,  # LSH bands of num_perm / bands values; 16 x 8 finds ~95% of pairs at 0.8 similarity
+    "shingle_size": 3,  # Words per shingle
+    "seed": 42,  # Seed of the MinHash permutations
+    "threshold": 0.8,  # Estimated Jaccard similarity at which reviews count as duplicates
+    "min_tokens": 5,  # Shorter reviews (e.g. "great product") are never collapsed
+    "n_workers": None,  # Worker processes for signatures (None uses all CPU cores)
+    "chunk_size": 20000,  # Reviews per signature chunk sent to each worker
+    "max_segments": 64,  # Segments merged into one when exceeded
+    "retention_days": None  # Days a representative is matched (None uses the training window)
+}
+
+# Sparse TF-IDF feature store (see feature_store.py)
+FEATURE_STORE_SETTINGS = {
+    "enabled": True,
+    "path": "./satej_features/tfidf/",  # One subdirectory per vectorizer version
+    "vectorizer_refit_days": 7,  # Reuse the saved vocabulary this long before refitting it
+    "max_segments": 64  # Segments merged into one when exceeded after training
+}
+
+# BERT fine-tuning settings
+BERT_SETTINGS = {
+    "pretrained_model": "bert-base-uncased",
+    "max_length": 512,  # Longest tokenized review; shorter reviews are padded per batch only
+    "eval_fraction": 0.2,  # Share of reviews held out for evaluation
+    "num_train_epochs": 3,
+    "train_batch_size": 8,
+    "eval_batch_size": 32,
+    "output_dir": "./satej_bert_model",
+    "token_cache_dir": "./satej_cache/bert_tokens/"  # Tokenized datasets reused across runs
+}
+
+# CPU inference settings for the fine-tuned BERT model
+BERT_INFERENCE_SETTINGS = {
+    "backend": "int8",  # "fp32", "int8" (dynamic quantization), or "onnx" (requires onnxruntime)
+    "batch_size": 32,  # Reviews per forward pass, grouped by length
+    "num_threads": None  # Intra-op CPU threads (None uses all CPU cores)
+}
+
+# Cascade scoring settings (Logistic Regression first, BERT for low-confidence reviews)
+CASCADE_SETTINGS = {
+    "enabled": False,  # Batch scoring escalates low-confidence reviews to BERT with the tuned threshold
+    "target_accuracy": None,  # Pick the cheapest threshold reaching this holdout accuracy
+    "min_reviews_per_sec": None,  # Or the most accurate threshold meeting this throughput budget
+    "holdout_size": 5000  # Reserved labelled reviews used to tune and evaluate the threshold
+}
+
+# Pipeline DAG runner settings
+PIPELINE_SETTINGS = {
+    "cache_dir": "./satej_cache/stages/",  # Stage outputs keyed by content hash
+    "cache_max_gb": 20,  # Least recently used outputs are evicted above this size
+    "cache_max_age_days": 30,  # Outputs not used for this long are evicted
+    "max_workers": 3  # Independent stages run concurrently (EDA, LR training, BERT)
+}
+
+# Batch scoring settings
+SCORING_SETTINGS = {
+    "batch_size": 10000,  # Reviews vectorized and scored per batch
+    "n_workers": None  # Scoring worker processes (None uses all CPU cores)
+}
+
+# Online scoring service settings
+SERVICE_SETTINGS = {
+    "host": "127.0.0.1",
+    "port": 8080,
+    "max_batch_size": 64,  # Requests combined into one transform/predict_proba call
+    "max_wait_ms": 5,  # Time the batcher waits for more requests before scoring
+    "cache_size": 10000  # Recently scored texts kept in the result cache
 }
 
 # Scheduler settings for automation
@@ -27,10 +125,80 @@ SCHEDULER_CONFIG = {
     "run_time": "02:00"  # 24-hour format time for pipeline execution
 }
 
+# Parallel scheduler jobs (see automation.py)
+SCHEDULER_SETTINGS = {
+    # "parallel" runs the jobs below in child processes; "inline" runs one daily pipeline inside the loop
+    "mode": "parallel",
+    "jobs": {
+        # "every" is a schedule unit ("minute", "hour", "day", ...); "at" is optional.
+        # Jobs sharing a lock never overlap; both jobs advance the extraction watermark.
+        # "lock_wait_seconds" is how long a run waits for a held lock before it is skipped;
+        # an hourly run can skip, but a skipped nightly retrain would be lost for a day.
+        "incremental_scoring": {"every": "hour", "at": ":05", "lock": "reviews", "lock_wait_seconds": 0},
+        "nightly_retrain": {
+            "every": "day", "at": SCHEDULER_CONFIG["run_time"], "lock": "reviews", "lock_wait_seconds": 3 * 3600
+        }
+    },
+    "max_concurrent_jobs": 2,  # Job processes running at once
+    "lock_dir": "./satej_state/locks/",
+    "history_path": "./satej_state/run_history.jsonl",  # One JSON record per run
+    "poll_seconds": 1  # Interval between checks for due jobs
+}
+
+# Text cleaning settings
+CLEANING_SETTINGS = {
+    "n_workers": None,  # Worker processes for batched cleaning (None uses all CPU cores)
+    "chunk_size": 10000,  # Rows per chunk sent to each cleaning worker
+    "stem_cache_size": 100000,  # Maximum number of tokens kept in the LRU stem cache
+    "stem_cache_path": "./satej_cache/stem_cache.pkl"  # Persisted stem cache for warm starts
+}
+
+# Parquet datasets passed between pipeline stages, partitioned by review day
+STORAGE_PATHS = {
+    "raw_reviews": "./satej_data/customer_reviews_raw/",
+    "api_reviews": "./satej_data/customer_reviews_api/",
+    "cleaned_reviews": "./satej_data/customer_reviews_cleaned/",  # Cleaned reviews appended each run
+    "staged_cleaned_reviews": "./satej_data/customer_reviews_cleaned_staged/",  # Cleaned output of a streamed extraction
+    "predictions": "./satej_data/sentiment_predictions/",
+    "daily_rollup": "./satej_data/sentiment_daily_rollup/"  # Review counts per day, sentiment, and rating
+}
+
+# Compact dtypes of review DataFrames (see utils.apply_review_schema): Arrow-backed
+# strings for text, categoricals for repeated values, and one-byte ratings
+REVIEW_SCHEMA = {
+    "review_id": "int64",
+    "product_id": "category",
+    "review_text": "string[pyarrow]",
+    "rating": "Int8",  # Nullable, so missing ratings survive the downcast
+    "sentiment": "category",
+    "review_date": "datetime64[ns]"
+}
+
+# Incremental extraction settings for scheduled runs
+INCREMENTAL_SETTINGS = {
+    "table": "customer_reviews",
+    "date_column": "review_date",
+    "key_column": "review_id",  # Monotonic primary key used to break ties within a date
+    "watermark_path": "./satej_state/review_watermark.json",  # Last review processed
+    "initial_lookback_days": 7,  # Window fetched on the first run, before a watermark exists
+    "training_window_days": 7,  # Days of cleaned reviews used for retraining
+    "chunk_size": 50000  # Rows per extracted chunk
+}
+
 # Visualization settings
 VISUALIZATION_SETTINGS = {
     "default_palette": "viridis",
-    "plot_style": "ggplot"
+    "plot_style": "ggplot",
+    "trend_window_days": 90,  # Days of predictions loaded for sentiment trend plots
+    "word_cloud_top_k": 2000,  # Words tracked by the bounded word-frequency sketch
+    "word_count_chunk_size": 50000  # Reviews counted per batch for the word cloud
+}
+
+# Report rendering settings
+REPORT_SETTINGS = {
+    "headless": True,  # Render figures to files instead of opening plot windows
+    "report_dir": "./satej_reports/",  # A dated subdirectory is created per run
+    "n_workers": 4  # Processes rendering charts in parallel
 }
 
 # Logging configuration
@@ -39,6 +207,23 @@ LOGGING_CONFIG = {
     "log_level": "INFO"  # Options: DEBUG, INFO, WARNING, ERROR, CRITICAL
 }
 
+# Stage instrumentation settings (see utils.track_stage)
+METRICS_SETTINGS = {
+    "json_path": "./satej_logs/metrics.json",
+    "prometheus_path": "./satej_logs/metrics.prom",  # Prometheus text format for the textfile collector
+    "profile": False,  # Capture a cProfile profile per stage
+    "trace_memory": False,  # Record peak Python allocations per stage with tracemalloc
+    "profile_dir": "./satej_logs/profiles/"
+}
+
+# Benchmark suite settings (python benchmarks.py suite)
+BENCHMARK_SETTINGS = {
+    "sizes": [10000, 100000, 1000000],  # Synthetic review counts timed by the suite
+    "clean_text_sample": 10000,  # Reviews timed through the per-row clean_text path
+    "results_dir": "./satej_benchmarks/",
+    "regression_threshold": 0.10  # Relative slowdown reported as a regression
+}
+
 # General settings
 GENERAL_SETTINGS = {
     "random_seed": 42,  # Ensures reproducibility across random processes
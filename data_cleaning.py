@@ -1,15 +1,223 @@
+import os
+import pickle
+import time
 import pandas as pd
 import re
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
-from spacy.lang.en import English
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from config import CLEANING_SETTINGS, STORAGE_PATHS
+from storage import read_partitioned, write_partitioned
+from utils import SPAWN_CONTEXT, apply_review_schema, frame_memory_mb, record_metrics, tracked
 
-# Initialize NLP tools
-stop_words = set(stopwords.words("english"))  # Set of common stopwords
-stemmer = PorterStemmer()  # Stemmer to reduce words to their base form
-nlp = English()
-tokenizer = nlp.tokenizer  # Tokenizer for splitting text into tokens
+# Characters Python's re treats as \s in str patterns (those where str.isspace() is true).
+# Arrow-backed columns run .str.replace through RE2, whose \s is ASCII-only, so the
+# prefilter spells the class out to match clean_text on every dtype.
+UNICODE_WHITESPACE = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+
+# NLP tools are created on first use and shared by every caller in the process
+_nlp_tools = None
+_nlp_tools_lock = threading.Lock()
+
+def get_nlp_tools():
+    """
+    Loads NLTK and its English stopword list, stemmer, and tokenizer on first use,
+    so importing this module stays cheap for processes that never clean text.
+
+    Returns:
+        tuple: Set of common stopwords, the stemmer that reduces words to their
+            base form, and the word tokenizer function.
+    """
+    global _nlp_tools
+    if _nlp_tools is None:
+        with _nlp_tools_lock:
+            if _nlp_tools is None:
+                from nltk.corpus import stopwords
+                from nltk.stem import PorterStemmer
+                from nltk.tokenize import word_tokenize
+                _nlp_tools = (set(stopwords.words("english")), PorterStemmer(), word_tokenize)
+    return _nlp_tools
+
+class StemCache:
+    """
+    Bounded LRU cache mapping tokens to their stems.
+
+    Review vocabulary is heavily skewed towards a small set of frequent words, so
+    most stem lookups are repeats that can skip PorterStemmer entirely.
+    """
+
+    def __init__(self, max_size):
+        """
+        Args:
+            max_size (int): Maximum number of tokens to keep before evicting the
+                least recently used entry.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.track_new_entries = False  # Enabled in worker processes to ship new stems back
+        self._entries = OrderedDict()
+        self._new_entries = {}
+
+    def stem(self, word):
+        """
+        Returns the stem for a token, computing and caching it on a miss.
+
+        Args:
+            word (str): Token to stem.
+
+        Returns:
+            str: Stemmed token.
+        """
+        stemmed = self._entries.get(word)
+        if stemmed is not None:
+            self._entries.move_to_end(word)
+            self.hits += 1
+            return stemmed
+        self.misses += 1
+        stemmed = get_nlp_tools()[1].stem(word)
+        self._store(word, stemmed)
+        if self.track_new_entries:
+            self._new_entries[word] = stemmed
+        return stemmed
+
+    def _store(self, word, stemmed):
+        self._entries[word] = stemmed
+        self._entries.move_to_end(word)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def update(self, entries):
+        """
+        Adds precomputed stems to the cache without touching the hit/miss counters.
+
+        Args:
+            entries (dict): Mapping of tokens to stems.
+
+        Returns:
+            None
+        """
+        for word, stemmed in entries.items():
+            self._store(word, stemmed)
+
+    def clear(self):
+        """
+        Empties the cache and resets its counters.
+
+        Returns:
+            None
+        """
+        self._entries.clear()
+        self._new_entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def entries(self):
+        """
+        Returns:
+            dict: Snapshot of the cached tokens and stems, oldest first.
+        """
+        return dict(self._entries)
+
+    def pop_new_entries(self):
+        """
+        Returns:
+            dict: Stems computed since the last call, for merging into another cache.
+        """
+        new_entries, self._new_entries = self._new_entries, {}
+        return new_entries
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit and miss counters, hit rate, and current cache size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size
+        }
+
+    def save(self, path):
+        """
+        Persists the cached stems to disk.
+
+        Args:
+            path (str): Path of the pickle file to write.
+
+        Returns:
+            None
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(list(self._entries.items()), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path):
+        """
+        Warms the cache from a file written by save, if it exists.
+
+        Args:
+            path (str): Path of the pickle file to read.
+
+        Returns:
+            bool: True if the cache was loaded.
+        """
+        if not os.path.exists(path):
+            return False
+        with open(path, "rb") as f:
+            self.update(OrderedDict(pickle.load(f)))
+        return True
+
+stem_cache = StemCache(CLEANING_SETTINGS["stem_cache_size"])  # Shared by clean_text and cleaning workers
+
+def prefilter_text_column(texts):
+    """
+    Removes non-alphabetic characters, lowercases, and collapses whitespace for a
+    whole column in one vectorized pass. Non-string values become empty strings.
+
+    Args:
+        texts (pd.Series): Raw text column.
+
+    Returns:
+        pd.Series: Prefiltered text, ready for tokenization.
+    """
+    try:
+        accessor = texts.str
+    except AttributeError:
+        # Columns without any string values (numeric, datetime, all-missing) have no text to keep
+        return pd.Series("", index=texts.index, dtype=object)
+    # String methods return missing values for non-string elements, which are blanked at the end
+    texts = accessor.replace(f"[^a-zA-Z{UNICODE_WHITESPACE}]+", "", regex=True)
+    texts = texts.str.lower().str.replace(f"[{UNICODE_WHITESPACE}]+", " ", regex=True).str.strip(" ")
+    return texts.fillna("")
+
+def normalize_tokens(text):
+    """
+    Tokenizes prefiltered text, removes stopwords, and stems the remaining tokens.
+
+    Args:
+        text (str): Lowercase text containing only letters and single spaces.
+
+    Returns:
+        str: Preprocessed and cleaned text.
+    """
+    if not text:
+        return ""
+    stop_words, _, word_tokenize = get_nlp_tools()
+    
+    # Tokenize the text into words
+    words = word_tokenize(text)
+    
+    # Remove stopwords and apply stemming to each remaining word
+    words = [stem_cache.stem(word) for word in words if word not in stop_words]
+    
+    # Reconstruct cleaned text
+    return " ".join(words)
 
 def clean_text(text):
     """
@@ -25,25 +233,17 @@ def clean_text(text):
         # Remove non-alphabetic characters and extra spaces
         text = re.sub(r"[^a-zA-Z\s]", "", text)
         text = text.lower().strip()  # Convert to lowercase for consistency
-        
-        # Tokenize the text into words
-        words = word_tokenize(text)
-        
-        # Remove stopwords from the tokenized list
-        words = [word for word in words if word not in stop_words]
-        
-        # Apply stemming to each word
-        words = [stemmer.stem(word) for word in words]
-        
-        # Reconstruct cleaned text
-        return " ".join(words)
+        return normalize_tokens(text)
     except Exception as e:
         print(f"Error cleaning text: {e}")
         return ""
 
+@tracked("clean_sequential")
 def preprocess_data(data, text_column):
     """
-    Applies text cleaning to a specified column in the DataFrame.
+    Applies text cleaning to a specified column in the DataFrame. Character
+    filtering runs vectorized over the whole column; only tokenization, stopword
+    removal, and stemming run per row.
 
     Args:
         data (pd.DataFrame): Data containing the text to preprocess.
@@ -53,21 +253,229 @@ def preprocess_data(data, text_column):
         pd.DataFrame: DataFrame with the cleaned text column.
     """
     try:
-        # Apply the clean_text function to each row in the specified column
-        data[text_column] = data[text_column].apply(lambda x: clean_text(x) if isinstance(x, str) else "")
+        prefiltered = prefilter_text_column(data[text_column])
+        _replace_text_column(data, text_column, [normalize_tokens(text) for text in prefiltered])
         print(f"Successfully cleaned data in the column '{text_column}'.")
         return data
     except Exception as e:
         print(f"Error preprocessing data: {e}")
         return data
 
+def _replace_text_column(data, text_column, cleaned):
+    """
+    Replaces the text column in place, keeping an Arrow-backed string dtype so
+    the cleaned text stays as compact as the raw text.
+    """
+    dtype = data[text_column].dtype
+    data[text_column] = pd.array(cleaned, dtype=dtype) if isinstance(dtype, pd.StringDtype) else cleaned
+
+def load_stem_cache(path=None):
+    """
+    Warms the shared stem cache from disk.
+
+    Args:
+        path (str): Path of the persisted cache (defaults to CLEANING_SETTINGS).
+
+    Returns:
+        None
+    """
+    try:
+        path = path or CLEANING_SETTINGS["stem_cache_path"]
+        if stem_cache.load(path):
+            print(f"Stem cache loaded from {path} ({stem_cache.stats()['size']} entries).")
+    except Exception as e:
+        print(f"Error loading stem cache: {e}")
+
+def save_stem_cache(path=None):
+    """
+    Persists the shared stem cache to disk so later runs start warm.
+
+    Args:
+        path (str): Path of the persisted cache (defaults to CLEANING_SETTINGS).
+
+    Returns:
+        None
+    """
+    try:
+        path = path or CLEANING_SETTINGS["stem_cache_path"]
+        stem_cache.save(path)
+        print(f"Stem cache saved to {path} ({stem_cache.stats()['size']} entries).")
+    except Exception as e:
+        print(f"Error saving stem cache: {e}")
+
+def _init_cleaning_worker(cache_entries):
+    """
+    Seeds a worker process with the parent's stem cache.
+
+    Args:
+        cache_entries (dict): Mapping of tokens to stems from the parent process.
+
+    Returns:
+        None
+    """
+    stem_cache.update(cache_entries)
+    stem_cache.track_new_entries = True
+
+def _clean_chunk(texts):
+    """
+    Cleans a chunk of texts inside a worker process.
+
+    Args:
+        texts (pd.Series): Raw text values to clean.
+
+    Returns:
+        tuple: Cleaned texts, worker process id, seconds spent cleaning, stem cache
+            hits and misses for the chunk, and stems computed for the first time.
+    """
+    start_time = time.perf_counter()
+    hits, misses = stem_cache.hits, stem_cache.misses
+    cleaned = [normalize_tokens(text) for text in prefilter_text_column(texts)]
+    return (
+        cleaned,
+        os.getpid(),
+        time.perf_counter() - start_time,
+        stem_cache.hits - hits,
+        stem_cache.misses - misses,
+        stem_cache.pop_new_entries()
+    )
+
+def preprocess_data_parallel(data, text_column, n_workers=None, chunk_size=None, raise_errors=False, executor=None):
+    """
+    Applies text cleaning to a specified column using a pool of worker processes.
+    The column is split into chunks that are cleaned concurrently and reassembled
+    in the original row order, producing the same output as preprocess_data.
+
+    Args:
+        data (pd.DataFrame): Data containing the text to preprocess.
+        text_column (str): Name of the column with text data.
+        n_workers (int): Number of worker processes (defaults to CLEANING_SETTINGS).
+        chunk_size (int): Number of rows per chunk (defaults to CLEANING_SETTINGS).
+        raise_errors (bool): Re-raise cleaning failures instead of returning the
+            data with its text uncleaned.
+        executor (ProcessPoolExecutor): Running cleaning pool to use instead of
+            starting one, as preprocess_frames_parallel does.
+
+    Returns:
+        pd.DataFrame: DataFrame with the cleaned text column.
+    """
+    try:
+        n_workers = n_workers or CLEANING_SETTINGS["n_workers"] or os.cpu_count() or 1
+        chunk_size = chunk_size or CLEANING_SETTINGS["chunk_size"]
+        memory_before_mb = frame_memory_mb(data)
+        texts = data[text_column]
+        chunks = [texts.iloc[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        
+        start_time = time.perf_counter()
+        pooled = executor is not None or (n_workers > 1 and len(chunks) > 1)
+        if not pooled:
+            # Small inputs are not worth the cost of starting worker processes
+            results = [_clean_chunk(chunk) for chunk in chunks]
+        elif executor is not None:
+            results = list(executor.map(_clean_chunk, chunks))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(n_workers, len(chunks)),
+                mp_context=SPAWN_CONTEXT,
+                initializer=_init_cleaning_worker,
+                initargs=(stem_cache.entries(),)
+            ) as executor:
+                # executor.map yields results in submission order
+                results = list(executor.map(_clean_chunk, chunks))
+        elapsed = time.perf_counter() - start_time
+        
+        # Reassemble the cleaned chunks and collect per-worker throughput
+        cleaned = []
+        worker_stats = {}
+        for chunk_cleaned, pid, seconds, hits, misses, new_entries in results:
+            cleaned.extend(chunk_cleaned)
+            rows, busy = worker_stats.get(pid, (0, 0.0))
+            worker_stats[pid] = (rows + len(chunk_cleaned), busy + seconds)
+            if pooled:
+                # Fold the workers' stems and counters back into the shared cache
+                stem_cache.update(new_entries)
+                stem_cache.hits += hits
+                stem_cache.misses += misses
+        _replace_text_column(data, text_column, cleaned)
+        memory_after_mb = frame_memory_mb(data)
+        record_metrics(
+            "clean", elapsed, rows_in=len(texts), rows_out=len(cleaned),
+            memory_before_mb=memory_before_mb, memory_after_mb=memory_after_mb
+        )
+        
+        for pid, (rows, busy) in sorted(worker_stats.items()):
+            print(f"Cleaning worker {pid}: {rows} rows at {rows / busy if busy else 0:.0f} rows/sec.")
+        print(
+            f"Successfully cleaned {len(cleaned)} rows in the column '{text_column}' "
+            f"with {len(worker_stats)} workers in {elapsed:.2f}s "
+            f"({len(cleaned) / elapsed if elapsed else 0:.0f} rows/sec)."
+        )
+        print(f"Stem cache: {stem_cache.stats()}")
+        print(f"Review frame memory: {memory_before_mb:.1f} MB before cleaning, {memory_after_mb:.1f} MB after.")
+        return data
+    except Exception as e:
+        print(f"Error preprocessing data in parallel: {e}")
+        if raise_errors:
+            raise
+        return data
+
+def _rebatch(frames, batch_rows):
+    """
+    Re-slices an iterable of DataFrames into batches of batch_rows rows; the
+    last batch may be shorter.
+    """
+    buffered, rows = [], 0
+    for frame in frames:
+        buffered.append(frame)
+        rows += len(frame)
+        while rows >= batch_rows:
+            combined = pd.concat(buffered, ignore_index=True)
+            yield combined.iloc[:batch_rows].copy()
+            buffered, rows = [combined.iloc[batch_rows:]], rows - batch_rows
+    if rows:
+        yield pd.concat(buffered, ignore_index=True)
+
+def preprocess_frames_parallel(frames, text_column, n_workers=None, chunk_size=None):
+    """
+    Cleans a stream of DataFrames, such as the batches of a Parquet dataset, on
+    one pool of worker processes. The frames are re-sliced into batches of one
+    chunk per worker, so small frames (e.g. a single day's reviews) are still
+    cleaned in parallel, and only one batch is held in memory at a time.
+    Cleaning failures are raised.
+
+    Args:
+        frames (iterable): DataFrames containing the text to preprocess.
+        text_column (str): Name of the column with text data.
+        n_workers (int): Number of worker processes (defaults to CLEANING_SETTINGS).
+        chunk_size (int): Number of rows per chunk (defaults to CLEANING_SETTINGS).
+
+    Yields:
+        pd.DataFrame: Cleaned batches, in input order.
+    """
+    n_workers = n_workers or CLEANING_SETTINGS["n_workers"] or os.cpu_count() or 1
+    chunk_size = chunk_size or CLEANING_SETTINGS["chunk_size"]
+    batches = _rebatch(frames, n_workers * chunk_size)
+    if n_workers == 1:
+        for batch in batches:
+            yield preprocess_data_parallel(batch, text_column, n_workers=1, chunk_size=chunk_size, raise_errors=True)
+        return
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=SPAWN_CONTEXT,
+        initializer=_init_cleaning_worker,
+        initargs=(stem_cache.entries(),)
+    ) as executor:
+        for batch in batches:
+            yield preprocess_data_parallel(
+                batch, text_column, chunk_size=chunk_size, raise_errors=True, executor=executor
+            )
+
 if __name__ == "__main__":
-    # Load the raw data from a CSV file
-    raw_data = pd.read_csv("customer_reviews_sql.csv")
+    # Load the raw data from the Parquet dataset with compact dtypes
+    raw_data = apply_review_schema(read_partitioned(STORAGE_PATHS["raw_reviews"]))
     
-    # Clean the 'review_text' column in the dataset
-    cleaned_data = preprocess_data(raw_data, text_column="review_text")
+    # Clean the 'review_text' column in the dataset across all CPU cores
+    cleaned_data = preprocess_data_parallel(raw_data, text_column="review_text")
     
-    # Save the cleaned data back to a CSV file
-    cleaned_data.to_csv("customer_reviews_cleaned.csv", index=False)
+    # Save the cleaned data to its own Parquet dataset
+    write_partitioned(cleaned_data, STORAGE_PATHS["cleaned_reviews"], overwrite=True)
     print("Cleaned data successfully saved.")
@@ -1,6 +1,17 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import pandas as pd
 import sqlalchemy
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import STORAGE_PATHS
+from storage import write_partitioned
+from utils import apply_review_schema, frame_memory_mb, record_metrics, track_stage
 
 # Database configuration details
 DB_CONFIG = {
@@ -15,69 +26,338 @@ DB_CONFIG = {
 API_URL = "https://example-api.com/reviews"
 API_KEY = "your_api_key"
 
-def extract_from_sql(query):
+# Pagination, concurrency, and retry settings for the review API
+API_PAGE_SIZE = 500  # Records requested per page
+API_MAX_CONCURRENCY = 4  # Pages fetched in parallel over the pooled session
+API_TIMEOUT = 30  # Seconds before a page request is abandoned
+API_MAX_RETRIES = 3  # Retries for connection errors and 429/5xx responses
+API_BACKOFF_FACTOR = 0.5  # Exponential backoff base between retries, in seconds
+
+# Number of rows fetched per chunk when streaming query results
+SQL_CHUNK_SIZE = 50000
+
+# Pooled SQLAlchemy engines keyed by database URL, reused across extraction calls
+_engines = {}
+
+def get_engine(database_url=None):
+    """
+    Returns a pooled SQLAlchemy engine, creating it on first use.
+
+    Args:
+        database_url (str): SQLAlchemy database URL. Defaults to the MySQL
+            database in DB_CONFIG; a URL such as "sqlite:///reviews.db" can be
+            used as a local stand-in.
+
+    Returns:
+        sqlalchemy.engine.Engine: Engine shared by all calls with the same URL.
+    """
+    if database_url is None:
+        database_url = (
+            f"mysql+pymysql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+        )
+    engine = _engines.get(database_url)
+    if engine is None:
+        # pool_pre_ping replaces connections dropped by the server between scheduled runs
+        engine = sqlalchemy.create_engine(database_url, pool_pre_ping=True)
+        _engines[database_url] = engine
+    return engine
+
+def _prepare_query(query, params):
+    """
+    Wraps parameterized queries in a SQLAlchemy text clause so ":name" placeholders
+    are bound portably; plain queries are passed through unchanged.
+    """
+    return sqlalchemy.text(query) if params else query
+
+def extract_from_sql(query, database_url=None, params=None, columns=None):
     """
     Extracts data from an SQL database using the provided query.
     Utilizes SQLAlchemy for database connection and querying.
 
     Args:
         query (str): SQL query to execute for data extraction.
+        database_url (str): Optional SQLAlchemy URL overriding DB_CONFIG.
+        params (dict): Optional values for ":name" placeholders in the query.
+        columns (list): Columns to keep (defaults to every column returned).
 
     Returns:
-        pd.DataFrame: Data extracted from the SQL database.
+        pd.DataFrame: Data extracted from the SQL database, with the compact
+            dtypes of REVIEW_SCHEMA.
     """
     try:
-        # Establish the database connection using SQLAlchemy
-        engine = sqlalchemy.create_engine(
-            f"mysql+pymysql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-        )
+        # Reuse the pooled engine for the configured database
+        engine = get_engine(database_url)
         # Execute the query and fetch the data into a DataFrame
-        with engine.connect() as connection:
-            data = pd.read_sql(query, connection)
+        with track_stage("extract_sql") as counters, engine.connect() as connection:
+            data = pd.read_sql(_prepare_query(query, params), connection, params=params)
+            counters["memory_before_mb"] = frame_memory_mb(data)
+            data = apply_review_schema(data, columns)
+            counters["memory_after_mb"] = frame_memory_mb(data)
+            counters["rows_out"] = len(data)
+            counters["bytes"] = int(data.memory_usage(index=True).sum())
         print("Successfully extracted data from the SQL database.")
         return data
     except Exception as e:
         print(f"Error during SQL data extraction: {e}")
         return None
 
-def extract_from_api():
+def extract_from_sql_chunks(query, chunksize=SQL_CHUNK_SIZE, database_url=None, params=None, columns=None):
+    """
+    Streams data from an SQL database in DataFrame chunks.
+    Uses a server-side cursor where the database driver supports one, so only
+    one chunk of the result set is held in memory at a time.
+
+    Args:
+        query (str): SQL query to execute for data extraction.
+        chunksize (int): Number of rows per yielded chunk.
+        database_url (str): Optional SQLAlchemy URL overriding DB_CONFIG.
+        params (dict): Optional values for ":name" placeholders in the query.
+        columns (list): Columns to keep (defaults to every column returned).
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the query result, with the compact
+            dtypes of REVIEW_SCHEMA.
+    """
+    try:
+        engine = get_engine(database_url)
+        with engine.connect() as connection:
+            connection = connection.execution_options(stream_results=True)
+            rows = 0
+            fetch_start = time.perf_counter()
+            for chunk in pd.read_sql(_prepare_query(query, params), connection, params=params, chunksize=chunksize):
+                memory_before_mb = frame_memory_mb(chunk)
+                chunk = apply_review_schema(chunk, columns)
+                # Time only the fetch and conversion, not the consumer's work between chunks
+                record_metrics(
+                    "extract_sql", time.perf_counter() - fetch_start,
+                    rows_out=len(chunk), bytes_processed=int(chunk.memory_usage(index=True).sum()),
+                    memory_before_mb=memory_before_mb, memory_after_mb=frame_memory_mb(chunk)
+                )
+                rows += len(chunk)
+                yield chunk
+                fetch_start = time.perf_counter()
+        print(f"Successfully streamed {rows} rows from the SQL database.")
+    except Exception as e:
+        # Re-raise so consumers never mistake a failed stream for a complete one
+        print(f"Error during streaming SQL data extraction: {e}")
+        raise
+
+def load_watermark(path):
+    """
+    Loads the high-water mark of the last review processed.
+
+    Args:
+        path (str): Path to the watermark JSON file.
+
+    Returns:
+        dict: Watermark with the last review date and key, or None on the first run.
+    """
+    try:
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading watermark from {path}: {e}")
+        return None
+
+def save_watermark(path, watermark):
+    """
+    Persists the high-water mark atomically so an interrupted write never leaves
+    a corrupt file behind.
+
+    Args:
+        path (str): Path to the watermark JSON file.
+        watermark (dict): Last review date and key processed.
+
+    Returns:
+        None
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(watermark, f)
+    os.replace(temp_path, path)
+
+def extract_incremental(watermark, table, date_column, key_column, initial_lookback_days=7,
+                        chunksize=SQL_CHUNK_SIZE, database_url=None, columns=None):
+    """
+    Streams only the reviews added after the given high-water mark, ordered by
+    date and key so the last row of the last chunk is the new watermark.
+
+    Args:
+        watermark (dict): Last processed values of date_column and key_column, or
+            None to fetch the initial lookback window.
+        table (str): Table containing the reviews.
+        date_column (str): Review date column.
+        key_column (str): Primary key column used to break ties within a date.
+        initial_lookback_days (int): Days fetched when no watermark exists yet.
+        chunksize (int): Number of rows per yielded chunk.
+        database_url (str): Optional SQLAlchemy URL overriding DB_CONFIG.
+        columns (list): Columns to select; date_column and key_column are always
+            included. Defaults to every column of the table.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of new reviews.
+    """
+    if watermark is None:
+        start_date = datetime.now() - timedelta(days=initial_lookback_days)
+        condition = f"{date_column} >= :start_date"
+        params = {"start_date": start_date.strftime("%Y-%m-%d")}
+    else:
+        condition = (
+            f"{date_column} > :last_date OR ({date_column} = :last_date AND {key_column} > :last_key)"
+        )
+        last_date = watermark[date_column]
+        if isinstance(last_date, str) and last_date[10:11] == "T":
+            # Watermarks saved with the ISO "T" separator would compare after same-day text dates
+            last_date = last_date.replace("T", " ", 1)
+        params = {"last_date": last_date, "last_key": watermark[key_column]}
+    # Select only the needed columns so unused ones are never transferred or loaded
+    selected = ", ".join(dict.fromkeys(list(columns) + [date_column, key_column])) if columns else "*"
+    query = f"SELECT {selected} FROM {table} WHERE {condition} ORDER BY {date_column}, {key_column}"
+    yield from extract_from_sql_chunks(query, chunksize=chunksize, database_url=database_url, params=params)
+
+def _create_api_session(max_concurrency, max_retries, backoff_factor):
+    """
+    Creates a Requests session with a connection pool sized for the concurrent
+    page fetches and automatic retries with exponential backoff.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"]
+    )
+    adapter = HTTPAdapter(pool_maxsize=max_concurrency, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Configure headers for API authentication
+    session.headers["Authorization"] = f"Bearer {API_KEY}"
+    return session
+
+def _fetch_api_page(session, api_url, page, page_size, timeout):
+    """
+    Fetches one page of reviews.
+
+    Returns:
+        tuple: List of review records and the response size in bytes.
+    """
+    response = session.get(api_url, params={"page": page, "page_size": page_size}, timeout=timeout)
+    response.raise_for_status()
+    payload = response.json()
+    if isinstance(payload, dict):
+        # Paginated APIs commonly wrap the records in an envelope
+        payload = next((payload[key] for key in ("data", "results", "reviews") if key in payload), [payload])
+    return payload, len(response.content)
+
+def extract_from_api_pages(api_url=API_URL, page_size=API_PAGE_SIZE, max_concurrency=API_MAX_CONCURRENCY,
+                           timeout=API_TIMEOUT, max_retries=API_MAX_RETRIES, backoff_factor=API_BACKOFF_FACTOR):
+    """
+    Streams a paginated API endpoint as DataFrame batches, one per page.
+    Up to max_concurrency pages are in flight at once over a pooled session, and
+    pages are yielded in order. The first page shorter than page_size ends the
+    stream; a page longer than page_size means the endpoint is not paginated.
+
+    Args:
+        api_url (str): Endpoint to fetch; a local server can be used as a stand-in.
+        page_size (int): Records requested per page.
+        max_concurrency (int): Maximum number of concurrent page requests.
+        timeout (float): Seconds before a page request is abandoned.
+        max_retries (int): Retries per page for connection errors and 429/5xx responses.
+        backoff_factor (float): Exponential backoff base between retries, in seconds.
+
+    Yields:
+        pd.DataFrame: Records from each non-empty page, with the compact dtypes
+            of REVIEW_SCHEMA.
+    """
+    session = _create_api_session(max_concurrency, max_retries, backoff_factor)
+    pages = 0
+    rows = 0
+    total_bytes = 0
+    memory_before_mb = 0.0
+    memory_after_mb = 0.0
+    start_time = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = deque()
+            next_page = 1
+            while True:
+                # Keep the window of in-flight requests full
+                while len(pending) < max_concurrency:
+                    pending.append(executor.submit(_fetch_api_page, session, api_url, next_page, page_size, timeout))
+                    next_page += 1
+                records, size = pending.popleft().result()
+                pages += 1
+                rows += len(records)
+                total_bytes += size
+                if records:
+                    page = pd.DataFrame(records)
+                    memory_before_mb += frame_memory_mb(page)
+                    page = apply_review_schema(page)
+                    memory_after_mb += frame_memory_mb(page)
+                    yield page
+                if len(records) != page_size:
+                    # Last page reached; pages requested beyond it are not needed
+                    for future in pending:
+                        future.cancel()
+                    break
+        elapsed = time.perf_counter() - start_time
+        record_metrics(
+            "extract_api", elapsed, rows_out=rows, bytes_processed=total_bytes,
+            memory_before_mb=memory_before_mb, memory_after_mb=memory_after_mb
+        )
+        print(
+            f"Successfully extracted {pages} pages from the API in {elapsed:.2f}s "
+            f"({pages / elapsed if elapsed else 0:.1f} pages/sec, "
+            f"{total_bytes / elapsed if elapsed else 0:.0f} bytes/sec)."
+        )
+    except Exception as e:
+        # Re-raise so consumers never mistake a failed stream for a complete one
+        print(f"Error during paginated API data extraction: {e}")
+        raise
+    finally:
+        session.close()
+
+def extract_from_api(api_url=API_URL):
     """
     Fetches data from an API endpoint.
-    Utilizes the Requests library to make GET requests and fetch data in JSON format.
+    Utilizes a pooled Requests session to fetch the paginated JSON data concurrently.
+
+    Args:
+        api_url (str): Endpoint to fetch (defaults to API_URL).
 
     Returns:
         pd.DataFrame: Data extracted from the API.
     """
     try:
-        # Configure headers for API authentication
-        headers = {"Authorization": f"Bearer {API_KEY}"}
-        response = requests.get(API_URL, headers=headers)
-        # Validate the response and parse JSON data
-        if response.status_code == 200:
-            data = response.json()
-            print("Successfully extracted data from the API.")
-            return pd.DataFrame(data)  # Convert JSON response to a Pandas DataFrame
-        else:
-            print(f"API request failed with status code {response.status_code}: {response.text}")
-            return None
+        pages = list(extract_from_api_pages(api_url))
+        print("Successfully extracted data from the API.")
+        # Categoricals with different categories per page concatenate as objects, so compact again
+        return apply_review_schema(pd.concat(pages, ignore_index=True)) if pages else pd.DataFrame()
     except Exception as e:
         print(f"Error during API data extraction: {e}")
         return None
 
-def save_to_file(data, filename):
+def save_to_file(data, filename, append=False):
     """
     Saves a DataFrame to a CSV file.
 
     Args:
         data (pd.DataFrame): Data to save.
         filename (str): Path to the output file.
+        append (bool): Append to an existing file instead of overwriting it.
 
     Returns:
         None
     """
     try:
-        # Save the DataFrame to a CSV file without the index
-        data.to_csv(filename, index=False)
+        # Save the DataFrame to a CSV file without the index, writing the header only once
+        write_header = not (append and os.path.exists(filename))
+        data.to_csv(filename, index=False, mode="a" if append else "w", header=write_header)
         print(f"Data successfully saved to {filename}.")
     except Exception as e:
         print(f"Error saving data to file: {e}")
@@ -86,12 +366,11 @@ if __name__ == "__main__":
     # Example SQL query to extract customer reviews
     sql_query = "SELECT * FROM customer_reviews"
     
-    # Extract data from SQL and API
-    sql_data = extract_from_sql(sql_query)
-    api_data = extract_from_api()
+    # Stream SQL data to Parquet chunk by chunk so the full table is never held in memory
+    for i, chunk in enumerate(extract_from_sql_chunks(sql_query)):
+        write_partitioned(chunk, STORAGE_PATHS["raw_reviews"], overwrite=i == 0)
     
-    # Save extracted data to CSV files
-    if sql_data is not None:
-        save_to_file(sql_data, "customer_reviews_sql.csv")
+    # Extract data from the API and save it to Parquet
+    api_data = extract_from_api()
     if api_data is not None:
-        save_to_file(api_data, "customer_reviews_api.csv")
+        write_partitioned(api_data, STORAGE_PATHS["api_reviews"], overwrite=True)
@@ -0,0 +1,438 @@
+import json
+import os
+import shutil
+import time
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+import numpy as np
+import pandas as pd
+from config import DEDUP_SETTINGS, INCREMENTAL_SETTINGS
+from utils import SPAWN_CONTEXT, track_stage
+
+# Mersenne prime modulus of the MinHash permutations
+MINHASH_PRIME = (1 << 31) - 1
+
+# Arrays of an index segment; keys[i] identifies the review whose signature is row i
+# and days[i] is its review date in days since 1970-01-01
+SEGMENT_ARRAYS = ["keys", "signatures", "band_keys", "days"]
+
+# Version of the segment layout; older indexes are rebuilt
+INDEX_FORMAT = 2
+
+# Settings that change the signatures; the index is rebuilt when any of them changes
+SIGNATURE_SETTINGS = ["num_perm", "bands", "shingle_size", "seed"]
+
+def _shingle_hashes(text, shingle_size):
+    """
+    Hashes the distinct word shingles of a text. Texts shorter than one
+    shingle are hashed as a whole.
+    """
+    tokens = text.split()
+    shingles = {" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    return [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles or {text}]
+
+def minhash_signatures(texts, num_perm, shingle_size, seed, block_size=1000):
+    """
+    Computes MinHash signatures over word shingles.
+
+    Args:
+        texts (list): Cleaned texts.
+        num_perm (int): Hash permutations per signature.
+        shingle_size (int): Words per shingle.
+        seed (int): Seed of the permutations; signatures are only comparable
+            when computed with the same seed.
+        block_size (int): Texts permuted together in one array operation.
+
+    Returns:
+        np.ndarray: One row of num_perm uint32 values per text.
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, MINHASH_PRIME, size=(num_perm, 1), dtype=np.int64)
+    b = rng.randint(0, MINHASH_PRIME, size=(num_perm, 1), dtype=np.int64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for start in range(0, len(texts), block_size):
+        hashes = [_shingle_hashes(text, shingle_size) for text in texts[start:start + block_size]]
+        lengths = np.fromiter((len(shingles) for shingles in hashes), dtype=np.int64, count=len(hashes))
+        values = np.fromiter(chain.from_iterable(hashes), dtype=np.int64, count=lengths.sum()) % MINHASH_PRIME
+        # Permute every shingle of the block at once, then take each text's minimum
+        permuted = (a * values + b) % MINHASH_PRIME
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        signatures[start:start + len(hashes)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+def lsh_band_keys(signatures, bands):
+    """
+    Hashes each band of a signature to one key; near-duplicates share at least
+    one band key with high probability.
+
+    Args:
+        signatures (np.ndarray): MinHash signatures.
+        bands (int): Number of bands the signature is split into.
+
+    Returns:
+        np.ndarray: One row of uint64 band keys per signature.
+    """
+    rows = signatures.shape[1] // bands
+    banded = signatures[:, :bands * rows].reshape(len(signatures), bands, rows).astype(np.uint64)
+    # Fixed odd multipliers; the products wrap around modulo 2**64
+    multipliers = np.random.RandomState(0).randint(1, 1 << 62, size=rows, dtype=np.int64).astype(np.uint64) | 1
+    return (banded * multipliers).sum(axis=2, dtype=np.uint64)
+
+def _similarity(left, right):
+    """
+    Returns:
+        np.ndarray: Estimated Jaccard similarity of each pair of signature rows.
+    """
+    return (left == right).mean(axis=1)
+
+def _cluster(signatures, band_keys, threshold):
+    """
+    Groups near-duplicate rows of one batch.
+
+    Rows sharing a band key are compared with the earliest row holding that
+    key, and similar rows are linked to it, so every cluster collapses onto
+    its earliest row.
+
+    Returns:
+        np.ndarray: Index of each row's cluster representative.
+    """
+    n_rows = len(signatures)
+    parents = np.arange(n_rows)
+    if not n_rows:
+        return parents
+    for band in range(band_keys.shape[1]):
+        order = np.argsort(band_keys[:, band], kind="stable")
+        sorted_keys = band_keys[order, band]
+        group_starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        # The stable sort puts the earliest row of each key first in its group
+        firsts = order[np.maximum.accumulate(np.where(group_starts, np.arange(n_rows), 0))]
+        candidates = np.flatnonzero(firsts != order)
+        rows, firsts = order[candidates], firsts[candidates]
+        similar = _similarity(signatures[rows], signatures[firsts]) >= threshold
+        np.minimum.at(parents, rows[similar], firsts[similar])
+    # Follow the links until every row points at its representative
+    while True:
+        roots = parents[parents]
+        if np.array_equal(roots, parents):
+            return roots
+        parents = roots
+
+def review_keys(data, text_column, date_column):
+    """
+    Identifies reviews across runs by their date and cleaned text, so a review
+    extracted again is recognized as itself rather than as a duplicate.
+
+    Returns:
+        np.ndarray: One uint64 key per review.
+    """
+    identity = pd.DataFrame({"text": data[text_column].fillna("").astype(str).to_numpy()})
+    if date_column in data.columns:
+        identity["date"] = pd.to_datetime(data[date_column]).to_numpy()
+    return pd.util.hash_pandas_object(identity, index=False).to_numpy()
+
+def _day_number(value):
+    """
+    Converts a date-like value to days since 1970-01-01.
+    """
+    return np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64)
+
+def review_days(data, date_column):
+    """
+    Returns:
+        np.ndarray: Review date of each review in days since 1970-01-01; today
+            for reviews without a date.
+    """
+    today = pd.Timestamp.now().normalize()
+    if date_column not in data.columns:
+        return np.full(len(data), _day_number(today), dtype=np.int64)
+    dates = pd.to_datetime(data[date_column]).fillna(today)
+    return dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+
+class MinHashLSHIndex:
+    """
+    Persistent MinHash/LSH index of the representative review of every
+    near-duplicate cluster seen so far.
+
+    Each run appends the signatures of its new representatives as a segment,
+    so the index grows incrementally across runs. Representatives expire with
+    the training window: rows dated more than DEDUP_SETTINGS["retention_days"]
+    ago are no longer matched, so a review is never dropped in favor of one
+    that has left the training data, and compaction removes them. Segments are
+    read through memory-mapped arrays; only the keys and band keys are held in
+    memory, sorted for lookups by binary search. Changing a signature setting
+    discards the index, since old and new signatures cannot be compared.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Directory of the index (defaults to DEDUP_SETTINGS).
+        """
+        self.path = path or DEDUP_SETTINGS["index_path"]
+        self.settings = {name: DEDUP_SETTINGS[name] for name in SIGNATURE_SETTINGS}
+        self.settings["format"] = INDEX_FORMAT
+        self.threshold = DEDUP_SETTINGS["threshold"]
+        retention_days = DEDUP_SETTINGS["retention_days"] or INCREMENTAL_SETTINGS["training_window_days"]
+        self.expiry_day = _day_number(pd.Timestamp.now()) - retention_days
+        self._reset_if_settings_changed()
+        self._load_segments()
+
+    def _reset_if_settings_changed(self):
+        settings_path = os.path.join(self.path, "settings.json")
+        if os.path.exists(settings_path):
+            with open(settings_path, "r", encoding="utf-8") as f:
+                if json.load(f) == self.settings:
+                    return
+            shutil.rmtree(self.path, ignore_errors=True)
+            print("Deduplication index: signature settings changed, rebuilding the index.")
+        os.makedirs(self.path, exist_ok=True)
+        with open(settings_path, "w", encoding="utf-8") as f:
+            json.dump(self.settings, f)
+
+    def _load_segments(self):
+        """
+        Memory-maps every complete segment, sorts the keys, and sorts the band
+        keys of the unexpired rows per band.
+        """
+        self._signatures = []
+        keys, band_keys, days, offsets = [], [], [], [0]
+        for name in sorted(os.listdir(self.path)):
+            if not name.startswith("segment-"):
+                continue  # Skips segments still being written
+            arrays = {
+                array: np.load(os.path.join(self.path, name, f"{array}.npy"), mmap_mode="r")
+                for array in SEGMENT_ARRAYS
+            }
+            keys.append(np.asarray(arrays["keys"]))
+            band_keys.append(np.asarray(arrays["band_keys"]))
+            days.append(np.asarray(arrays["days"]))
+            self._signatures.append(arrays["signatures"])
+            offsets.append(offsets[-1] + len(arrays["keys"]))
+        self._offsets = np.array(offsets)
+        if keys:
+            self._keys = np.concatenate(keys)
+            band_keys = np.concatenate(band_keys)
+            self._days = np.concatenate(days)
+        else:
+            self._keys = np.empty(0, dtype=np.uint64)
+            band_keys = np.empty((0, self.settings["bands"]), dtype=np.uint64)
+            self._days = np.empty(0, dtype=np.int64)
+        self._sorted_keys = np.sort(self._keys)
+        # Expired rows are left out of the band lookups, so nothing matches them
+        live = np.flatnonzero(self._days >= self.expiry_day)
+        order = np.argsort(band_keys[live], axis=0, kind="stable")
+        self._band_order = live[order]
+        self._sorted_band_keys = np.take_along_axis(band_keys[live], order, axis=0)
+
+    def contains(self, keys):
+        """
+        Checks which reviews are already in the index, expired or not.
+
+        Args:
+            keys (np.ndarray): Review keys from review_keys.
+
+        Returns:
+            np.ndarray: Boolean mask of the keys present in the index.
+        """
+        if not len(self._sorted_keys):
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(self._sorted_keys, keys), len(self._sorted_keys) - 1)
+        return self._sorted_keys[positions] == keys
+
+    def _gather_signatures(self, rows):
+        """
+        Reads the signatures of index rows from their segments.
+        """
+        segment_ids = np.searchsorted(self._offsets, rows, side="right") - 1
+        signatures = np.empty((len(rows), self.settings["num_perm"]), dtype=np.uint32)
+        for segment_id in np.unique(segment_ids):
+            selected = np.flatnonzero(segment_ids == segment_id)
+            signatures[selected] = self._signatures[segment_id][rows[selected] - self._offsets[segment_id]]
+        return signatures
+
+    def _write_segment(self, keys, signatures, band_keys, days):
+        """
+        Writes a segment to a temporary directory and renames it into place,
+        so readers never see a partial segment.
+        """
+        name = uuid.uuid4().hex
+        temp_dir = os.path.join(self.path, f".tmp-{name}")
+        os.makedirs(temp_dir)
+        arrays = {"keys": keys, "signatures": signatures, "band_keys": band_keys, "days": days}
+        for array, values in arrays.items():
+            np.save(os.path.join(temp_dir, f"{array}.npy"), values)
+        os.rename(temp_dir, os.path.join(self.path, f"segment-{name}"))
+
+    def query(self, signatures, band_keys):
+        """
+        Finds an unexpired indexed near-duplicate of each signature. Every index
+        row sharing a band key is compared, not only the first one.
+
+        Args:
+            signatures (np.ndarray): MinHash signatures.
+            band_keys (np.ndarray): Their LSH band keys.
+
+        Returns:
+            np.ndarray: Index row of a similar representative, or -1 if none.
+        """
+        matches = np.full(len(signatures), -1, dtype=np.int64)
+        if not len(self._band_order):
+            return matches
+        for band in range(self.settings["bands"]):
+            unresolved = np.flatnonzero(matches < 0)
+            if not len(unresolved):
+                break
+            sorted_keys = self._sorted_band_keys[:, band]
+            starts = np.searchsorted(sorted_keys, band_keys[unresolved, band], side="left")
+            counts = np.searchsorted(sorted_keys, band_keys[unresolved, band], side="right") - starts
+            # Pair each signature with every index row in its bucket
+            candidates = np.repeat(unresolved, counts)
+            positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+            rows = self._band_order[positions, band]
+            similar = _similarity(signatures[candidates], self._gather_signatures(rows)) >= self.threshold
+            matches[candidates[similar]] = rows[similar]
+        return matches
+
+    def _compute_signatures(self, texts):
+        """
+        Computes signatures in chunks on a pool of worker processes.
+        """
+        chunk_size = DEDUP_SETTINGS["chunk_size"]
+        n_workers = DEDUP_SETTINGS["n_workers"] or os.cpu_count() or 1
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        settings = [repeat(self.settings[name]) for name in ["num_perm", "shingle_size", "seed"]]
+        if n_workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=min(n_workers, len(chunks)), mp_context=SPAWN_CONTEXT) as executor:
+                parts = list(executor.map(minhash_signatures, chunks, *settings))
+        else:
+            parts = list(map(minhash_signatures, chunks, *settings))
+        if not parts:
+            return np.empty((0, self.settings["num_perm"]), dtype=np.uint32)
+        return np.concatenate(parts)
+
+    def deduplicate(self, data, text_column, date_column="review_date", update=True):
+        """
+        Collapses near-duplicate reviews onto one representative each.
+
+        Near-duplicates within the batch are collapsed onto a review already in
+        the index, or else onto their earliest row; the remaining rows are looked up in the index, and rows similar to an
+        unexpired review from an earlier run are dropped too. Reviews with
+        fewer than DEDUP_SETTINGS["min_tokens"] cleaned tokens are always kept,
+        since short texts such as "great product" coincide without being copies.
+
+        Args:
+            data (pd.DataFrame): Cleaned reviews.
+            text_column (str): Name of the column with cleaned text.
+            date_column (str): Name of the column with review dates, used with
+                the text to recognize reviews extracted again.
+            update (bool): Add the batch's new representatives to the index.
+
+        Returns:
+            tuple: Deduplicated reviews and a dict of removal statistics.
+        """
+        start_time = time.perf_counter()
+        with track_stage("dedup", rows_in=len(data)) as counters:
+            texts = data[text_column].fillna("").astype(str)
+            min_tokens = max(DEDUP_SETTINGS["min_tokens"], self.settings["shingle_size"])
+            eligible = np.flatnonzero(texts.str.split().str.len().to_numpy() >= min_tokens)
+            keys = review_keys(data.iloc[eligible], text_column, date_column)
+            days = review_days(data.iloc[eligible], date_column)
+            signatures = self._compute_signatures(texts.iloc[eligible].tolist())
+            band_keys = lsh_band_keys(signatures, self.settings["bands"])
+
+            # Collapse copies within the batch onto their earliest row, putting reviews already
+            # in the index first: a review kept by an earlier run (re-extracted by an overlapping
+            # window) stays, and new near-copies of it are dropped instead of replacing it
+            indexed = self.contains(keys)
+            order = np.argsort(~indexed, kind="stable")
+            representatives = order[_cluster(signatures[order], band_keys[order], self.threshold)]
+            batch_duplicates = np.empty(len(eligible), dtype=bool)
+            batch_duplicates[order] = representatives != order
+            batch_duplicates &= ~indexed
+            unique = np.flatnonzero(~batch_duplicates & ~indexed)
+            seen_duplicates = self.query(signatures[unique], band_keys[unique]) >= 0
+
+            keep = np.ones(len(data), dtype=bool)
+            keep[eligible[batch_duplicates]] = False
+            keep[eligible[unique[seen_duplicates]]] = False
+            deduplicated = data[keep]
+            counters["rows_out"] = len(deduplicated)
+
+            new = unique[~seen_duplicates]
+            if update and len(new):
+                self._write_segment(keys[new], signatures[new], band_keys[new], days[new])
+                self._load_segments()
+                expired = np.count_nonzero(self._days < self.expiry_day)
+                if len(self._signatures) > DEDUP_SETTINGS["max_segments"] or expired > len(self._keys) // 2:
+                    self.compact()
+
+        stats = {
+            "rows_in": len(data),
+            "rows_out": len(deduplicated),
+            "removed_within_batch": int(batch_duplicates.sum()),
+            "removed_seen_before": int(seen_duplicates.sum()),
+            "removed_fraction": 1 - len(deduplicated) / len(data) if len(data) else 0.0,
+            # Vectorization and training cost grow linearly with the rows
+            "estimated_speedup": len(data) / len(deduplicated) if len(deduplicated) else 1.0,
+            "index_rows": len(self._keys),
+            "seconds": time.perf_counter() - start_time
+        }
+        return deduplicated, stats
+
+    def compact(self):
+        """
+        Merges all segments into one, dropping expired rows.
+
+        Returns:
+            None
+        """
+        rows = np.flatnonzero(self._days >= self.expiry_day)
+        if len(self._signatures) <= 1 and len(rows) == len(self._keys):
+            return
+        old_segments = [name for name in os.listdir(self.path) if name.startswith("segment-")]
+        if len(rows):
+            signatures = self._gather_signatures(rows)
+            self._write_segment(
+                self._keys[rows], signatures, lsh_band_keys(signatures, self.settings["bands"]), self._days[rows]
+            )
+        for name in old_segments:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        self._load_segments()
+        print(f"Deduplication index compacted to one segment of {len(self._keys)} rows.")
+
+def deduplicate_reviews(data, text_column, date_column="review_date", index_path=None):
+    """
+    Removes near-duplicate and templated reviews before vectorization and
+    training, updating the persistent index with the new representatives.
+
+    Args:
+        data (pd.DataFrame): Cleaned reviews.
+        text_column (str): Name of the column with cleaned text.
+        date_column (str): Name of the column with review dates.
+        index_path (str): Directory of the index (defaults to DEDUP_SETTINGS).
+
+    Returns:
+        pd.DataFrame: Deduplicated reviews; the input unchanged if deduplication
+            is disabled or fails.
+    """
+    if not DEDUP_SETTINGS["enabled"]:
+        return data
+    try:
+        deduplicated, stats = MinHashLSHIndex(index_path).deduplicate(data, text_column, date_column)
+        print(
+            f"Deduplication removed {stats['rows_in'] - stats['rows_out']} of {stats['rows_in']} reviews "
+            f"({stats['removed_within_batch']} within the batch, {stats['removed_seen_before']} seen before) "
+            f"in {stats['seconds']:.2f}s; estimated training speedup {stats['estimated_speedup']:.2f}x."
+        )
+        return deduplicated
+    except Exception as e:
+        print(f"Error deduplicating reviews, keeping all of them: {e}")
+        return data
+
+if __name__ == "__main__":
+    from sentiment_pipeline import load_training_window
+
+    # Deduplicate the current training window and report what was removed
+    deduplicate_reviews(load_training_window(), text_column="review_text")
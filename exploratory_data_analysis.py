@@ -1,69 +1,221 @@
+from collections import Counter
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
+from config import STORAGE_PATHS, VISUALIZATION_SETTINGS
+from storage import iter_partitioned, read_partitioned
 
-# Configure Matplotlib for better visual outputs
-plt.style.use("ggplot")
+_style_applied = False
 
-def visualize_rating_distribution(data, rating_column):
+def load_pyplot():
+    """
+    Imports Matplotlib on first use, so modules that never plot do not pay for it.
+
+    Returns:
+        module: matplotlib.pyplot configured with the project plot style.
+    """
+    global _style_applied
+    import matplotlib.pyplot as plt
+    if not _style_applied:
+        # Configure Matplotlib for better visual outputs
+        plt.style.use("ggplot")
+        _style_applied = True
+    return plt
+
+def show_or_save_figure(output_path=None):
+    """
+    Displays the current figure, or saves and closes it when an output path is given.
+
+    Args:
+        output_path (str): File to save the figure to.
+
+    Returns:
+        None
+    """
+    plt = load_pyplot()
+    if output_path:
+        plt.savefig(output_path, bbox_inches="tight")
+        plt.close()
+    else:
+        plt.show()
+
+def count_ratings(data, rating_column):
+    """
+    Counts the occurrences of each rating.
+
+    Args:
+        data (pd.DataFrame): Dataset containing ratings.
+        rating_column (str): Name of the column with ratings.
+
+    Returns:
+        pd.Series: Review counts indexed by rating.
+    """
+    return data[rating_column].value_counts().sort_index()
+
+class WordFrequencySketch:
+    """
+    Bounded-memory word counts using the batch Misra-Gries heavy-hitters sketch.
+
+    Each batch of texts is counted exactly and merged into the sketch. When more
+    than `capacity` words are tracked, the count of the (capacity + 1)-th most
+    frequent word is subtracted from every counter and words that drop to zero
+    are discarded. Any word occurring in more than 1/capacity of all tokens is
+    guaranteed to be kept, and counts are underestimated by at most
+    total_tokens / capacity, which preserves the ranking a word cloud needs.
+    """
+
+    def __init__(self, capacity):
+        """
+        Args:
+            capacity (int): Maximum number of words kept between batches.
+        """
+        self.capacity = capacity
+        self.total_tokens = 0
+        self._counts = Counter()
+
+    def update(self, texts):
+        """
+        Adds a batch of whitespace-tokenized texts to the sketch.
+
+        Args:
+            texts (iterable): Cleaned texts.
+
+        Returns:
+            None
+        """
+        batch_counts = Counter()
+        for text in texts:
+            if isinstance(text, str):
+                batch_counts.update(text.split())
+        self.total_tokens += sum(batch_counts.values())
+        self._counts.update(batch_counts)
+        if len(self._counts) > self.capacity:
+            # Subtract the count of the first word that does not fit
+            threshold = sorted(self._counts.values(), reverse=True)[self.capacity]
+            self._counts = Counter({
+                word: count - threshold for word, count in self._counts.items() if count > threshold
+            })
+
+    def frequencies(self):
+        """
+        Returns:
+            dict: Estimated frequencies of the tracked words.
+        """
+        return dict(self._counts)
+
+def _text_batches(data, text_column, chunk_size):
+    """
+    Yields the text column in batches from a DataFrame or an iterable of DataFrames.
+    """
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    for chunk in chunks:
+        for start in range(0, len(chunk), chunk_size):
+            yield chunk[text_column].iloc[start:start + chunk_size]
+
+def count_words(data, text_column, top_k=None, chunk_size=None):
+    """
+    Counts word occurrences across a column of cleaned text, keeping at most
+    top_k words in memory however large the corpus is.
+
+    Args:
+        data (pd.DataFrame or iterable): Dataset containing text data, or an
+            iterable of DataFrame chunks such as storage.iter_partitioned.
+        text_column (str): Name of the column with text data.
+        top_k (int): Number of words tracked (defaults to VISUALIZATION_SETTINGS).
+        chunk_size (int): Rows counted per batch (defaults to VISUALIZATION_SETTINGS).
+
+    Returns:
+        dict: Estimated frequencies of the most frequent words.
+    """
+    sketch = WordFrequencySketch(top_k or VISUALIZATION_SETTINGS["word_cloud_top_k"])
+    for texts in _text_batches(data, text_column, chunk_size or VISUALIZATION_SETTINGS["word_count_chunk_size"]):
+        sketch.update(texts)
+    return sketch.frequencies()
+
+def plot_rating_counts(rating_counts, output_path=None):
+    """
+    Plots precomputed rating counts.
+
+    Args:
+        rating_counts (pd.Series): Review counts indexed by rating.
+        output_path (str): Save the figure here instead of displaying it.
+
+    Returns:
+        None
+    """
+    import seaborn as sns
+    plt = load_pyplot()
+    plt.figure(figsize=(8, 6))
+    sns.barplot(x=rating_counts.index, y=rating_counts.values, palette="viridis")
+    plt.title("Rating Distribution", fontsize=16)
+    plt.xlabel("Ratings")
+    plt.ylabel("Count")
+    show_or_save_figure(output_path)
+
+def plot_word_frequencies(frequencies, output_path=None):
+    """
+    Renders a word cloud from precomputed word frequencies.
+
+    Args:
+        frequencies (dict): Word frequencies.
+        output_path (str): Save the figure here instead of displaying it.
+
+    Returns:
+        None
+    """
+    from wordcloud import WordCloud
+    plt = load_pyplot()
+    wordcloud = WordCloud(width=800, height=400, background_color="white").generate_from_frequencies(frequencies)
+    plt.figure(figsize=(10, 6))
+    plt.imshow(wordcloud, interpolation="bilinear")
+    plt.axis("off")
+    plt.title("Word Cloud of Reviews", fontsize=16)
+    show_or_save_figure(output_path)
+
+def visualize_rating_distribution(data, rating_column, output_path=None):
     """
     Plots the distribution of ratings in the dataset.
 
     Args:
         data (pd.DataFrame): Dataset containing ratings.
         rating_column (str): Name of the column with ratings.
+        output_path (str): Save the figure here instead of displaying it.
 
     Returns:
         None
     """
     try:
-        # Count the occurrences of each rating
-        rating_counts = data[rating_column].value_counts().sort_index()
-        
-        # Plot the rating distribution
-        plt.figure(figsize=(8, 6))
-        sns.barplot(x=rating_counts.index, y=rating_counts.values, palette="viridis")
-        plt.title("Rating Distribution", fontsize=16)
-        plt.xlabel("Ratings")
-        plt.ylabel("Count")
-        plt.show()
+        plot_rating_counts(count_ratings(data, rating_column), output_path)
     except Exception as e:
         print(f"Error visualizing rating distribution: {e}")
 
-def generate_word_cloud(data, text_column):
+def generate_word_cloud(data, text_column, output_path=None):
     """
     Generates and displays a word cloud for the specified text column.
 
     Args:
-        data (pd.DataFrame): Dataset containing text data.
+        data (pd.DataFrame or iterable): Dataset containing text data, or an
+            iterable of DataFrame chunks.
         text_column (str): Name of the column with text data.
+        output_path (str): Save the figure here instead of displaying it.
 
     Returns:
         None
     """
     try:
-        # Combine all text into a single string
-        text = " ".join(data[text_column].dropna())
-        
-        # Generate word cloud
-        wordcloud = WordCloud(width=800, height=400, background_color="white").generate(text)
-        
-        # Display the word cloud
-        plt.figure(figsize=(10, 6))
-        plt.imshow(wordcloud, interpolation="bilinear")
-        plt.axis("off")
-        plt.title("Word Cloud of Reviews", fontsize=16)
-        plt.show()
+        plot_word_frequencies(count_words(data, text_column), output_path)
     except Exception as e:
         print(f"Error generating word cloud: {e}")
 
 if __name__ == "__main__":
-    # Load cleaned data for EDA
-    data = pd.read_csv("customer_reviews_cleaned.csv")
+    # Load only the rating column for the rating distribution
+    data = read_partitioned(STORAGE_PATHS["cleaned_reviews"], columns=["rating"])
     
     # Visualize rating distribution
     visualize_rating_distribution(data, rating_column="rating")
     
-    # Generate a word cloud for the 'review_text' column
-    generate_word_cloud(data, text_column="review_text")
+    # Stream the 'review_text' column into the word cloud counts
+    text_chunks = iter_partitioned(
+        STORAGE_PATHS["cleaned_reviews"],
+        columns=["review_text"],
+        batch_size=VISUALIZATION_SETTINGS["word_count_chunk_size"]
+    )
+    generate_word_cloud(text_chunks, text_column="review_text")
@@ -0,0 +1,302 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from config import FEATURE_STORE_SETTINGS
+
+# Arrays of a CSR segment; keys[i] identifies the text of row i
+SEGMENT_ARRAYS = ["keys", "data", "indices", "indptr"]
+
+# Lock file in the store root, held shared while segments are opened and
+# exclusively while compaction or invalidation removes them
+LOCK_FILE = ".lock"
+
+def vectorizer_version(vectorizer):
+    """
+    Hashes a fitted vectorizer's settings, vocabulary, and IDF weights, so any
+    change that alters the feature rows produces a new version.
+
+    Args:
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+
+    Returns:
+        str: Version identifier.
+    """
+    digest = hashlib.sha256(type(vectorizer).__name__.encode("utf-8"))
+    digest.update(json.dumps(vectorizer.get_params(), sort_keys=True, default=str).encode("utf-8"))
+    vocabulary = getattr(vectorizer, "vocabulary_", None)
+    if vocabulary is not None:
+        digest.update(json.dumps(sorted(vocabulary.items()), default=int).encode("utf-8"))
+    idf = getattr(vectorizer, "idf_", None)
+    if idf is not None:
+        digest.update(np.ascontiguousarray(idf).tobytes())
+    return digest.hexdigest()[:16]
+
+def text_keys(texts):
+    """
+    Hashes cleaned texts to 64-bit keys.
+
+    Args:
+        texts (pd.Series): Cleaned texts.
+
+    Returns:
+        np.ndarray: One uint64 key per text.
+    """
+    return pd.util.hash_pandas_object(texts, index=False).to_numpy()
+
+class TfidfFeatureStore:
+    """
+    On-disk cache of sparse TF-IDF rows keyed by cleaned-text hash.
+
+    Rows live in CSR segments under a directory named after the vectorizer
+    version and are read through memory-mapped arrays, so only the pages of
+    the requested rows are loaded. Texts not found in the store are vectorized
+    once and appended as a new segment, unless the store is opened read-only.
+    Rows of other vectorizer versions are kept until invalidate_other_versions
+    is called after refitting the vocabulary. Segments are only removed under an
+    exclusive lock on the store root, and opened under a shared one; once
+    opened, their memory maps stay valid even after the files are removed.
+    """
+
+    def __init__(self, vectorizer, root=None, read_only=False):
+        """
+        Args:
+            vectorizer (TfidfVectorizer): Fitted vectorizer producing the rows.
+            root (str): Root directory of the store (defaults to FEATURE_STORE_SETTINGS).
+            read_only (bool): Vectorize missing texts without adding them, e.g.
+                in scoring workers, which would otherwise write a segment per batch.
+        """
+        self.vectorizer = vectorizer
+        self.version = vectorizer_version(vectorizer)
+        self.root = root or FEATURE_STORE_SETTINGS["path"]
+        self.path = os.path.join(self.root, self.version)
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        if not read_only:
+            os.makedirs(self.path, exist_ok=True)
+        self._load_segments()
+
+    @contextmanager
+    def _lock(self, exclusive=False):
+        """
+        Holds the store-wide lock; there is nothing to coordinate while the
+        root does not exist yet.
+        """
+        if not os.path.exists(self.root):
+            yield
+            return
+        with open(os.path.join(self.root, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def invalidate_other_versions(self):
+        """
+        Removes the rows of every other vectorizer version, waiting for
+        readers that are opening their segments.
+
+        Returns:
+            None
+        """
+        if not os.path.exists(self.root):
+            return
+        with self._lock(exclusive=True):
+            for name in os.listdir(self.root):
+                if name != self.version and os.path.isdir(os.path.join(self.root, name)):
+                    shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                    print(f"Feature store: removed rows of outdated vectorizer version {name}.")
+
+    def _load_segments(self):
+        """
+        Memory-maps every complete segment and builds a sorted key index.
+        Segments written by other processes after this point are picked up on
+        the next load; a version directory or segment removed meanwhile, e.g.
+        by another process's compaction, is skipped.
+        """
+        self._segments = []
+        self._segment_names = []
+        keys, segment_ids, rows = [], [], []
+        with self._lock():
+            try:
+                names = sorted(os.listdir(self.path))
+            except FileNotFoundError:
+                names = []
+            for name in names:
+                if not name.startswith("segment-"):
+                    continue  # Skips segments still being written
+                try:
+                    arrays = {
+                        array: np.load(os.path.join(self.path, name, f"{array}.npy"), mmap_mode="r")
+                        for array in SEGMENT_ARRAYS
+                    }
+                except FileNotFoundError:
+                    continue
+                matrix = sp.csr_matrix(
+                    (arrays["data"], arrays["indices"], arrays["indptr"]),
+                    shape=(len(arrays["keys"]), self._n_features()),
+                    copy=False
+                )
+                keys.append(np.asarray(arrays["keys"]))
+                segment_ids.append(np.full(len(arrays["keys"]), len(self._segments), dtype=np.int32))
+                rows.append(np.arange(len(arrays["keys"]), dtype=np.int64))
+                self._segments.append(matrix)
+                self._segment_names.append(name)
+        if keys:
+            keys, segment_ids, rows = np.concatenate(keys), np.concatenate(segment_ids), np.concatenate(rows)
+            # Duplicate keys from concurrent writers hold identical rows; lookups use the first
+            order = np.argsort(keys, kind="stable")
+            self._keys, self._segment_ids, self._rows = keys[order], segment_ids[order], rows[order]
+        else:
+            self._keys = np.empty(0, dtype=np.uint64)
+            self._segment_ids = np.empty(0, dtype=np.int32)
+            self._rows = np.empty(0, dtype=np.int64)
+
+    def _n_features(self):
+        vocabulary = getattr(self.vectorizer, "vocabulary_", None)
+        return len(vocabulary) if vocabulary is not None else self.vectorizer.n_features
+
+    def _lookup(self, keys):
+        """
+        Returns:
+            tuple: Segment id and row of each key, with segment id -1 for missing keys.
+        """
+        if not len(self._keys):
+            return np.full(len(keys), -1, dtype=np.int32), np.zeros(len(keys), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        found = self._keys[positions] == keys
+        return np.where(found, self._segment_ids[positions], -1), self._rows[positions]
+
+    def _write_segment(self, keys, matrix):
+        """
+        Writes a CSR segment to a temporary directory and renames it into place,
+        so readers never see a partial segment.
+        """
+        matrix = matrix.tocsr()
+        matrix.sort_indices()
+        name = uuid.uuid4().hex
+        temp_dir = os.path.join(self.path, f".tmp-{name}")
+        os.makedirs(temp_dir)
+        arrays = {"keys": keys, "data": matrix.data, "indices": matrix.indices, "indptr": matrix.indptr}
+        for array, values in arrays.items():
+            np.save(os.path.join(temp_dir, f"{array}.npy"), values)
+        os.rename(temp_dir, os.path.join(self.path, f"segment-{name}"))
+
+    def add(self, texts, matrix):
+        """
+        Stores rows that were already vectorized, e.g. by fit_transform,
+        skipping texts the store already holds.
+
+        Args:
+            texts (iterable): Cleaned texts.
+            matrix (scipy.sparse matrix): Their TF-IDF rows, in the same order.
+
+        Returns:
+            None
+        """
+        texts = pd.Series(texts, dtype=object).fillna("").reset_index(drop=True)
+        if texts.empty:
+            return
+        keys = text_keys(texts)
+        missing = self._lookup(keys)[0] < 0
+        if missing.any():
+            new_keys, first = np.unique(keys[missing], return_index=True)
+            self._write_segment(new_keys, matrix.tocsr()[np.flatnonzero(missing)[first]])
+            self._load_segments()
+
+    def transform(self, texts):
+        """
+        Returns the TF-IDF rows for cleaned texts, vectorizing only texts that
+        are not in the store yet. A read-only store does not keep them.
+
+        Args:
+            texts (iterable): Cleaned texts.
+
+        Returns:
+            scipy.sparse.csr_matrix: One row per text, in input order.
+        """
+        texts = pd.Series(texts, dtype=object).fillna("").reset_index(drop=True)
+        if texts.empty:
+            return self.vectorizer.transform([])
+        keys = text_keys(texts)
+        segment_ids, rows = self._lookup(keys)
+        missing = segment_ids < 0
+        self.misses += int(missing.sum())
+        self.hits += int((~missing).sum())
+        if missing.any() and self.read_only:
+            # Vectorize each distinct new text once and stack it with the stored rows
+            new_keys, first, inverse = np.unique(keys[missing], return_index=True, return_inverse=True)
+            new_rows = self.vectorizer.transform(texts[missing].iloc[first])[inverse]
+            if missing.all():
+                return new_rows.tocsr()
+            stacked = sp.vstack([self._gather(segment_ids[~missing], rows[~missing]), new_rows], format="csr")
+            order = np.empty(len(keys), dtype=np.int64)
+            order[np.concatenate([np.flatnonzero(~missing), np.flatnonzero(missing)])] = np.arange(len(keys))
+            return stacked[order]
+        if missing.any():
+            # Vectorize each distinct new text once and add it to the store
+            new_keys, first = np.unique(keys[missing], return_index=True)
+            self._write_segment(new_keys, self.vectorizer.transform(texts[missing].iloc[first]))
+            self._load_segments()
+            segment_ids, rows = self._lookup(keys)
+
+        return self._gather(segment_ids, rows)
+
+    def _gather(self, segment_ids, rows):
+        """
+        Reads stored rows from their segments.
+
+        Returns:
+            scipy.sparse.csr_matrix: One row per (segment id, row) pair, in input order.
+        """
+        parts, positions = [], []
+        for segment_id in np.unique(segment_ids):
+            selected = np.flatnonzero(segment_ids == segment_id)
+            parts.append(self._segments[segment_id][rows[selected]])
+            positions.append(selected)
+        stacked = sp.vstack(parts, format="csr")
+        # Undo the grouping by segment
+        order = np.empty(len(segment_ids), dtype=np.int64)
+        order[np.concatenate(positions)] = np.arange(len(segment_ids))
+        return stacked[order]
+
+    def compact(self):
+        """
+        Merges all segments into one, dropping duplicate rows. Runs under the
+        exclusive lock, so readers never open a segment that is being removed,
+        and only removes the segments it merged.
+
+        Returns:
+            None
+        """
+        self._load_segments()
+        if len(self._segments) <= 1:
+            return
+        with self._lock(exclusive=True):
+            unique_keys, first = np.unique(self._keys, return_index=True)
+            self._write_segment(unique_keys, self._gather(self._segment_ids[first], self._rows[first]))
+            for name in self._segment_names:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        self._load_segments()
+        print(f"Feature store compacted to one segment of {len(unique_keys)} rows.")
+
+    def stats(self):
+        """
+        Returns:
+            dict: Version, stored rows, segment count, and lookup counters.
+        """
+        return {
+            "version": self.version,
+            "rows": len(self._keys),
+            "segments": len(self._segments),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,79 @@
+import argparse
+import random
+import threading
+import time
+import numpy as np
+import requests
+from benchmarks import generate_synthetic_reviews
+from config import SERVICE_SETTINGS
+
+def run_load_test(url, n_clients=16, requests_per_client=200, repeat_fraction=0.5, seed=42):
+    """
+    Sends concurrent single-review requests to the scoring service and reports
+    client-side latency and throughput alongside the service's own metrics.
+
+    Args:
+        url (str): Base URL of the scoring service.
+        n_clients (int): Number of concurrent client threads.
+        requests_per_client (int): Requests sent by each client.
+        repeat_fraction (float): Share of requests reusing a previously sent text,
+            which exercises the result cache.
+        seed (int): Random seed for the synthetic reviews.
+
+    Returns:
+        dict: Request count, throughput, p50/p99 latency, and service metrics.
+    """
+    texts = generate_synthetic_reviews(n_clients * requests_per_client, seed=seed)["review_text"].tolist()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(client_id):
+        rng = random.Random(seed + client_id)
+        session = requests.Session()
+        offset = client_id * requests_per_client
+        for i in range(requests_per_client):
+            index = rng.randrange(offset + i + 1) if rng.random() < repeat_fraction else offset + i
+            start_time = time.perf_counter()
+            try:
+                response = session.post(f"{url}/score", json={"text": texts[index]}, timeout=30)
+                response.raise_for_status()
+                elapsed = time.perf_counter() - start_time
+                with lock:
+                    latencies.append(elapsed)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+        session.close()
+
+    start_time = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+
+    results = {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies else 0.0,
+        "p99_ms": float(np.percentile(latencies, 99) * 1000) if latencies else 0.0,
+        "service_metrics": requests.get(f"{url}/metrics", timeout=30).json()
+    }
+    print(
+        f"{results['requests']} requests ({results['errors']} errors) at {results['requests_per_sec']:.0f} req/sec, "
+        f"p50 {results['p50_ms']:.1f} ms, p99 {results['p99_ms']:.1f} ms."
+    )
+    print(f"Service metrics: {results['service_metrics']}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the sentiment scoring service.")
+    parser.add_argument("--url", default=f"http://{SERVICE_SETTINGS['host']}:{SERVICE_SETTINGS['port']}")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    parser.add_argument("--repeat-fraction", type=float, default=0.5)
+    args = parser.parse_args()
+    run_load_test(args.url, args.clients, args.requests, args.repeat_fraction)
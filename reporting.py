@@ -0,0 +1,115 @@
+import glob
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from config import REPORT_SETTINGS, STORAGE_PATHS
+from exploratory_data_analysis import (
+    count_ratings, count_words, plot_rating_counts, plot_word_frequencies
+)
+from rollups import load_daily_rollup, sentiment_counts_from_rollup, sentiment_trends_from_rollup, trend_window_start
+from storage import read_partitioned
+from utils import SPAWN_CONTEXT
+from visualization import plot_sentiment_counts, plot_trend_counts
+
+def _init_report_worker():
+    """
+    Selects the non-interactive Agg backend in each rendering worker before
+    pyplot is first imported, so no GUI backend is ever probed or loaded.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+
+def _render_chart(name, plot_function, args, output_path):
+    """
+    Renders one chart to a PNG file.
+
+    Returns:
+        tuple: Chart name, output path (None if rendering failed), and seconds taken.
+    """
+    start_time = time.perf_counter()
+    try:
+        plot_function(*args, output_path=output_path)
+    except Exception as e:
+        print(f"Error rendering chart '{name}': {e}")
+        output_path = None
+    return name, output_path, time.perf_counter() - start_time
+
+def _write_index(run_dir):
+    """
+    Writes an index.html showing every chart rendered into the report directory.
+    """
+    charts = sorted(os.path.basename(path) for path in glob.glob(os.path.join(run_dir, "*.png")))
+    title = f"Sentiment report {os.path.basename(os.path.normpath(run_dir))}"
+    sections = "\n".join(
+        f"<h2>{html.escape(chart[:-4].replace('_', ' ').title())}</h2>\n<img src=\"{html.escape(chart)}\">"
+        for chart in charts
+    )
+    index_path = os.path.join(run_dir, "index.html")
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html>\n<html>\n<head><title>{title}</title></head>\n<body>\n<h1>{title}</h1>\n{sections}\n</body>\n</html>\n")
+    return index_path
+
+def generate_report(cleaned_data=None, rollup=None, report_dir=None, n_workers=None):
+    """
+    Renders the EDA and sentiment charts headlessly into a dated report directory.
+
+    Aggregations are computed once in the calling process; only the small
+    aggregates are sent to the worker processes, which render the charts in
+    parallel with the Agg backend. An index.html listing every chart in the
+    directory is rewritten after each call, so reports from several pipeline
+    stages on the same day share one page.
+
+    Args:
+        cleaned_data (pd.DataFrame): Cleaned reviews with 'rating' and 'review_text' columns.
+        rollup (pd.DataFrame): Daily sentiment rollup; the trend chart covers
+            the last VISUALIZATION_SETTINGS["trend_window_days"] days.
+        report_dir (str): Root report directory (defaults to REPORT_SETTINGS).
+        n_workers (int): Rendering processes (defaults to REPORT_SETTINGS).
+
+    Returns:
+        str: Path of the report's index.html, or None if the report failed.
+    """
+    try:
+        run_dir = os.path.join(report_dir or REPORT_SETTINGS["report_dir"], datetime.now().strftime("%Y-%m-%d"))
+        os.makedirs(run_dir, exist_ok=True)
+
+        charts = []
+        if cleaned_data is not None:
+            charts.append(("rating_distribution", plot_rating_counts, (count_ratings(cleaned_data, "rating"),)))
+            charts.append(("word_cloud", plot_word_frequencies, (count_words(cleaned_data, "review_text"),)))
+        if rollup is not None:
+            charts.append(("sentiment_distribution", plot_sentiment_counts, (sentiment_counts_from_rollup(rollup),)))
+            trends = sentiment_trends_from_rollup(rollup, start_date=trend_window_start())
+            charts.append(("sentiment_trends", plot_trend_counts, (trends, "review_date", "predicted_sentiment")))
+        if not charts:
+            print("No data was provided for the report.")
+            return None
+
+        n_workers = min(n_workers or REPORT_SETTINGS["n_workers"], len(charts))
+        with ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=SPAWN_CONTEXT, initializer=_init_report_worker
+        ) as executor:
+            futures = [
+                executor.submit(_render_chart, name, plot_function, args, os.path.join(run_dir, f"{name}.png"))
+                for name, plot_function, args in charts
+            ]
+            for future in futures:
+                name, output_path, seconds = future.result()
+                if output_path:
+                    print(f"Rendered {name} in {seconds:.2f}s.")
+
+        index_path = _write_index(run_dir)
+        print(f"Report written to {index_path}.")
+        return index_path
+    except Exception as e:
+        print(f"Error generating report: {e}")
+        return None
+
+if __name__ == "__main__":
+    # Render the full report from the cleaned reviews and the daily sentiment rollup
+    generate_report(
+        cleaned_data=read_partitioned(STORAGE_PATHS["cleaned_reviews"], columns=["rating", "review_text"]),
+        rollup=load_daily_rollup()
+    )
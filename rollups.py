@@ -0,0 +1,125 @@
+import shutil
+from datetime import datetime, timedelta
+import pandas as pd
+from config import STORAGE_PATHS, VISUALIZATION_SETTINGS
+from storage import iter_partitioned, read_partitioned, replace_partitions, staging_path, write_partitioned
+
+# Dimensions of the daily rollup; each row holds the number of reviews for one combination
+ROLLUP_DIMENSIONS = ["review_date", "predicted_sentiment", "rating"]
+
+def compute_daily_rollup(predictions):
+    """
+    Counts predictions per day, sentiment, and rating.
+
+    Args:
+        predictions (pd.DataFrame): Predictions with 'review_date',
+            'predicted_sentiment', and 'rating' columns.
+
+    Returns:
+        pd.DataFrame: The rollup dimensions and a 'review_count' column.
+    """
+    # Truncate timestamps to days without modifying the caller's DataFrame
+    days = pd.to_datetime(predictions["review_date"]).dt.normalize()
+    keys = [days, predictions["predicted_sentiment"], predictions["rating"]]
+    return predictions.groupby(keys, dropna=False).size().reset_index(name="review_count")
+
+def update_daily_rollup(start_date=None, end_date=None, predictions_path=None, rollup_path=None):
+    """
+    Recomputes the daily rollup for a date range from the predictions dataset
+    and replaces those days in the rollup dataset. Recomputing whole days keeps
+    the update idempotent, so re-scoring a window never double-counts. The new
+    days are staged and swapped in, so readers never see the range missing and
+    a failed update leaves the old rollup in place. Without a range the whole
+    rollup is rebuilt.
+
+    Args:
+        start_date (str or datetime): First day to recompute, inclusive.
+        end_date (str or datetime): Last day to recompute, inclusive.
+        predictions_path (str): Predictions dataset (defaults to STORAGE_PATHS).
+        rollup_path (str): Rollup dataset (defaults to STORAGE_PATHS).
+
+    Returns:
+        int: Number of rollup rows written, or None if the update failed.
+    """
+    try:
+        predictions_path = predictions_path or STORAGE_PATHS["predictions"]
+        rollup_path = rollup_path or STORAGE_PATHS["daily_rollup"]
+        # Aggregate batch by batch so only the small per-day counts are held in memory
+        batches = iter_partitioned(
+            predictions_path, columns=ROLLUP_DIMENSIONS, start_date=start_date, end_date=end_date
+        )
+        partial_rollups = [compute_daily_rollup(batch) for batch in batches]
+        rollup = pd.DataFrame(columns=ROLLUP_DIMENSIONS + ["review_count"])
+        if partial_rollups:
+            rollup = pd.concat(partial_rollups, ignore_index=True)
+            rollup = rollup.groupby(ROLLUP_DIMENSIONS, dropna=False)["review_count"].sum().reset_index()
+        staging = staging_path(rollup_path)
+        try:
+            if len(rollup):
+                write_partitioned(rollup, staging)
+            # Days without predictions are swapped for nothing, i.e. removed
+            replace_partitions(staging, rollup_path, start_date=start_date, end_date=end_date)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return len(rollup)
+    except Exception as e:
+        print(f"Error updating the daily rollup (rebuild it with `python rollups.py`): {e}")
+        return None
+
+def load_daily_rollup(start_date=None, end_date=None, rollup_path=None):
+    """
+    Loads the daily rollup, reading only the day partitions in the date range.
+
+    Args:
+        start_date (str or datetime): First day to include, inclusive.
+        end_date (str or datetime): Last day to include, inclusive.
+        rollup_path (str): Rollup dataset (defaults to STORAGE_PATHS).
+
+    Returns:
+        pd.DataFrame: The rollup dimensions and a 'review_count' column.
+    """
+    return read_partitioned(
+        rollup_path or STORAGE_PATHS["daily_rollup"],
+        columns=ROLLUP_DIMENSIONS + ["review_count"],
+        start_date=start_date,
+        end_date=end_date
+    )
+
+def sentiment_counts_from_rollup(rollup):
+    """
+    Totals the rollup per sentiment.
+
+    Args:
+        rollup (pd.DataFrame): Daily rollup.
+
+    Returns:
+        pd.Series: Review counts indexed by sentiment, largest first.
+    """
+    return rollup.groupby("predicted_sentiment")["review_count"].sum().sort_values(ascending=False)
+
+def sentiment_trends_from_rollup(rollup, start_date=None):
+    """
+    Totals the rollup per day and sentiment.
+
+    Args:
+        rollup (pd.DataFrame): Daily rollup.
+        start_date (str or datetime): First day to include, inclusive.
+
+    Returns:
+        pd.DataFrame: 'review_date', 'predicted_sentiment', and 'count' columns.
+    """
+    if start_date is not None:
+        rollup = rollup[pd.to_datetime(rollup["review_date"]) >= pd.Timestamp(start_date).normalize()]
+    trends = rollup.groupby(["review_date", "predicted_sentiment"])["review_count"].sum()
+    return trends.reset_index(name="count")
+
+def trend_window_start(days=None):
+    """
+    Returns:
+        datetime: First day of the sentiment trend window (defaults to VISUALIZATION_SETTINGS).
+    """
+    return datetime.now() - timedelta(days=days or VISUALIZATION_SETTINGS["trend_window_days"])
+
+if __name__ == "__main__":
+    # Rebuild the whole rollup from the predictions dataset
+    update_daily_rollup()
@@ -0,0 +1,243 @@
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from config import SERVICE_SETTINGS
+from data_cleaning import clean_text
+from sentiment_scoring import load_model_artifacts, predict_sentiment
+
+class SentimentService:
+    """
+    In-process sentiment scoring service around the Logistic Regression model.
+
+    The model artifacts are loaded once and kept warm. Concurrent requests are
+    queued and combined by a background thread into a single sparse
+    transform/predict_proba call, and results for repeated texts are served
+    from an LRU cache.
+    """
+
+    def __init__(self, model_path=None, vectorizer_path=None, max_batch_size=None, max_wait_ms=None,
+                 cache_size=None):
+        """
+        Args:
+            model_path (str): Path of the saved model (defaults to MODEL_PATHS).
+            vectorizer_path (str): Path of the saved vectorizer (defaults to MODEL_PATHS).
+            max_batch_size (int): Maximum requests per micro-batch (defaults to SERVICE_SETTINGS).
+            max_wait_ms (float): Time to wait for more requests before scoring a
+                micro-batch (defaults to SERVICE_SETTINGS).
+            cache_size (int): Number of scored texts to cache (defaults to SERVICE_SETTINGS).
+        """
+        self.model, self.vectorizer = load_model_artifacts(model_path, vectorizer_path)
+        if self.model is None:
+            raise RuntimeError("Model artifacts could not be loaded.")
+        self.max_batch_size = max_batch_size or SERVICE_SETTINGS["max_batch_size"]
+        self.max_wait = (max_wait_ms or SERVICE_SETTINGS["max_wait_ms"]) / 1000
+        self.cache_size = cache_size or SERVICE_SETTINGS["cache_size"]
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._latencies = deque(maxlen=100000)  # Most recent request latencies, in seconds
+        self._latency_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._batcher = threading.Thread(target=self._batch_loop, daemon=True)
+        self._batcher.start()
+
+    def score(self, text):
+        """
+        Scores a single raw review.
+
+        Args:
+            text (str): Raw review text.
+
+        Returns:
+            dict: Predicted sentiment and its probability.
+        """
+        return self.score_many([text])[0]
+
+    def score_many(self, texts):
+        """
+        Scores raw reviews, batching them with other concurrent requests.
+
+        Args:
+            texts (list): Raw review texts.
+
+        Returns:
+            list: Predicted sentiment and probability for each text, in order.
+        """
+        start_time = time.perf_counter()
+        results = [self._cache_get(text) for text in texts]
+        futures = {}
+        for i, text in enumerate(texts):
+            if results[i] is None:
+                futures[i] = Future()
+                self._requests.put((text, futures[i]))
+        for i, future in futures.items():
+            results[i] = future.result()
+        with self._latency_lock:
+            self._latencies.append(time.perf_counter() - start_time)
+        return results
+
+    def _cache_get(self, text):
+        with self._cache_lock:
+            result = self._cache.get(text)
+            if result is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(text)
+            self.cache_hits += 1
+            return result
+
+    def _cache_put(self, text, result):
+        with self._cache_lock:
+            self._cache[text] = result
+            self._cache.move_to_end(text)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _batch_loop(self):
+        """
+        Collects queued requests into micro-batches until the service is closed.
+        """
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            closing = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            self._score_batch(batch)
+            if closing:
+                return
+
+    def _score_batch(self, batch):
+        """
+        Scores a micro-batch with one transform/predict_proba call.
+        """
+        try:
+            # Identical texts in the same batch are scored once
+            unique_texts = list(dict.fromkeys(text for text, _ in batch))
+            # Reuse the batch cleaning path so online and batch features match
+            cleaned = [clean_text(text) if isinstance(text, str) else "" for text in unique_texts]
+            labels, confidence = predict_sentiment(cleaned, self.model, self.vectorizer)
+            scored = {
+                text: {"sentiment": str(label), "confidence": float(probability)}
+                for text, label, probability in zip(unique_texts, labels, confidence)
+            }
+            for text, result in scored.items():
+                self._cache_put(text, result)
+            for text, future in batch:
+                future.set_result(scored[text])
+        except Exception as e:
+            print(f"Error scoring request batch: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def latency_stats(self):
+        """
+        Returns:
+            dict: Request count, p50/p99 latency in milliseconds, and cache counters.
+        """
+        with self._latency_lock:
+            latencies = np.array(self._latencies)
+        stats = {
+            "requests": int(latencies.size),
+            "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies.size else 0.0,
+            "p99_ms": float(np.percentile(latencies, 99) * 1000) if latencies.size else 0.0,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_size": len(self._cache)
+        }
+        return stats
+
+    def close(self):
+        """
+        Stops the batching thread after the queued requests are scored.
+
+        Returns:
+            None
+        """
+        self._requests.put(None)
+        self._batcher.join()
+
+def create_server(service, host=None, port=None):
+    """
+    Creates an HTTP server exposing the service.
+
+    POST /score accepts {"text": "..."} or {"texts": [...]} and returns the
+    predictions; GET /metrics returns the latency and cache statistics.
+
+    Args:
+        service (SentimentService): Service handling the requests.
+        host (str): Interface to bind (defaults to SERVICE_SETTINGS).
+        port (int): Port to bind (defaults to SERVICE_SETTINGS).
+
+    Returns:
+        ThreadingHTTPServer: Server ready for serve_forever.
+    """
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if "texts" in request:
+                    self._send_json(200, {"predictions": service.score_many(request["texts"])})
+                else:
+                    self._send_json(200, service.score(request["text"]))
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {"error": f"Invalid request: {e}"})
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send_json(200, service.latency_stats())
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def log_message(self, format, *args):
+            # Per-request access logs would dominate the latency of small requests
+            pass
+
+    return ThreadingHTTPServer((host or SERVICE_SETTINGS["host"], port or SERVICE_SETTINGS["port"]), ScoringHandler)
+
+if __name__ == "__main__":
+    # Load the model once and serve requests until interrupted
+    sentiment_service = SentimentService()
+    server = create_server(sentiment_service)
+    print(f"Sentiment scoring service listening on {server.server_address[0]}:{server.server_address[1]}.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sentiment_service.close()
@@ -1,11 +1,68 @@
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import classification_report
-from transformers import BertTokenizer, BertForSequenceClassification, Trainer, TrainingArguments
+from config import BERT_SETTINGS, FEATURE_STORE_SETTINGS, MODEL_PATHS, MODEL_SELECTION_SETTINGS, TRAINING_SETTINGS
+from feature_store import TfidfFeatureStore
+from utils import SPAWN_CONTEXT, calculate_metrics, track_stage
 
-def train_logistic_regression(data, text_column, label_column):
+# Path and content of the cross-validation fold a model-selection worker loaded last
+_search_fold = (None, None)
+
+def _create_tfidf_vectorizer(params=None):
+    return TfidfVectorizer(**{"max_features": 5000, **(params or {})})
+
+def _load_reusable_vectorizer(params=None):
+    """
+    Returns the saved TF-IDF vectorizer if it has the current settings and was
+    fitted within the refit interval, so its cached feature rows stay valid.
+    """
+    path = MODEL_PATHS["vectorizer"]
+    if not os.path.exists(path):
+        return None
+    vectorizer = joblib.load(path)
+    settings_changed = vectorizer.get_params() != _create_tfidf_vectorizer(params).get_params()
+    if not isinstance(vectorizer, TfidfVectorizer) or settings_changed:
+        return None
+    age_days = (time.time() - getattr(vectorizer, "fitted_at_", 0)) / 86400
+    return vectorizer if age_days <= FEATURE_STORE_SETTINGS["vectorizer_refit_days"] else None
+
+def _cached_tfidf_features(X_train, X_test, params=None):
+    """
+    Computes TF-IDF features through the feature store. The saved vectorizer is
+    reused while it is fresh, so only reviews not seen before are vectorized;
+    otherwise a new vocabulary is fitted, which invalidates the cached rows.
+
+    Returns:
+        tuple: Vectorizer, training features, and test features.
+    """
+    vectorizer = _load_reusable_vectorizer(params)
+    if vectorizer is None:
+        vectorizer = _create_tfidf_vectorizer(params)
+        X_train_tfidf = vectorizer.fit_transform(X_train)
+        vectorizer.fitted_at_ = time.time()
+        store = TfidfFeatureStore(vectorizer)
+        # Rows of the previous vocabulary can never be hit again
+        store.invalidate_other_versions()
+        store.add(X_train, X_train_tfidf)
+    else:
+        store = TfidfFeatureStore(vectorizer)
+        X_train_tfidf = store.transform(X_train)
+    X_test_tfidf = store.transform(X_test)
+    if store.stats()["segments"] > FEATURE_STORE_SETTINGS["max_segments"]:
+        store.compact()
+    print(f"TF-IDF feature store: {store.stats()}")
+    return vectorizer, X_train_tfidf, X_test_tfidf
+
+def train_logistic_regression(data, text_column, label_column, vectorizer_params=None, classifier_params=None):
     """
     Trains a Logistic Regression model for sentiment classification.
 
@@ -13,6 +70,9 @@ def train_logistic_regression(data, text_column, label_column):
         data (pd.DataFrame): Dataset with text and labels.
         text_column (str): Name of the column with text data.
         label_column (str): Name of the column with sentiment labels.
+        vectorizer_params (dict): TfidfVectorizer settings overriding the defaults,
+            e.g. from search_logistic_regression.
+        classifier_params (dict): LogisticRegression settings overriding the defaults.
 
     Returns:
         LogisticRegression: Trained Logistic Regression model.
@@ -24,13 +84,23 @@ def train_logistic_regression(data, text_column, label_column):
         )
         
         # Convert text to TF-IDF features
-        vectorizer = TfidfVectorizer(max_features=5000)
-        X_train_tfidf = vectorizer.fit_transform(X_train)
-        X_test_tfidf = vectorizer.transform(X_test)
+        with track_stage("vectorize", rows_in=len(data)) as counters:
+            if FEATURE_STORE_SETTINGS["enabled"]:
+                vectorizer, X_train_tfidf, X_test_tfidf = _cached_tfidf_features(X_train, X_test, vectorizer_params)
+            else:
+                vectorizer = _create_tfidf_vectorizer(vectorizer_params)
+                X_train_tfidf = vectorizer.fit_transform(X_train)
+                X_test_tfidf = vectorizer.transform(X_test)
+            counters["rows_out"] = X_train_tfidf.shape[0] + X_test_tfidf.shape[0]
+            counters["bytes"] = sum(
+                matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+                for matrix in (X_train_tfidf, X_test_tfidf)
+            )
         
         # Train the Logistic Regression model
-        model = LogisticRegression()
-        model.fit(X_train_tfidf, y_train)
+        with track_stage("train_lr", rows_in=X_train_tfidf.shape[0]):
+            model = LogisticRegression(**(classifier_params or {}))
+            model.fit(X_train_tfidf, y_train)
         
         # Evaluate the model
         predictions = model.predict(X_test_tfidf)
@@ -42,6 +112,405 @@ def train_logistic_regression(data, text_column, label_column):
         print(f"Error training Logistic Regression model: {e}")
         return None, None
 
+def _create_out_of_core_model(n_features=None):
+    """
+    Creates the stateless hashing vectorizer and incremental classifier used for
+    out-of-core training. Logistic loss keeps predict_proba available for scoring.
+    """
+    vectorizer = HashingVectorizer(
+        n_features=n_features or TRAINING_SETTINGS["hashing_features"],
+        alternate_sign=False,
+        norm="l2"
+    )
+    model = SGDClassifier(loss="log_loss", random_state=42)
+    return vectorizer, model
+
+def _holdout_mask(texts, holdout_fraction):
+    """
+    Assigns reviews to the holdout set by hashing their text, so every pass over
+    the data makes the same split and duplicate reviews never straddle it.
+    """
+    buckets = pd.util.hash_pandas_object(texts.fillna(""), index=False) % 1000
+    return (buckets < holdout_fraction * 1000).to_numpy()
+
+def train_logistic_regression_out_of_core(chunk_source, text_column, label_column, classes=None,
+                                          holdout_fraction=None, n_epochs=None, n_features=None):
+    """
+    Trains a logistic-loss linear model for sentiment classification in constant
+    memory, using a stateless hashing vectorizer and partial_fit over chunks.
+    Rows are shuffled within each chunk, since SGD converges poorly on the
+    date-ordered runs of a partitioned dataset.
+
+    Args:
+        chunk_source (callable): Returns a fresh iterable of DataFrame chunks each
+            time it is called; the data is read once per epoch plus once for evaluation.
+        text_column (str): Name of the column with text data.
+        label_column (str): Name of the column with sentiment labels.
+        classes (list): All sentiment labels. If None, they are collected in an extra pass.
+        holdout_fraction (float): Share of reviews held out for evaluation.
+        n_epochs (int): Passes over the training data.
+        n_features (int): Size of the hashed feature space.
+
+    Returns:
+        tuple: Trained model, vectorizer, and holdout metrics from calculate_metrics.
+    """
+    try:
+        holdout_fraction = TRAINING_SETTINGS["holdout_fraction"] if holdout_fraction is None else holdout_fraction
+        n_epochs = n_epochs or TRAINING_SETTINGS["n_epochs"]
+        vectorizer, model = _create_out_of_core_model(n_features)
+        
+        # partial_fit needs every label up front
+        if classes is None:
+            labels = set()
+            for chunk in chunk_source():
+                labels.update(chunk[label_column].dropna().unique())
+            classes = sorted(labels)
+        
+        # Train incrementally on the non-holdout rows of each chunk
+        trained = 0
+        rng = np.random.RandomState(42)
+        with track_stage("train_lr_out_of_core") as counters:
+            for _ in range(n_epochs):
+                for chunk in chunk_source():
+                    chunk = chunk.dropna(subset=[label_column])
+                    train = chunk[~_holdout_mask(chunk[text_column], holdout_fraction)]
+                    if train.empty:
+                        continue
+                    train = train.iloc[rng.permutation(len(train))]
+                    features = vectorizer.transform(train[text_column].fillna(""))
+                    model.partial_fit(features, train[label_column], classes=classes)
+                    trained += len(train)
+            counters["rows_in"] = trained
+        
+        # Evaluate on the holdout rows; only the labels are kept in memory
+        y_true, y_pred = [], []
+        for chunk in chunk_source():
+            chunk = chunk.dropna(subset=[label_column])
+            test = chunk[_holdout_mask(chunk[text_column], holdout_fraction)]
+            if test.empty:
+                continue
+            y_pred.extend(model.predict(vectorizer.transform(test[text_column].fillna(""))))
+            y_true.extend(test[label_column])
+        metrics = calculate_metrics(y_true, y_pred) if y_true else {}
+        print(f"Out-of-core model trained on {trained} reviews over {n_epochs} epoch(s); holdout metrics: {metrics}")
+        
+        return model, vectorizer, metrics
+    except Exception as e:
+        print(f"Error training out-of-core model: {e}")
+        return None, None, {}
+
+def compare_training_modes(data, text_column, label_column, chunk_size=None):
+    """
+    Trains the in-memory TF-IDF model and the out-of-core hashing model on the
+    same 80/20 split and reports their metrics side by side.
+
+    Args:
+        data (pd.DataFrame): Dataset with text and labels.
+        text_column (str): Name of the column with text data.
+        label_column (str): Name of the column with sentiment labels.
+        chunk_size (int): Reviews per partial_fit call for the out-of-core model.
+
+    Returns:
+        dict: Metrics from calculate_metrics for the "tfidf" and "out_of_core" models.
+    """
+    try:
+        chunk_size = chunk_size or TRAINING_SETTINGS["chunk_size"]
+        X_train, X_test, y_train, y_test = train_test_split(
+            data[text_column], data[label_column], test_size=0.2, random_state=42
+        )
+        
+        # Current in-memory TF-IDF model
+        tfidf_vectorizer = TfidfVectorizer(max_features=5000)
+        tfidf_model = LogisticRegression()
+        tfidf_model.fit(tfidf_vectorizer.fit_transform(X_train), y_train)
+        tfidf_metrics = calculate_metrics(y_test, tfidf_model.predict(tfidf_vectorizer.transform(X_test)))
+        
+        # Out-of-core model fed in chunks
+        hashing_vectorizer, sgd_model = _create_out_of_core_model()
+        classes = sorted(data[label_column].unique())
+        for _ in range(TRAINING_SETTINGS["n_epochs"]):
+            for start in range(0, len(X_train), chunk_size):
+                sgd_model.partial_fit(
+                    hashing_vectorizer.transform(X_train.iloc[start:start + chunk_size]),
+                    y_train.iloc[start:start + chunk_size],
+                    classes=classes
+                )
+        out_of_core_metrics = calculate_metrics(y_test, sgd_model.predict(hashing_vectorizer.transform(X_test)))
+        
+        print(
+            f"Accuracy: TF-IDF {tfidf_metrics.get('accuracy', 0):.4f}, "
+            f"out-of-core {out_of_core_metrics.get('accuracy', 0):.4f}"
+        )
+        return {"tfidf": tfidf_metrics, "out_of_core": out_of_core_metrics}
+    except Exception as e:
+        print(f"Error comparing training modes: {e}")
+        return {}
+
+def _load_search_fold(path):
+    """
+    Memory-maps a vectorized fold saved by search_logistic_regression, reusing
+    the last one loaded, so workers share its pages through the OS page cache.
+    """
+    global _search_fold
+    if _search_fold[0] != path:
+        _search_fold = (path, joblib.load(path, mmap_mode="r"))
+    return _search_fold[1]
+
+def _fit_fold(fold_path, classifier_params, n_train):
+    """
+    Fits one candidate on the first n_train (pre-shuffled) training rows of a
+    fold and predicts the fold's validation rows.
+
+    Returns:
+        tuple: Validation predictions and fit time in seconds.
+    """
+    X_train, y_train, X_val = _load_search_fold(fold_path)
+    start_time = time.perf_counter()
+    model = LogisticRegression(**classifier_params)
+    model.fit(X_train[:n_train], y_train[:n_train])
+    return model.predict(X_val), time.perf_counter() - start_time
+
+def search_logistic_regression(data, text_column, label_column, vectorizer_grid=None, classifier_grid=None,
+                               n_folds=None, n_workers=None, halving_factor=None, min_fraction=None):
+    """
+    Searches TF-IDF and Logistic Regression settings with k-fold cross-validation
+    and successive halving across a pool of worker processes.
+
+    Each vectorizer setting is fitted once per fold in the calling process and
+    the sparse fold matrices are written to a temporary directory; each task is
+    sent only the path of its fold, which the worker memory-maps, so candidates
+    sharing a vectorizer never re-vectorize and memory does not grow with the
+    number of workers. The
+    first round trains every candidate on min_fraction of each training fold;
+    each later round keeps the best 1/halving_factor of the candidates and
+    multiplies their training fraction by halving_factor, up to the full folds.
+
+    Args:
+        data (pd.DataFrame): Dataset with text and labels.
+        text_column (str): Name of the column with text data.
+        label_column (str): Name of the column with sentiment labels.
+        vectorizer_grid (dict): TfidfVectorizer settings to search (defaults to MODEL_SELECTION_SETTINGS).
+        classifier_grid (dict): LogisticRegression settings to search (defaults to MODEL_SELECTION_SETTINGS).
+        n_folds (int): Cross-validation folds (defaults to MODEL_SELECTION_SETTINGS).
+        n_workers (int): Worker processes (defaults to MODEL_SELECTION_SETTINGS).
+        halving_factor (int): Share of candidates dropped and budget growth per round.
+        min_fraction (float): Share of each training fold used in the first round.
+
+    Returns:
+        pd.DataFrame: Leaderboard ranked by the round reached and the scoring metric,
+            with settings, training fraction, mean fit seconds per fold, and
+            out-of-fold metrics from calculate_metrics; None if the search failed.
+    """
+    try:
+        settings = MODEL_SELECTION_SETTINGS
+        vectorizer_grid = vectorizer_grid or settings["vectorizer_grid"]
+        classifier_grid = classifier_grid or settings["classifier_grid"]
+        n_folds = n_folds or settings["n_folds"]
+        n_workers = n_workers or settings["n_workers"] or os.cpu_count() or 1
+        halving_factor = halving_factor or settings["halving_factor"]
+        fraction = min_fraction or settings["min_fraction"]
+        scoring = settings["scoring"]
+        
+        texts = data[text_column].fillna("").reset_index(drop=True)
+        labels = data[label_column].reset_index(drop=True)
+        # Shuffle each training fold once, so a prefix of it is a random subsample
+        rng = np.random.RandomState(42)
+        splits = [
+            (rng.permutation(train_index), val_index)
+            for train_index, val_index in StratifiedKFold(n_folds, shuffle=True, random_state=42).split(texts, labels)
+        ]
+        y_val = np.concatenate([labels.iloc[val_index].to_numpy() for _, val_index in splits])
+        
+        # Vectorize every fold once per vectorizer setting, keeping only one in memory at a time
+        vectorizer_configs = list(ParameterGrid(vectorizer_grid))
+        fold_dir = tempfile.TemporaryDirectory(prefix="model-selection-")
+        folds = {}
+        with track_stage("search_vectorize", rows_in=len(texts) * len(vectorizer_configs)):
+            for vectorizer_id, params in enumerate(vectorizer_configs):
+                folds[vectorizer_id] = []
+                for fold, (train_index, val_index) in enumerate(splits):
+                    vectorizer = _create_tfidf_vectorizer(params)
+                    fold_path = os.path.join(fold_dir.name, f"vectorizer{vectorizer_id}-fold{fold}.joblib")
+                    joblib.dump((
+                        vectorizer.fit_transform(texts.iloc[train_index]),
+                        labels.iloc[train_index].to_numpy(),
+                        vectorizer.transform(texts.iloc[val_index])
+                    ), fold_path)
+                    folds[vectorizer_id].append(fold_path)
+        # max_iter is recorded with each candidate, so refitting the winner uses the same settings
+        candidates = [
+            {
+                "vectorizer_id": vectorizer_id,
+                "vectorizer_params": params,
+                "classifier_params": {"max_iter": 1000, **classifier_params}
+            }
+            for vectorizer_id, params in enumerate(vectorizer_configs)
+            for classifier_params in ParameterGrid(classifier_grid)
+        ]
+        
+        surviving = list(range(len(candidates)))
+        search_round = 0
+        with fold_dir, ProcessPoolExecutor(max_workers=n_workers, mp_context=SPAWN_CONTEXT) as executor:
+            while True:
+                fraction = min(fraction, 1.0)
+                futures = {
+                    (candidate_id, fold): executor.submit(
+                        _fit_fold,
+                        folds[candidates[candidate_id]["vectorizer_id"]][fold],
+                        candidates[candidate_id]["classifier_params"],
+                        max(1, int(len(splits[fold][0]) * fraction))
+                    )
+                    for candidate_id in surviving
+                    for fold in range(n_folds)
+                }
+                for candidate_id in surviving:
+                    results = [futures[(candidate_id, fold)].result() for fold in range(n_folds)]
+                    candidates[candidate_id].update({
+                        "round": search_round,
+                        "train_fraction": fraction,
+                        "fit_seconds": sum(seconds for _, seconds in results) / n_folds,
+                        **calculate_metrics(y_val, np.concatenate([predictions for predictions, _ in results]))
+                    })
+                print(f"Search round {search_round}: {len(surviving)} candidate(s) on {fraction:.0%} of each fold.")
+                if fraction >= 1.0 or len(surviving) == 1:
+                    break
+                # Keep the best candidates and give them more training data
+                surviving.sort(key=lambda candidate_id: candidates[candidate_id].get(scoring, 0.0), reverse=True)
+                surviving = surviving[:max(1, len(surviving) // halving_factor)]
+                fraction *= halving_factor
+                search_round += 1
+        
+        leaderboard = pd.DataFrame(candidates).drop(columns="vectorizer_id")
+        leaderboard = leaderboard.sort_values(["round", scoring], ascending=False).reset_index(drop=True)
+        leaderboard.insert(0, "rank", range(1, len(leaderboard) + 1))
+        os.makedirs(os.path.dirname(settings["leaderboard_path"]), exist_ok=True)
+        leaderboard.to_csv(settings["leaderboard_path"], index=False)
+        print(f"Model selection leaderboard:\n{leaderboard.head(10).to_string(index=False)}")
+        return leaderboard
+    except Exception as e:
+        print(f"Error searching Logistic Regression settings: {e}")
+        return None
+
+class ReviewDataset:
+    """
+    Tokenized reviews kept unpadded; padding is applied per batch by the collator.
+    Implements the map-style dataset protocol (__len__ and __getitem__), so the
+    module does not need torch at import time.
+    """
+
+    def __init__(self, encodings, labels):
+        """
+        Args:
+            encodings (dict): Token id lists per tokenizer output (input_ids, attention_mask, ...).
+            labels (list): Integer label ids aligned with the encodings.
+        """
+        self.encodings = encodings
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, idx):
+        item = {key: values[idx] for key, values in self.encodings.items()}
+        item["labels"] = self.labels[idx]
+        return item
+
+def tokenize_reviews(texts, tokenizer, max_length=None, cache_dir=None):
+    """
+    Tokenizes reviews in one batched call of the fast tokenizer, without padding,
+    and caches the result on disk keyed by the texts and tokenizer settings.
+
+    Args:
+        texts (list): Review texts.
+        tokenizer (BertTokenizerFast): Tokenizer to apply.
+        max_length (int): Truncation length (defaults to BERT_SETTINGS).
+        cache_dir (str): Directory for cached encodings (defaults to BERT_SETTINGS).
+
+    Returns:
+        dict: Token id lists per tokenizer output.
+    """
+    import torch
+    max_length = max_length or BERT_SETTINGS["max_length"]
+    cache_dir = cache_dir or BERT_SETTINGS["token_cache_dir"]
+    digest = hashlib.sha256(f"{tokenizer.name_or_path}|{max_length}".encode("utf-8"))
+    for text in texts:
+        digest.update(b"\0" + text.encode("utf-8"))
+    cache_path = os.path.join(cache_dir, f"{digest.hexdigest()}.pt")
+    if os.path.exists(cache_path):
+        print(f"Loaded cached BERT encodings from {cache_path}.")
+        return torch.load(cache_path)
+    
+    encodings = dict(tokenizer(list(texts), truncation=True, max_length=max_length))
+    os.makedirs(cache_dir, exist_ok=True)
+    torch.save(encodings, cache_path)
+    return encodings
+
+def prepare_bert_datasets(data, text_column, label_column, tokenizer, eval_fraction=None):
+    """
+    Splits the data into train and eval sets and tokenizes both.
+
+    Args:
+        data (pd.DataFrame): Dataset with text and labels.
+        text_column (str): Name of the column with text data.
+        label_column (str): Name of the column with sentiment labels.
+        tokenizer (BertTokenizerFast): Tokenizer to apply.
+        eval_fraction (float): Share of reviews held out for evaluation.
+
+    Returns:
+        tuple: Train dataset, eval dataset, and the sorted label names.
+    """
+    eval_fraction = eval_fraction or BERT_SETTINGS["eval_fraction"]
+    label_names = sorted(data[label_column].unique())
+    label_ids = data[label_column].map({label: i for i, label in enumerate(label_names)})
+    X_train, X_eval, y_train, y_eval = train_test_split(
+        data[text_column].fillna(""), label_ids, test_size=eval_fraction, random_state=42
+    )
+    train_dataset = ReviewDataset(tokenize_reviews(X_train.tolist(), tokenizer), y_train.tolist())
+    eval_dataset = ReviewDataset(tokenize_reviews(X_eval.tolist(), tokenizer), y_eval.tolist())
+    return train_dataset, eval_dataset, label_names
+
+def create_bert_trainer(model, tokenizer, train_dataset, eval_dataset, output_dir=None, num_train_epochs=None,
+                        pad_to_max_length=False):
+    """
+    Creates a Trainer that pads each batch dynamically and groups reviews of
+    similar length into the same batches.
+
+    Args:
+        model (BertForSequenceClassification): Model to fine-tune.
+        tokenizer (BertTokenizerFast): Tokenizer used for padding.
+        train_dataset (ReviewDataset): Training data.
+        eval_dataset (ReviewDataset): Evaluation data.
+        output_dir (str): Checkpoint directory (defaults to BERT_SETTINGS).
+        num_train_epochs (int): Training epochs (defaults to BERT_SETTINGS).
+        pad_to_max_length (bool): Pad every batch to max_length without length
+            grouping, reproducing the cost of fixed-length padding for comparison.
+
+    Returns:
+        Trainer: Configured trainer.
+    """
+    # transformers (and torch) are only loaded when a BERT model is trained
+    from transformers import DataCollatorWithPadding, Trainer, TrainingArguments
+    training_args = TrainingArguments(
+        output_dir=output_dir or BERT_SETTINGS["output_dir"],
+        num_train_epochs=num_train_epochs or BERT_SETTINGS["num_train_epochs"],
+        per_device_train_batch_size=BERT_SETTINGS["train_batch_size"],
+        per_device_eval_batch_size=BERT_SETTINGS["eval_batch_size"],
+        group_by_length=not pad_to_max_length,
+        save_steps=10_000,
+        save_total_limit=2,
+    )
+    if pad_to_max_length:
+        data_collator = DataCollatorWithPadding(tokenizer, padding="max_length", max_length=BERT_SETTINGS["max_length"])
+    else:
+        data_collator = DataCollatorWithPadding(tokenizer)
+    return Trainer(
+        model=model,
+        args=training_args,
+        train_dataset=train_dataset,
+        eval_dataset=eval_dataset,
+        data_collator=data_collator,
+    )
+
 def fine_tune_bert(data, text_column, label_column):
     """
     Fine-tunes a pre-trained BERT model for sentiment classification.
@@ -55,35 +524,30 @@ def fine_tune_bert(data, text_column, label_column):
         BertForSequenceClassification: Fine-tuned BERT model.
     """
     try:
-        # Initialize the tokenizer and model
-        tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
-        model = BertForSequenceClassification.from_pretrained("bert-base-uncased", num_labels=3)
+        from transformers import BertForSequenceClassification, BertTokenizerFast
         
-        # Tokenize and encode the dataset
-        encoded_data = data[text_column].apply(
-            lambda x: tokenizer(x, padding="max_length", truncation=True, return_tensors="pt")
-        )
-        labels = data[label_column].values
-        
-        # Define training arguments
-        training_args = TrainingArguments(
-            output_dir="./satej_bert_model",
-            num_train_epochs=3,
-            per_device_train_batch_size=8,
-            save_steps=10_000,
-            save_total_limit=2,
-        )
+        # Initialize the tokenizer and tokenize the train/eval split once
+        tokenizer = BertTokenizerFast.from_pretrained(BERT_SETTINGS["pretrained_model"])
+        with track_stage("tokenize_bert", rows_in=len(data)):
+            train_dataset, eval_dataset, label_names = prepare_bert_datasets(data, text_column, label_column, tokenizer)
         
-        # Trainer setup
-        trainer = Trainer(
-            model=model,
-            args=training_args,
-            train_dataset=encoded_data,
-            eval_dataset=encoded_data,
+        # Initialize the model with readable label names for later inference
+        model = BertForSequenceClassification.from_pretrained(
+            BERT_SETTINGS["pretrained_model"],
+            num_labels=len(label_names),
+            id2label=dict(enumerate(label_names)),
+            label2id={label: i for i, label in enumerate(label_names)}
         )
         
-        # Fine-tune the model
-        trainer.train()
+        # Fine-tune the model and evaluate on the held-out reviews
+        trainer = create_bert_trainer(model, tokenizer, train_dataset, eval_dataset)
+        with track_stage("train_bert", rows_in=len(train_dataset)):
+            trainer.train()
+        print(f"BERT evaluation: {trainer.evaluate()}")
+        
+        # Save the model and tokenizer for CPU inference
+        trainer.save_model(MODEL_PATHS["bert_model"])
+        tokenizer.save_pretrained(MODEL_PATHS["bert_model"])
         print("BERT fine-tuning complete.")
         
         return model
@@ -1,45 +1,556 @@
-from data_extraction import extract_from_sql, extract_from_api
-from data_cleaning import preprocess_data
+import argparse
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+import joblib
+import numpy as np
+import pandas as pd
+from config import CASCADE_SETTINGS, INCREMENTAL_SETTINGS, PIPELINE_SETTINGS, REPORT_SETTINGS, STORAGE_PATHS, TRAINING_SETTINGS
+from data_extraction import (
+    SQL_CHUNK_SIZE, extract_from_sql, extract_from_sql_chunks, extract_incremental,
+    load_watermark, save_watermark
+)
+from data_cleaning import preprocess_data_parallel, preprocess_frames_parallel
+from deduplication import deduplicate_reviews
 from exploratory_data_analysis import visualize_rating_distribution, generate_word_cloud
-from sentiment_model import train_logistic_regression, fine_tune_bert
+from reporting import generate_report
+from rollups import load_daily_rollup, sentiment_counts_from_rollup, sentiment_trends_from_rollup, trend_window_start
+from sentiment_model import (
+    fine_tune_bert, search_logistic_regression, train_logistic_regression, train_logistic_regression_out_of_core
+)
+from sentiment_scoring import (
+    save_model_artifacts, score_batches, score_dataframe, write_prediction_stream, write_predictions
+)
+from storage import iter_partitioned, partition_days, read_partitioned, write_partitioned
+from utils import apply_review_schema, frame_memory_mb, get_metrics, track_stage, tracked, write_metrics
+from visualization import plot_sentiment_counts, plot_trend_counts
 
-def sentiment_analysis_pipeline(sql_query):
+# Columns used by the EDA and modelling steps; everything else is dropped after extraction
+PIPELINE_COLUMNS = ["review_text", "rating", "sentiment", "review_date"]
+
+# A pipeline stage: func(inputs, params) computes the output from upstream outputs.
+# Stages are skipped when a cached output exists for the same code, settings,
+# parameters, and upstream content. modules lists the source files the stage's
+# behaviour depends on; main_thread stages run on the calling thread. cacheable and
+# main_thread may be callables evaluated when the stage is scheduled. restore, if
+# set, is called with a cached output before it is used and returns whether the
+# output can still be used; if not, the stage runs again.
+Stage = namedtuple(
+    "Stage", ["name", "func", "deps", "params", "modules", "cacheable", "main_thread", "restore"], defaults=[None]
+)
+
+# Streamed stage output: a Parquet dataset on disk and a hash of its content
+StagedDataset = namedtuple("StagedDataset", ["path", "fingerprint"])
+
+# File inside a staged dataset recording its fingerprint; Parquet readers skip names starting with "_"
+FINGERPRINT_FILE = "_fingerprint"
+
+def _watermark_value(value):
+    """
+    Converts a date or key to a JSON value that compares like the original in
+    SQL. Datetimes are formatted as "YYYY-MM-DD HH:MM:SS", the form databases
+    such as SQLite store as text, since the ISO "T" separator sorts after the
+    space and would hide later reviews from the same day.
+    """
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value.item() if isinstance(value, np.generic) else value
+
+def incremental_extract_and_clean(database_url=None):
+    """
+    Extracts only the reviews added since the last run, cleans them, and appends
+    them to the cleaned Parquet dataset. The watermark is advanced after each chunk
+    is stored, so an interrupted run resumes where it stopped; a chunk that fails
+    to clean stops the run without advancing it.
+
+    Args:
+        database_url (str): Optional SQLAlchemy URL overriding DB_CONFIG.
+
+    Returns:
+        int: Number of new reviews processed.
+    """
+    date_column = INCREMENTAL_SETTINGS["date_column"]
+    key_column = INCREMENTAL_SETTINGS["key_column"]
+    watermark = load_watermark(INCREMENTAL_SETTINGS["watermark_path"])
+    new_rows = 0
+    chunks = extract_incremental(
+        watermark,
+        table=INCREMENTAL_SETTINGS["table"],
+        date_column=date_column,
+        key_column=key_column,
+        initial_lookback_days=INCREMENTAL_SETTINGS["initial_lookback_days"],
+        chunksize=INCREMENTAL_SETTINGS["chunk_size"],
+        database_url=database_url,
+        columns=PIPELINE_COLUMNS
+    )
+    for chunk in chunks:
+        # Rows arrive ordered by date and key, so the last row is the new watermark
+        watermark = {
+            date_column: _watermark_value(chunk[date_column].iloc[-1]),
+            key_column: _watermark_value(chunk[key_column].iloc[-1])
+        }
+        chunk = preprocess_data_parallel(chunk, text_column="review_text", raise_errors=True)
+        write_partitioned(chunk, STORAGE_PATHS["cleaned_reviews"], date_column=date_column)
+        save_watermark(INCREMENTAL_SETTINGS["watermark_path"], watermark)
+        new_rows += len(chunk)
+    print(f"Incremental extraction processed {new_rows} new reviews.")
+    return new_rows
+
+@tracked("load_training_window")
+def load_training_window(days=None):
+    """
+    Loads the most recent cleaned reviews from the cleaned Parquet dataset.
+
+    Args:
+        days (int): Number of days to load (defaults to INCREMENTAL_SETTINGS).
+
+    Returns:
+        pd.DataFrame: Cleaned reviews within the training window.
+    """
+    days = days or INCREMENTAL_SETTINGS["training_window_days"]
+    # Only the day partitions inside the window are read from disk
+    window = read_partitioned(
+        STORAGE_PATHS["cleaned_reviews"],
+        columns=PIPELINE_COLUMNS,
+        start_date=datetime.now() - timedelta(days=days)
+    )
+    return apply_review_schema(window)
+
+def _extract_stage(inputs, params):
+    """
+    Extracts reviews, streaming them into the raw Parquet dataset when a chunk
+    size is set so the full table is never held in memory.
+    """
+    if not params.get("chunksize"):
+        data = extract_from_sql(
+            params["sql_query"], database_url=params.get("database_url"), columns=PIPELINE_COLUMNS
+        )
+        if data is None:
+            raise Exception("Data extraction failed.")
+        return data
+    digest = hashlib.sha256()
+    chunks = extract_from_sql_chunks(
+        params["sql_query"], chunksize=params["chunksize"], database_url=params.get("database_url"),
+        columns=PIPELINE_COLUMNS
+    )
+    for i, chunk in enumerate(chunks):
+        digest.update(pd.util.hash_pandas_object(chunk, index=False).values.tobytes())
+        write_partitioned(chunk, STORAGE_PATHS["raw_reviews"], overwrite=i == 0)
+    return StagedDataset(STORAGE_PATHS["raw_reviews"], digest.hexdigest())
+
+def _clean_stage(inputs, params):
+    """
+    Cleans the extracted reviews. A streamed extraction is cleaned batch by batch
+    on one pool of worker processes into the staged cleaned dataset, so memory
+    stays bounded by the batch size rather than the extraction.
+    """
+    extracted = inputs["extract"]
+    if not isinstance(extracted, StagedDataset):
+        # The extracted frame is only consumed here, so its text column is cleaned in place
+        return preprocess_data_parallel(extracted, text_column="review_text")
+    path = STORAGE_PATHS["staged_cleaned_reviews"]
+    digest = hashlib.sha256()
+    frames = (apply_review_schema(batch) for batch in iter_partitioned(extracted.path, columns=PIPELINE_COLUMNS))
+    rows = 0
+    for batch in preprocess_frames_parallel(frames, text_column="review_text"):
+        digest.update(pd.util.hash_pandas_object(batch, index=False).values.tobytes())
+        write_partitioned(batch, path, overwrite=rows == 0)
+        rows += len(batch)
+    if rows == 0:
+        raise Exception("Data extraction returned no reviews.")
+    staged = StagedDataset(path, digest.hexdigest())
+    with open(os.path.join(path, FINGERPRINT_FILE), "w", encoding="utf-8") as f:
+        f.write(staged.fingerprint)
+    return staged
+
+def _staged_dataset_intact(output):
+    """
+    Checks that a cached staged dataset was not overwritten by a later run.
+    """
+    if not isinstance(output, StagedDataset):
+        return True
+    fingerprint_path = os.path.join(output.path, FINGERPRINT_FILE)
+    if not os.path.exists(fingerprint_path):
+        return False
+    with open(fingerprint_path, "r", encoding="utf-8") as f:
+        return f.read() == output.fingerprint
+
+def _load_cleaned(cleaned):
+    """
+    Returns the clean stage output as a DataFrame, loading a staged dataset.
+    """
+    if isinstance(cleaned, StagedDataset):
+        return apply_review_schema(read_partitioned(cleaned.path, columns=PIPELINE_COLUMNS))
+    return cleaned
+
+def _dedup_stage(inputs, params):
+    return deduplicate_reviews(_load_cleaned(inputs["clean"]), text_column="review_text")
+
+def _eda_stage(inputs, params):
+    if REPORT_SETTINGS["headless"]:
+        generate_report(cleaned_data=inputs["dedup"])
+    else:
+        visualize_rating_distribution(inputs["dedup"], rating_column="rating")
+        generate_word_cloud(inputs["dedup"], text_column="review_text")
+
+def _train_lr_stage(inputs, params):
+    if TRAINING_SETTINGS["mode"] == "out_of_core":
+        # Stream the full cleaned history from disk in chunks, so memory stays constant however
+        # large it grows; rows are shuffled within each chunk before partial_fit
+        model, vectorizer, _ = train_logistic_regression_out_of_core(
+            lambda: iter_partitioned(
+                STORAGE_PATHS["cleaned_reviews"],
+                columns=["review_text", "sentiment"],
+                batch_size=TRAINING_SETTINGS["chunk_size"]
+            ),
+            "review_text",
+            "sentiment"
+        )
+    elif TRAINING_SETTINGS["mode"] == "search":
+        # Tune the settings with cross-validation, then refit the best candidate
+        leaderboard = search_logistic_regression(inputs["dedup"], "review_text", "sentiment")
+        if leaderboard is None:
+            raise Exception("Logistic Regression model selection failed.")
+        best = leaderboard.iloc[0]
+        model, vectorizer = train_logistic_regression(
+            inputs["dedup"], "review_text", "sentiment",
+            vectorizer_params=best["vectorizer_params"],
+            classifier_params=best["classifier_params"]
+        )
+    else:
+        model, vectorizer = train_logistic_regression(inputs["dedup"], "review_text", "sentiment")
+    if model is None:
+        raise Exception("Logistic Regression training failed.")
+    save_model_artifacts(model, vectorizer)
+    return model, vectorizer
+
+def _restore_lr_artifacts(output):
+    """
+    Re-saves the model artifacts of a cached train_lr output, since scoring jobs
+    load them from disk and they may have been overwritten since it was cached.
+    """
+    save_model_artifacts(*output)
+    return True
+
+def _train_bert_stage(inputs, params):
+    model = fine_tune_bert(inputs["dedup"], "review_text", "sentiment")
+    if model is None:
+        raise Exception("BERT fine-tuning failed.")
+    return model
+
+def _tune_cascade_stage(inputs, params):
+    if not CASCADE_SETTINGS["enabled"]:
+        return None
+    # BERT is only loaded when the cascade is enabled
+    from cascade_scoring import tune_cascade
+    model, vectorizer = inputs["train_lr"]
+    threshold = tune_cascade(inputs["dedup"], "review_text", "sentiment", model, vectorizer)
+    if threshold is None:
+        raise Exception("Cascade threshold tuning failed.")
+    return threshold
+
+def _score_stage(inputs, params):
+    # Score with the train_lr output itself, which may come from the stage cache, rather
+    # than whatever artifacts are on disk; duplicates are scored too, since every stored
+    # review needs a prediction
+    model, vectorizer = inputs["train_lr"]
+    scoring_options = {"model": model, "vectorizer": vectorizer, "cascade_threshold": inputs.get("tune_cascade")}
+    cleaned = inputs["clean"]
+    if isinstance(cleaned, StagedDataset):
+        # Stream the staged cleaned reviews through the scorer, replacing the days they cover
+        days = partition_days(cleaned.path)
+        chunks = iter_partitioned(cleaned.path, columns=PIPELINE_COLUMNS)
+        return write_prediction_stream(
+            score_batches(chunks, text_column="review_text", **scoring_options), start_date=days[0], end_date=days[-1]
+        )
+    predictions = score_dataframe(cleaned, text_column="review_text", **scoring_options)
+    if predictions is None:
+        raise Exception("Batch scoring failed.")
+    write_predictions(predictions)
+    return len(predictions)
+
+def _visualize_stage(inputs, params):
+    # The score stage refreshed the daily rollup, which is all the charts need
+    rollup = load_daily_rollup()
+    if REPORT_SETTINGS["headless"]:
+        generate_report(rollup=rollup)
+    else:
+        plot_sentiment_counts(sentiment_counts_from_rollup(rollup))
+        trends = sentiment_trends_from_rollup(rollup, start_date=trend_window_start())
+        plot_trend_counts(trends, date_column="review_date", sentiment_column="predicted_sentiment")
+
+def _interactive():
+    return not REPORT_SETTINGS["headless"]
+
+PIPELINE_STAGES = [
+    Stage("extract", _extract_stage, [], ["sql_query", "chunksize", "database_url"], ["data_extraction"], False, False),
+    Stage("clean", _clean_stage, ["extract"], [], ["data_cleaning"], True, False, _staged_dataset_intact),
+    # Reads and updates the persistent deduplication index, which the cache key does not cover
+    Stage("dedup", _dedup_stage, ["clean"], [], ["deduplication"], False, False),
+    # Interactive plots must be shown from the main thread; headless reports render in worker processes
+    Stage("eda", _eda_stage, ["dedup"], [], ["exploratory_data_analysis", "reporting"], True, _interactive),
+    # Out-of-core training streams the cleaned dataset from disk rather than the dedup output; the
+    # cache key does not cover that dataset, so in that mode the stage always retrains
+    Stage("train_lr", _train_lr_stage, ["dedup"], [], ["sentiment_model", "sentiment_scoring"],
+          lambda: TRAINING_SETTINGS["mode"] != "out_of_core", False, _restore_lr_artifacts),
+    Stage("train_bert", _train_bert_stage, ["dedup"], [], ["sentiment_model"], True, False),
+    # Tunes the escalation threshold on reviews reserved from both models' training
+    Stage("tune_cascade", _tune_cascade_stage, ["dedup", "train_lr", "train_bert"], [],
+          ["cascade_scoring", "bert_inference"], True, False),
+    # Cascade scoring waits for the tuned threshold; Logistic Regression scoring does not wait for BERT
+    Stage("score", _score_stage, ["clean", "train_lr"] + (["tune_cascade"] if CASCADE_SETTINGS["enabled"] else []),
+          [], ["sentiment_scoring", "cascade_scoring"], True, False),
+    # Reads the whole rollup dataset, which the cache key does not cover
+    Stage("visualize", _visualize_stage, ["score"], [], ["visualization", "reporting", "rollups"], False, _interactive),
+]
+STAGE_NAMES = [stage.name for stage in PIPELINE_STAGES]
+# Stages that run on already-cleaned reviews
+ANALYSIS_STAGES = ["dedup", "eda", "train_lr", "train_bert", "tune_cascade", "score", "visualize"]
+
+def _fingerprint(value):
+    """
+    Hashes a stage output so downstream cache keys change when its content does.
+    """
+    if isinstance(value, StagedDataset):
+        return value.fingerprint
+    digest = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        digest.update(",".join(map(str, value.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(value, index=False).values.tobytes())
+    else:
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+def _cache_key(stage, params, fingerprints):
+    """
+    Hashes everything a stage output depends on: the stage code, the source of
+    the modules it calls, the configuration, its parameters, and its inputs.
+    """
+    digest = hashlib.sha256(inspect.getsource(stage.func).encode("utf-8"))
+    for module in stage.modules + ["config"]:
+        with open(importlib.util.find_spec(module).origin, "rb") as f:
+            digest.update(f.read())
+    digest.update(json.dumps({name: params.get(name) for name in stage.params}, sort_keys=True, default=str).encode("utf-8"))
+    for dep in stage.deps:
+        digest.update(fingerprints[dep].encode("utf-8"))
+    return digest.hexdigest()
+
+def _cache_path(stage, key):
+    return os.path.join(PIPELINE_SETTINGS["cache_dir"], f"{stage.name}-{key[:16]}.pkl")
+
+def _load_cached(stage, key):
+    """
+    Loads a cached stage output and refreshes its last use.
+
+    Returns:
+        object: The output, or None on a miss or if the stage's restore hook
+            rejects it.
+    """
+    path = _cache_path(stage, key)
+    if not os.path.exists(path):
+        return None
+    output = joblib.load(path)
+    if stage.restore is not None and not stage.restore(output):
+        print(f"Cached output of stage '{stage.name}' is no longer valid; running it again.")
+        return None
+    os.utime(path)
+    return output
+
+def _evict_stage_cache(cache_dir=None):
+    """
+    Removes cached stage outputs unused for cache_max_age_days, then the least
+    recently used ones until the cache fits in cache_max_gb. Cache hits refresh
+    an output's modification time, so it tracks the last use.
+    """
+    cache_dir = cache_dir or PIPELINE_SETTINGS["cache_dir"]
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+    max_bytes = PIPELINE_SETTINGS["cache_max_gb"] * 1024 ** 3
+    expiry = time.time() - PIPELINE_SETTINGS["cache_max_age_days"] * 86400
+    evicted = 0
+    for mtime, size, path in entries:
+        if mtime >= expiry and total_bytes <= max_bytes:
+            break
+        os.remove(path)
+        total_bytes -= size
+        evicted += 1
+    if evicted:
+        print(f"Evicted {evicted} cached stage output(s); {total_bytes / 1024 ** 3:.2f} GB remain.")
+
+def _run_stage(stage, inputs, params):
+    start_time = time.perf_counter()
+    with track_stage(f"pipeline.{stage.name}") as counters:
+        frames = [value for value in inputs.values() if isinstance(value, pd.DataFrame)]
+        if frames:
+            counters["memory_before_mb"] = sum(frame_memory_mb(frame) for frame in frames)
+        output = stage.func(inputs, params)
+        if isinstance(output, pd.DataFrame):
+            counters["rows_out"] = len(output)
+            counters["bytes"] = int(output.memory_usage(index=True).sum())
+            counters["memory_after_mb"] = frame_memory_mb(output)
+    return output, time.perf_counter() - start_time
+
+def _resolve_stages(requested, provided):
+    """
+    Returns the requested stages plus the dependencies they need, stopping at
+    stages whose outputs are provided.
+    """
+    by_name = {stage.name: stage for stage in PIPELINE_STAGES}
+    selected = set()
+    to_visit = list(requested)
+    while to_visit:
+        name = to_visit.pop()
+        if name in selected or name in provided:
+            continue
+        if name not in by_name:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+        selected.add(name)
+        to_visit.extend(by_name[name].deps)
+    return [stage for stage in PIPELINE_STAGES if stage.name in selected]
+
+def _print_timing_table(timings):
+    # DataFrame memory of the stage's inputs and output, for stages that ran
+    metrics = get_metrics()
+    print(f"{'Stage':<12}{'Status':<10}{'Seconds':>10}{'MB in':>10}{'MB out':>10}")
+    for name, status, seconds in timings:
+        stage_metrics = metrics.get(f"pipeline.{name}", {}) if status == "ran" else {}
+        memory = [
+            f"{stage_metrics[key]:>10.1f}" if key in stage_metrics else f"{'-':>10}"
+            for key in ("memory_before_mb", "memory_after_mb")
+        ]
+        print(f"{name:<12}{status:<10}{seconds:>10.2f}{''.join(memory)}")
+
+def run_pipeline(params, stages=None, inputs=None, force=False, max_workers=None):
+    """
+    Runs pipeline stages as a DAG. Stages whose code, settings, parameters, and
+    input content are unchanged are loaded from the stage cache; independent
+    stages run concurrently. A per-stage timing table is printed at the end,
+    the stage counters are written with utils.write_metrics, and stale cache
+    entries are evicted.
+
+    Args:
+        params (dict): Pipeline parameters (sql_query, chunksize, database_url).
+        stages (list): Stage names to run; their dependencies run or load from
+            cache as needed. Defaults to every stage.
+        inputs (dict): Precomputed stage outputs by stage name, e.g. {"clean": data}.
+        force (bool): Recompute stages even when a cached output exists.
+        max_workers (int): Concurrent stages (defaults to PIPELINE_SETTINGS).
+
+    Returns:
+        dict: Outputs of every stage that ran or was loaded.
+    """
+    outputs = dict(inputs or {})
+    selected = _resolve_stages(stages or STAGE_NAMES, outputs)
+    # Only outputs consumed by a selected stage need a content hash
+    consumed = {dep for stage in selected for dep in stage.deps}
+    fingerprints = {name: _fingerprint(value) for name, value in outputs.items() if name in consumed}
+    pending = list(selected)
+    running = {}
+    timings = []
+
+    def finish(stage, key, output, seconds, status):
+        outputs[stage.name] = output
+        if stage.name in consumed:
+            fingerprints[stage.name] = _fingerprint(output)
+        if status == "ran" and key is not None:
+            os.makedirs(PIPELINE_SETTINGS["cache_dir"], exist_ok=True)
+            joblib.dump(output, _cache_path(stage, key))
+        timings.append((stage.name, status, seconds))
+        print(f"Stage '{stage.name}' {status} in {seconds:.2f}s.")
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or PIPELINE_SETTINGS["max_workers"]) as executor:
+            while pending or running:
+                ready = [stage for stage in pending if all(dep in outputs for dep in stage.deps)]
+                resolved_inline = False
+                main_thread_stages = []
+                for stage in ready:
+                    pending.remove(stage)
+                    cacheable = stage.cacheable() if callable(stage.cacheable) else stage.cacheable
+                    key = _cache_key(stage, params, fingerprints) if cacheable else None
+                    output = _load_cached(stage, key) if key is not None and not force else None
+                    if output is not None:
+                        finish(stage, key, output, 0.0, "cached")
+                        resolved_inline = True
+                    elif stage.main_thread() if callable(stage.main_thread) else stage.main_thread:
+                        main_thread_stages.append((stage, key))
+                    else:
+                        stage_inputs = {dep: outputs[dep] for dep in stage.deps}
+                        running[executor.submit(_run_stage, stage, stage_inputs, params)] = (stage, key)
+                # Main-thread stages run only after every ready pool stage was submitted,
+                # so interactive EDA overlaps training instead of delaying it
+                for stage, key in main_thread_stages:
+                    output, seconds = _run_stage(stage, {dep: outputs[dep] for dep in stage.deps}, params)
+                    finish(stage, key, output, seconds, "ran")
+                    resolved_inline = True
+                if resolved_inline:
+                    # Newly available outputs may unblock more stages
+                    continue
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, key = running.pop(future)
+                    output, seconds = future.result()
+                    finish(stage, key, output, seconds, "ran")
+    finally:
+        _print_timing_table(timings)
+        write_metrics()
+        _evict_stage_cache()
+    return outputs
+
+def sentiment_analysis_pipeline(sql_query, chunksize=None, database_url=None, stages=None, force=False):
     """
     Orchestrates the sentiment analysis pipeline.
 
     Args:
         sql_query (str): SQL query for data extraction.
+        chunksize (int): If set, stream the query results in chunks of this many
+            rows into the raw Parquet dataset instead of loading them at once.
+        database_url (str): Optional SQLAlchemy URL overriding DB_CONFIG.
+        stages (list): Stage names to run (defaults to every stage).
+        force (bool): Recompute stages even when a cached output exists.
 
     Returns:
         None
     """
     try:
-        # Step 1: Data Extraction
-        data = extract_from_sql(sql_query)
-        if data is None:
-            raise Exception("Data extraction failed.")
-        print("Step 1: Data extraction complete.")
-        
-        # Step 2: Data Cleaning
-        cleaned_data = preprocess_data(data, text_column="review_text")
-        print("Step 2: Data cleaning complete.")
-        
-        # Step 3: Exploratory Data Analysis
-        visualize_rating_distribution(cleaned_data, rating_column="rating")
-        generate_word_cloud(cleaned_data, text_column="review_text")
-        print("Step 3: EDA complete.")
-        
-        # Step 4: Sentiment Model Training
-        logistic_model, vectorizer = train_logistic_regression(cleaned_data, "review_text", "sentiment")
-        print("Step 4: Logistic Regression model training complete.")
-        
-        bert_model = fine_tune_bert(cleaned_data, "review_text", "sentiment")
-        print("Step 4: BERT model fine-tuning complete.")
-        
+        params = {"sql_query": sql_query, "chunksize": chunksize, "database_url": database_url}
+        run_pipeline(params, stages=stages, force=force)
     except Exception as e:
         print(f"Error in sentiment analysis pipeline: {e}")
 
 if __name__ == "__main__":
-    # SQL query example
-    sql_query = "SELECT * FROM customer_reviews WHERE review_date > '2022-01-01'"
-    sentiment_analysis_pipeline(sql_query)
+    parser = argparse.ArgumentParser(description="Run the sentiment analysis pipeline.")
+    parser.add_argument("--query", default="SELECT * FROM customer_reviews WHERE review_date > '2022-01-01'")
+    parser.add_argument("--stages", help=f"Comma-separated subset of: {', '.join(STAGE_NAMES)}")
+    parser.add_argument("--chunksize", type=int, default=SQL_CHUNK_SIZE)
+    parser.add_argument("--database-url", help="SQLAlchemy URL overriding DB_CONFIG")
+    parser.add_argument("--force", action="store_true", help="Ignore cached stage outputs")
+    args = parser.parse_args()
+    sentiment_analysis_pipeline(
+        args.query,
+        chunksize=args.chunksize,
+        database_url=args.database_url,
+        stages=args.stages.split(",") if args.stages else None,
+        force=args.force
+    )
@@ -0,0 +1,304 @@
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import pandas as pd
+from config import CASCADE_SETTINGS, FEATURE_STORE_SETTINGS, MODEL_PATHS, SCORING_SETTINGS, STORAGE_PATHS
+from feature_store import TfidfFeatureStore
+from rollups import update_daily_rollup
+from storage import iter_partitioned, replace_partitions, staging_path, write_partitioned
+from utils import SPAWN_CONTEXT
+
+# Columns carried over from the input reviews into the predictions
+PASSTHROUGH_COLUMNS = ["review_id", "review_date", "rating"]
+
+# Artifacts loaded once per scoring worker process
+_worker_model = None
+_worker_vectorizer = None
+_worker_feature_store = None
+_worker_bert_scorer = None
+_worker_cascade_threshold = None
+
+def save_model_artifacts(model, vectorizer, model_path=None, vectorizer_path=None):
+    """
+    Saves a trained Logistic Regression model and its vectorizer.
+
+    Args:
+        model (LogisticRegression): Trained classifier.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        model_path (str): Output path for the model (defaults to MODEL_PATHS).
+        vectorizer_path (str): Output path for the vectorizer (defaults to MODEL_PATHS).
+
+    Returns:
+        None
+    """
+    try:
+        model_path = model_path or MODEL_PATHS["logistic_regression"]
+        vectorizer_path = vectorizer_path or MODEL_PATHS["vectorizer"]
+        for path, artifact in [(model_path, model), (vectorizer_path, vectorizer)]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            joblib.dump(artifact, path)
+        print(f"Model artifacts saved to {model_path} and {vectorizer_path}.")
+    except Exception as e:
+        print(f"Error saving model artifacts: {e}")
+
+def load_model_artifacts(model_path=None, vectorizer_path=None):
+    """
+    Loads a trained Logistic Regression model and its vectorizer.
+
+    Args:
+        model_path (str): Path of the saved model (defaults to MODEL_PATHS).
+        vectorizer_path (str): Path of the saved vectorizer (defaults to MODEL_PATHS).
+
+    Returns:
+        tuple: The model and vectorizer, or (None, None) if loading failed.
+    """
+    try:
+        model = joblib.load(model_path or MODEL_PATHS["logistic_regression"])
+        vectorizer = joblib.load(vectorizer_path or MODEL_PATHS["vectorizer"])
+        return model, vectorizer
+    except Exception as e:
+        print(f"Error loading model artifacts: {e}")
+        return None, None
+
+def predict_sentiment(texts, model, vectorizer, feature_store=None):
+    """
+    Scores cleaned texts with one sparse transform and one predict_proba call.
+
+    Args:
+        texts (list): Cleaned review texts.
+        model (LogisticRegression): Trained classifier.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        feature_store (TfidfFeatureStore): Optional store of cached feature rows
+            for the vectorizer; only texts missing from it are vectorized.
+
+    Returns:
+        tuple: Predicted labels and the probability of each predicted label.
+    """
+    # Sparse CSR matrix
+    features = feature_store.transform(texts) if feature_store is not None else vectorizer.transform(texts)
+    probabilities = model.predict_proba(features)
+    best = probabilities.argmax(axis=1)
+    return model.classes_[best], probabilities.max(axis=1)
+
+def _init_scoring_worker(model_path, vectorizer_path, model=None, vectorizer=None, cascade_threshold=None,
+                         bert_threads=None):
+    """
+    Loads the model artifacts once per worker process, unless the model and
+    vectorizer are passed in directly, and the BERT scorer in cascade mode.
+    """
+    global _worker_model, _worker_vectorizer, _worker_feature_store, _worker_bert_scorer, _worker_cascade_threshold
+    if model is not None and vectorizer is not None:
+        _worker_model, _worker_vectorizer = model, vectorizer
+    else:
+        _worker_model, _worker_vectorizer = load_model_artifacts(model_path, vectorizer_path)
+    # Only vocabulary-based vectorizers are worth caching; hashing is already stateless
+    if FEATURE_STORE_SETTINGS["enabled"] and hasattr(_worker_vectorizer, "vocabulary_"):
+        # Read-only: writing a segment per batch would make every lookup reload the store;
+        # new reviews are added when the next training run vectorizes them
+        _worker_feature_store = TfidfFeatureStore(_worker_vectorizer, read_only=True)
+    _worker_cascade_threshold = cascade_threshold
+    if cascade_threshold is not None:
+        # BERT, and torch with it, is only loaded in cascade mode
+        from bert_inference import BertCpuScorer
+        _worker_bert_scorer = BertCpuScorer(num_threads=bert_threads)
+
+def _score_batch(batch, text_column):
+    """
+    Scores one batch of reviews with the worker's model artifacts, escalating
+    low-confidence reviews to BERT in cascade mode.
+
+    Returns:
+        pd.DataFrame: Passthrough columns with the predicted sentiment and confidence.
+    """
+    texts = batch[text_column].fillna("").tolist()
+    if _worker_bert_scorer is not None:
+        from cascade_scoring import cascade_predict
+        labels, confidence, _ = cascade_predict(
+            texts, _worker_model, _worker_vectorizer, _worker_bert_scorer, _worker_cascade_threshold,
+            _worker_feature_store
+        )
+    else:
+        labels, confidence = predict_sentiment(texts, _worker_model, _worker_vectorizer, _worker_feature_store)
+    predictions = batch[[column for column in PASSTHROUGH_COLUMNS if column in batch.columns]].copy()
+    predictions["predicted_sentiment"] = labels
+    predictions["confidence"] = confidence
+    return predictions
+
+def _split_batches(chunks, batch_size):
+    """
+    Re-slices an iterable of DataFrames into batches of at most batch_size rows.
+    """
+    for chunk in chunks:
+        for start in range(0, len(chunk), batch_size):
+            yield chunk.iloc[start:start + batch_size]
+
+def score_batches(chunks, text_column="review_text", batch_size=None, n_workers=None,
+                  model_path=None, vectorizer_path=None, model=None, vectorizer=None, cascade_threshold=None):
+    """
+    Scores a stream of cleaned reviews in batches across a pool of worker
+    processes. Each worker loads the model artifacts once; a bounded number of
+    batches is in flight at a time, so arbitrarily large inputs are scored in
+    constant memory. Predictions are yielded in input order. With
+    CASCADE_SETTINGS["enabled"], reviews the Logistic Regression model is
+    unsure about are re-scored with BERT.
+
+    Args:
+        chunks (iterable): DataFrames containing the cleaned text column.
+        text_column (str): Name of the column with cleaned text.
+        batch_size (int): Reviews per batch (defaults to SCORING_SETTINGS).
+        n_workers (int): Worker processes (defaults to SCORING_SETTINGS).
+        model_path (str): Path of the saved model (defaults to MODEL_PATHS).
+        vectorizer_path (str): Path of the saved vectorizer (defaults to MODEL_PATHS).
+        model (LogisticRegression): Trained classifier to use instead of the saved one.
+        vectorizer (TfidfVectorizer): Fitted vectorizer to use instead of the saved one.
+        cascade_threshold (float): Escalation threshold in cascade mode (defaults
+            to the one saved by cascade_scoring.tune_cascade).
+
+    Yields:
+        pd.DataFrame: Predictions for each batch.
+    """
+    batch_size = batch_size or SCORING_SETTINGS["batch_size"]
+    n_workers = n_workers or SCORING_SETTINGS["n_workers"] or os.cpu_count() or 1
+    if CASCADE_SETTINGS["enabled"] and cascade_threshold is None:
+        from cascade_scoring import load_cascade_threshold
+        cascade_threshold = load_cascade_threshold()
+        if cascade_threshold is None:
+            raise Exception("Cascade scoring is enabled but no tuned threshold was saved.")
+    # Each worker runs its own BERT scorer, so split the cores between them
+    bert_threads = max(1, (os.cpu_count() or 1) // n_workers) if n_workers > 1 else None
+    batches = _split_batches(chunks, batch_size)
+    scored = 0
+    start_time = time.perf_counter()
+    if n_workers == 1:
+        _init_scoring_worker(model_path, vectorizer_path, model, vectorizer, cascade_threshold, bert_threads)
+        for batch in batches:
+            predictions = _score_batch(batch, text_column)
+            scored += len(predictions)
+            yield predictions
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=SPAWN_CONTEXT,
+            initializer=_init_scoring_worker,
+            initargs=(model_path, vectorizer_path, model, vectorizer, cascade_threshold, bert_threads)
+        ) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(_score_batch, batch, text_column))
+                # Two batches per worker keep every core busy without buffering the input
+                if len(pending) >= 2 * n_workers:
+                    predictions = pending.popleft().result()
+                    scored += len(predictions)
+                    yield predictions
+            while pending:
+                predictions = pending.popleft().result()
+                scored += len(predictions)
+                yield predictions
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Scored {scored} reviews with {n_workers} workers in {elapsed:.2f}s "
+        f"({scored / elapsed if elapsed else 0:.0f} reviews/sec)."
+    )
+
+def score_dataframe(data, text_column="review_text", **kwargs):
+    """
+    Scores an in-memory DataFrame of cleaned reviews.
+
+    Args:
+        data (pd.DataFrame): Cleaned reviews.
+        text_column (str): Name of the column with cleaned text.
+        **kwargs: Batch size, worker, artifact, and cascade options for score_batches.
+
+    Returns:
+        pd.DataFrame: Predictions for every review, or None if scoring failed.
+    """
+    try:
+        predictions = list(score_batches([data], text_column=text_column, **kwargs))
+        return pd.concat(predictions, ignore_index=True) if predictions else pd.DataFrame()
+    except Exception as e:
+        print(f"Error scoring reviews: {e}")
+        return None
+
+def write_predictions(predictions, output_path=None):
+    """
+    Writes predictions to the predictions dataset, replacing the days they cover
+    so that re-scoring a window never duplicates rows, and refreshes those days
+    in the daily rollup. The predictions are staged first, so a failed write
+    leaves the existing days in place.
+
+    Args:
+        predictions (pd.DataFrame): Predictions including a review_date column.
+        output_path (str): Predictions dataset (defaults to STORAGE_PATHS).
+
+    Returns:
+        None
+    """
+    dates = pd.to_datetime(predictions["review_date"])
+    write_prediction_stream([predictions], output_path, start_date=dates.min(), end_date=dates.max())
+
+def write_prediction_stream(predictions, output_path=None, start_date=None, end_date=None):
+    """
+    Writes a stream of prediction batches to a staging directory and swaps them
+    into the predictions dataset once the stream is exhausted, replacing the day
+    partitions in the date range, then refreshes the daily rollup for the range.
+    A failure while scoring leaves the existing predictions untouched.
+
+    Args:
+        predictions (iterable): DataFrames of predictions, e.g. from score_batches.
+        output_path (str): Predictions dataset (defaults to STORAGE_PATHS).
+        start_date (str or datetime): First day to replace, inclusive.
+        end_date (str or datetime): Last day to replace, inclusive.
+
+    Returns:
+        int: Number of predictions written.
+    """
+    output_path = output_path or STORAGE_PATHS["predictions"]
+    written = 0
+    staging = staging_path(output_path)
+    try:
+        for batch in predictions:
+            write_partitioned(batch, staging)
+            written += len(batch)
+        replace_partitions(staging, output_path, start_date=start_date, end_date=end_date)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    update_daily_rollup(start_date=start_date, end_date=end_date, predictions_path=output_path)
+    return written
+
+def score_reviews_to_store(source_path=None, output_path=None, start_date=None, end_date=None, **kwargs):
+    """
+    Streams cleaned reviews from the cleaned dataset through the batch scorer
+    into the predictions dataset. Prediction partitions in the date range are
+    replaced, so a window can be re-scored after retraining, and the daily
+    rollup is refreshed for the range. Predictions are written to a staging
+    directory and swapped in only after every batch was scored, so a failure
+    leaves the existing predictions untouched.
+
+    Args:
+        source_path (str): Cleaned reviews dataset (defaults to STORAGE_PATHS).
+        output_path (str): Predictions dataset (defaults to STORAGE_PATHS).
+        start_date (str or datetime): First day to score, inclusive.
+        end_date (str or datetime): Last day to score, inclusive.
+        **kwargs: Batch size, worker, and artifact path options for score_batches.
+
+    Returns:
+        int: Number of reviews scored.
+    """
+    try:
+        chunks = iter_partitioned(
+            source_path or STORAGE_PATHS["cleaned_reviews"],
+            columns=["review_text"] + PASSTHROUGH_COLUMNS,
+            start_date=start_date,
+            end_date=end_date
+        )
+        return write_prediction_stream(score_batches(chunks, **kwargs), output_path, start_date, end_date)
+    except Exception as e:
+        print(f"Error scoring reviews to the predictions dataset: {e}")
+        return 0
+
+if __name__ == "__main__":
+    # Score every cleaned review with the saved model artifacts
+    score_reviews_to_store()
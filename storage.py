@@ -0,0 +1,205 @@
+import os
+import shutil
+import uuid
+import pandas as pd
+import pyarrow.dataset as ds
+
+# Hive-style partition column derived from the review date (e.g. review_day=2024-01-31)
+PARTITION_COLUMN = "review_day"
+
+def _to_day(value):
+    """
+    Formats a date-like value as the partition key used on disk.
+    """
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+def write_partitioned(data, path, date_column="review_date", overwrite=False):
+    """
+    Writes a DataFrame to a Parquet dataset partitioned by review day.
+    Each call adds new files, so chunks can be appended as they are produced.
+
+    Args:
+        data (pd.DataFrame): Data to write.
+        path (str): Root directory of the dataset.
+        date_column (str): Column used to derive the day partition. Data without
+            this column is written unpartitioned.
+        overwrite (bool): Remove any existing dataset at the path first.
+
+    Returns:
+        None
+    """
+    try:
+        if overwrite and os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path, exist_ok=True)
+        if date_column in data.columns:
+            # Normalize dates so every file in the dataset shares one schema
+            dates = pd.to_datetime(data[date_column])
+            data = data.assign(**{date_column: dates, PARTITION_COLUMN: dates.dt.strftime("%Y-%m-%d")})
+            data.to_parquet(path, engine="pyarrow", partition_cols=[PARTITION_COLUMN], index=False)
+        else:
+            data.to_parquet(os.path.join(path, f"part-{uuid.uuid4().hex}.parquet"), engine="pyarrow", index=False)
+        print(f"Data successfully written to the Parquet dataset {path} ({len(data)} rows).")
+    except Exception as e:
+        # Re-raise so callers never advance a watermark past data that was not stored
+        print(f"Error writing Parquet dataset {path}: {e}")
+        raise
+
+def read_partitioned(path, columns=None, start_date=None, end_date=None):
+    """
+    Reads a Parquet dataset written by write_partitioned, loading only the
+    requested columns and skipping day partitions outside the date range.
+
+    Args:
+        path (str): Root directory of the dataset.
+        columns (list): Columns to load (defaults to all columns).
+        start_date (str or datetime): First day to include, inclusive.
+        end_date (str or datetime): Last day to include, inclusive.
+
+    Returns:
+        pd.DataFrame: Loaded data, or an empty DataFrame if the dataset is missing.
+    """
+    try:
+        if not os.path.exists(path):
+            print(f"Parquet dataset {path} does not exist yet.")
+            return pd.DataFrame(columns=columns)
+        filters = []
+        if start_date is not None:
+            filters.append((PARTITION_COLUMN, ">=", _to_day(start_date)))
+        if end_date is not None:
+            filters.append((PARTITION_COLUMN, "<=", _to_day(end_date)))
+        data = pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters or None)
+        if PARTITION_COLUMN in data.columns and (columns is None or PARTITION_COLUMN not in columns):
+            # The partition key is an on-disk detail; callers work with the date column
+            data = data.drop(columns=PARTITION_COLUMN)
+        print(f"Parquet dataset loaded successfully: {path} ({len(data)} rows).")
+        return data
+    except Exception as e:
+        print(f"Error reading Parquet dataset {path}: {e}")
+        return pd.DataFrame(columns=columns)
+
+def iter_partitioned(path, columns=None, start_date=None, end_date=None, batch_size=50000):
+    """
+    Streams a Parquet dataset written by write_partitioned in DataFrame batches,
+    so datasets larger than memory can be processed with constant memory.
+
+    Args:
+        path (str): Root directory of the dataset.
+        columns (list): Columns to load (defaults to all columns).
+        start_date (str or datetime): First day to include, inclusive.
+        end_date (str or datetime): Last day to include, inclusive.
+        batch_size (int): Maximum number of rows per yielded batch.
+
+    Yields:
+        pd.DataFrame: Consecutive batches of the dataset.
+    """
+    if not os.path.exists(path):
+        print(f"Parquet dataset {path} does not exist yet.")
+        return
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    condition = None
+    if start_date is not None:
+        condition = ds.field(PARTITION_COLUMN) >= _to_day(start_date)
+    if end_date is not None:
+        end_condition = ds.field(PARTITION_COLUMN) <= _to_day(end_date)
+        condition = end_condition if condition is None else condition & end_condition
+    for batch in dataset.to_batches(columns=columns, filter=condition, batch_size=batch_size):
+        if batch.num_rows:
+            data = batch.to_pandas()
+            if PARTITION_COLUMN in data.columns and (columns is None or PARTITION_COLUMN not in columns):
+                data = data.drop(columns=PARTITION_COLUMN)
+            yield data
+
+def _in_range(name, start_date, end_date):
+    prefix = f"{PARTITION_COLUMN}="
+    if not name.startswith(prefix):
+        return start_date is None and end_date is None and not name.startswith(".")
+    day = name[len(prefix):]
+    # ISO day strings compare in date order
+    return (start_date is None or day >= _to_day(start_date)) and (end_date is None or day <= _to_day(end_date))
+
+def delete_partitions(path, start_date=None, end_date=None):
+    """
+    Removes the day partitions within a date range, so the range can be
+    rewritten without duplicating rows. Without a range the whole dataset is removed.
+
+    Args:
+        path (str): Root directory of the dataset.
+        start_date (str or datetime): First day to remove, inclusive.
+        end_date (str or datetime): Last day to remove, inclusive.
+
+    Returns:
+        int: Number of partitions removed.
+    """
+    if not os.path.exists(path):
+        return 0
+    if start_date is None and end_date is None:
+        shutil.rmtree(path)
+        return 1
+    removed = 0
+    for name in os.listdir(path):
+        if name.startswith(f"{PARTITION_COLUMN}=") and _in_range(name, start_date, end_date):
+            shutil.rmtree(os.path.join(path, name))
+            removed += 1
+    return removed
+
+def partition_days(path):
+    """
+    Lists the day partitions of a dataset written by write_partitioned.
+
+    Args:
+        path (str): Root directory of the dataset.
+
+    Returns:
+        list: Sorted day strings (YYYY-MM-DD); empty if the dataset is missing.
+    """
+    if not os.path.exists(path):
+        return []
+    prefix = f"{PARTITION_COLUMN}="
+    return sorted(name[len(prefix):] for name in os.listdir(path) if name.startswith(prefix))
+
+def staging_path(path):
+    """
+    Returns a fresh staging directory inside a dataset. Readers skip it, since
+    Parquet dataset discovery ignores names starting with ".", and it can be
+    renamed into place without copying.
+
+    Args:
+        path (str): Root directory of the dataset.
+
+    Returns:
+        str: Path of the staging directory (not created yet).
+    """
+    return os.path.join(path, f".staging-{uuid.uuid4().hex}")
+
+def replace_partitions(staging, path, start_date=None, end_date=None):
+    """
+    Replaces the day partitions of a dataset within a date range with those of
+    a staged dataset. Call it only once the staged data is complete, so a
+    failure while staging never removes existing partitions. Without a range
+    every existing partition is replaced. The staging directory is removed.
+
+    Args:
+        staging (str): Staged dataset, typically from staging_path(path).
+        path (str): Root directory of the dataset.
+        start_date (str or datetime): First day to replace, inclusive.
+        end_date (str or datetime): Last day to replace, inclusive.
+
+    Returns:
+        int: Number of partitions swapped in.
+    """
+    os.makedirs(path, exist_ok=True)
+    trash = os.path.join(path, f".trash-{uuid.uuid4().hex}")
+    os.makedirs(trash)
+    # Renames within the dataset directory are cheap, so readers see old data until the swap
+    for name in os.listdir(path):
+        if _in_range(name, start_date, end_date):
+            os.rename(os.path.join(path, name), os.path.join(trash, name))
+    swapped = 0
+    if os.path.exists(staging):
+        for name in os.listdir(staging):
+            os.rename(os.path.join(staging, name), os.path.join(path, name))
+            swapped += 1
+        shutil.rmtree(staging)
+    shutil.rmtree(trash)
+    return swapped
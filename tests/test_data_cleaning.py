@@ -0,0 +1,40 @@
+import re
+import pandas as pd
+import pytest
+from data_cleaning import UNICODE_WHITESPACE, clean_text, prefilter_text_column, preprocess_data
+
+TEXTS = [
+    "Great\xa0product!! Would buy again",
+    "Terrible quality,\tarrived   broken...",
+    "  5/5 　 FAST delivery\n",
+    "",
+    None
+]
+
+def _reference_prefilter(text):
+    # clean_text's character filtering, with whitespace collapsed as tokenization does
+    if not isinstance(text, str):
+        return ""
+    return " ".join(re.sub(r"[^a-zA-Z\s]", "", text).lower().split())
+
+def test_whitespace_class_matches_python_re():
+    whitespace = re.compile(f"[{UNICODE_WHITESPACE}]")
+    for code in range(0x3001):
+        char = chr(code)
+        assert bool(whitespace.match(char)) == bool(re.match(r"\s", char)), repr(char)
+
+@pytest.mark.parametrize("dtype", [object, "string[pyarrow]"])
+def test_prefilter_matches_clean_text_filtering(dtype):
+    if dtype != object:
+        pytest.importorskip("pyarrow")
+    prefiltered = prefilter_text_column(pd.Series(TEXTS, dtype=dtype))
+    assert [str(text) for text in prefiltered] == [_reference_prefilter(text) for text in TEXTS]
+    assert prefiltered.iloc[0] == "great product would buy again"
+
+@pytest.mark.parametrize("dtype", [object, "string[pyarrow]"])
+def test_preprocess_data_matches_clean_text(dtype):
+    if dtype != object:
+        pytest.importorskip("pyarrow")
+    texts = [text for text in TEXTS if text is not None]
+    cleaned = preprocess_data(pd.DataFrame({"review_text": pd.Series(texts, dtype=dtype)}), "review_text")
+    assert [str(text) for text in cleaned["review_text"]] == [clean_text(text) for text in texts]
@@ -0,0 +1,146 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+import pytest
+from config import INCREMENTAL_SETTINGS, STORAGE_PATHS
+from data_extraction import extract_from_api_pages, extract_from_sql, extract_from_sql_chunks, load_watermark
+from sentiment_pipeline import incremental_extract_and_clean
+
+def _create_reviews_db(path):
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE customer_reviews ("
+            "review_id INTEGER PRIMARY KEY, review_text TEXT, rating INTEGER, sentiment TEXT, review_date TEXT)"
+        )
+
+def _insert_reviews(path, rows):
+    with sqlite3.connect(path) as connection:
+        connection.executemany("INSERT INTO customer_reviews VALUES (?, ?, ?, ?, ?)", rows)
+
+@pytest.fixture
+def reviews_db(tmp_path):
+    db_path = tmp_path / "reviews.db"
+    _create_reviews_db(db_path)
+    _insert_reviews(db_path, [
+        (i, f"Review number {i}", i % 5 + 1, "positive" if i % 2 else "negative", f"2024-03-{i:02d} 12:00:00")
+        for i in range(1, 11)
+    ])
+    return f"sqlite:///{db_path}"
+
+def test_sql_chunks_stream_the_full_result_in_order(reviews_db):
+    query = "SELECT * FROM customer_reviews ORDER BY review_id"
+    chunks = list(extract_from_sql_chunks(query, chunksize=3, database_url=reviews_db))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert streamed["review_id"].tolist() == list(range(1, 11))
+    assert str(streamed["review_text"].dtype) == "string[pyarrow]"
+    assert str(streamed["review_date"].dtype) == "datetime64[ns]"
+    full = extract_from_sql(query, database_url=reviews_db)
+    assert streamed["review_text"].tolist() == full["review_text"].tolist()
+
+def test_sql_chunks_bind_parameters_and_select_columns(reviews_db):
+    chunks = extract_from_sql_chunks(
+        "SELECT * FROM customer_reviews WHERE rating >= :min_rating ORDER BY review_id",
+        chunksize=2, database_url=reviews_db, params={"min_rating": 4}, columns=["review_id", "rating"]
+    )
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert list(streamed.columns) == ["review_id", "rating"]
+    assert (streamed["rating"] >= 4).all()
+    assert streamed["review_id"].tolist() == [3, 4, 8, 9]
+
+def test_sql_chunks_raise_instead_of_ending_early(reviews_db):
+    with pytest.raises(Exception):
+        list(extract_from_sql_chunks("SELECT * FROM missing_table", chunksize=2, database_url=reviews_db))
+
+@pytest.fixture
+def incremental_db(tmp_path, monkeypatch):
+    monkeypatch.setitem(INCREMENTAL_SETTINGS, "watermark_path", str(tmp_path / "watermark.json"))
+    monkeypatch.setitem(STORAGE_PATHS, "cleaned_reviews", str(tmp_path / "cleaned"))
+    db_path = tmp_path / "reviews.db"
+    _create_reviews_db(db_path)
+    return db_path, f"sqlite:///{db_path}"
+
+def test_incremental_extraction_picks_up_later_review_from_same_day(incremental_db):
+    db_path, database_url = incremental_db
+    today = datetime.now().strftime("%Y-%m-%d")
+    _insert_reviews(db_path, [(1, "Great product, works well", 5, "positive", f"{today} 09:00:00")])
+    assert incremental_extract_and_clean(database_url=database_url) == 1
+    assert load_watermark(INCREMENTAL_SETTINGS["watermark_path"])["review_date"] == f"{today} 09:00:00"
+
+    # SQLite compares text dates, so a "T"-separated watermark would hide this review
+    _insert_reviews(db_path, [(2, "Broke after a day", 1, "negative", f"{today} 15:30:00")])
+    assert incremental_extract_and_clean(database_url=database_url) == 1
+    assert incremental_extract_and_clean(database_url=database_url) == 0
+
+def test_incremental_extraction_accepts_iso_watermark(incremental_db):
+    db_path, database_url = incremental_db
+    today = datetime.now().strftime("%Y-%m-%d")
+    _insert_reviews(db_path, [
+        (1, "Great product, works well", 5, "positive", f"{today} 09:00:00"),
+        (2, "Broke after a day", 1, "negative", f"{today} 15:30:00")
+    ])
+    with open(INCREMENTAL_SETTINGS["watermark_path"], "w") as f:
+        f.write(f'{{"review_date": "{today}T09:00:00", "review_id": 1}}')
+    assert incremental_extract_and_clean(database_url=database_url) == 1
+
+API_RECORDS = [{"review_id": i, "review_text": f"Review number {i}", "rating": i % 5 + 1} for i in range(1, 8)]
+
+@pytest.fixture
+def review_api():
+    """
+    Serves API_RECORDS page by page from a local server. Every page in
+    fail_once answers 503 on its first request; pages in always_fail always do.
+    """
+    requests_seen = []
+    fail_once, always_fail = set(), set()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            page, page_size = int(query["page"][0]), int(query["page_size"][0])
+            requests_seen.append(page)
+            if page in always_fail or (page in fail_once and requests_seen.count(page) == 1):
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = json.dumps({"data": API_RECORDS[(page - 1) * page_size:page * page_size]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/reviews", requests_seen, fail_once, always_fail
+    server.shutdown()
+    server.server_close()
+
+def test_api_pages_are_fetched_concurrently_and_yielded_in_order(review_api):
+    api_url, requests_seen, _, _ = review_api
+    pages = list(extract_from_api_pages(api_url, page_size=3, max_concurrency=2, backoff_factor=0))
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert pd.concat(pages, ignore_index=True)["review_id"].tolist() == list(range(1, 8))
+    assert {1, 2, 3} <= set(requests_seen)
+
+def test_api_pages_are_retried_on_server_errors(review_api):
+    api_url, requests_seen, fail_once, _ = review_api
+    fail_once.add(2)
+    pages = list(extract_from_api_pages(api_url, page_size=3, max_concurrency=2, max_retries=2, backoff_factor=0))
+    assert pd.concat(pages, ignore_index=True)["review_id"].tolist() == list(range(1, 8))
+    assert requests_seen.count(2) == 2
+
+def test_api_pages_raise_once_retries_are_exhausted(review_api):
+    api_url, requests_seen, _, always_fail = review_api
+    always_fail.add(2)
+    with pytest.raises(Exception):
+        list(extract_from_api_pages(api_url, page_size=3, max_concurrency=2, max_retries=1, backoff_factor=0))
+    assert requests_seen.count(2) == 2
@@ -0,0 +1,34 @@
+import pandas as pd
+from deduplication import MinHashLSHIndex
+
+def _review(n_words=60, last_word=None):
+    words = [f"word{i}" for i in range(n_words)]
+    if last_word:
+        words[-1] = last_word
+    return " ".join(words)
+
+def test_indexed_review_survives_earlier_near_copy(tmp_path):
+    index = MinHashLSHIndex(str(tmp_path / "index"))
+    today = pd.Timestamp.now().normalize()
+    original = pd.DataFrame({"review_text": [_review()], "review_date": [today]})
+    kept, _ = index.deduplicate(original, "review_text")
+    assert len(kept) == 1
+
+    # An overlapping window extracts the original again, after a new near-copy of it
+    batch = pd.DataFrame({
+        "review_text": [_review(last_word="changed"), _review()],
+        "review_date": [today + pd.Timedelta(hours=1), today]
+    })
+    kept, stats = index.deduplicate(batch, "review_text")
+    assert len(kept) == 1
+    assert kept["review_text"].iloc[0] == _review()
+    assert stats["removed_within_batch"] == 1
+
+def test_near_copy_of_indexed_review_is_dropped(tmp_path):
+    index = MinHashLSHIndex(str(tmp_path / "index"))
+    today = pd.Timestamp.now().normalize()
+    index.deduplicate(pd.DataFrame({"review_text": [_review()], "review_date": [today]}), "review_text")
+    batch = pd.DataFrame({"review_text": [_review(last_word="changed")], "review_date": [today]})
+    kept, stats = index.deduplicate(batch, "review_text")
+    assert kept.empty
+    assert stats["removed_seen_before"] == 1
@@ -0,0 +1,35 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from feature_store import TfidfFeatureStore
+
+TEXTS = ["great product works well", "broke after a day", "okay value for money", "would buy again"]
+
+def _fitted_vectorizer(texts=TEXTS):
+    return TfidfVectorizer().fit(texts)
+
+def test_reader_keeps_serving_rows_after_compaction(tmp_path):
+    vectorizer = _fitted_vectorizer()
+    writer = TfidfFeatureStore(vectorizer, root=str(tmp_path))
+    writer.transform(TEXTS[:2])
+    writer.transform(TEXTS[2:])
+    reader = TfidfFeatureStore(vectorizer, root=str(tmp_path), read_only=True)
+
+    # Compaction removes the segments the reader has mapped
+    writer.compact()
+    assert writer.stats()["segments"] == 1
+    expected = vectorizer.transform(TEXTS).toarray()
+    assert np.allclose(reader.transform(TEXTS).toarray(), expected)
+    assert np.allclose(TfidfFeatureStore(vectorizer, root=str(tmp_path), read_only=True).transform(TEXTS).toarray(), expected)
+
+def test_reader_of_invalidated_version_falls_back_to_vectorizing(tmp_path):
+    old_vectorizer = _fitted_vectorizer()
+    TfidfFeatureStore(old_vectorizer, root=str(tmp_path)).transform(TEXTS)
+    reader = TfidfFeatureStore(old_vectorizer, root=str(tmp_path), read_only=True)
+
+    # A refit with a new vocabulary removes the old version's directory
+    TfidfFeatureStore(_fitted_vectorizer(TEXTS + ["brand new words"]), root=str(tmp_path)).invalidate_other_versions()
+    expected = old_vectorizer.transform(TEXTS).toarray()
+    assert np.allclose(reader.transform(TEXTS).toarray(), expected)
+    late_reader = TfidfFeatureStore(old_vectorizer, root=str(tmp_path), read_only=True)
+    assert late_reader.stats()["rows"] == 0
+    assert np.allclose(late_reader.transform(TEXTS).toarray(), expected)
@@ -1,19 +1,36 @@
+import cProfile
+import io
+import json
 import logging
+import multiprocessing
 import os
+import pstats
 import random
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
 import numpy as np
 import pandas as pd
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
 # Initialize logging
-from config import LOGGING_CONFIG
+from config import LOGGING_CONFIG, METRICS_SETTINGS, REVIEW_SCHEMA
 
+# The log directory must exist before the file handler opens the log file
+os.makedirs(os.path.dirname(LOGGING_CONFIG["log_file"]), exist_ok=True)
 logging.basicConfig(
     filename=LOGGING_CONFIG["log_file"],
     level=getattr(logging, LOGGING_CONFIG["log_level"]),
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# Start context of every worker pool. Forking a process with live threads (the
+# pipeline's stage threads, torch's thread pools) can copy a held lock into the
+# child and deadlock it, so workers are spawned instead
+SPAWN_CONTEXT = multiprocessing.get_context("spawn")
+
 def log_message(message, level="INFO"):
     """
     Logs a message to the log file and console.
@@ -78,6 +95,8 @@ def calculate_metrics(y_true, y_pred):
         dict: Dictionary containing accuracy, precision, recall, and F1-score.
     """
     try:
+        # Imported here so modules that only log or track stages do not load scikit-learn
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
         metrics = {
             "accuracy": accuracy_score(y_true, y_pred),
             "precision": precision_score(y_true, y_pred, average="weighted"),
@@ -90,20 +109,274 @@ def calculate_metrics(y_true, y_pred):
         log_message(f"Error calculating metrics: {e}", "ERROR")
         return {}
 
-def load_csv(file_path):
+def frame_memory_mb(data):
+    """
+    Returns:
+        float: Memory used by a DataFrame in megabytes, including string contents.
+    """
+    return data.memory_usage(index=True, deep=True).sum() / 1024 ** 2
+
+def apply_review_schema(data, columns=None, schema=None):
+    """
+    Converts review columns to the compact dtypes of REVIEW_SCHEMA: Arrow-backed
+    strings for text, categoricals for repeated labels and IDs, and small
+    integers for ratings. Columns the schema does not list keep their dtype;
+    a column whose values do not fit its dtype is left unchanged with a warning.
+
+    Args:
+        data (pd.DataFrame): Review data as loaded, typically with object columns.
+        columns (list): Columns to keep; the others are dropped before conversion.
+            Defaults to keeping every column.
+        schema (dict): Column dtypes (defaults to REVIEW_SCHEMA).
+
+    Returns:
+        pd.DataFrame: The selected columns with compact dtypes.
+    """
+    schema = schema or REVIEW_SCHEMA
+    converted = {}
+    for column in data.columns:
+        if columns is not None and column not in columns:
+            continue
+        values = data[column]
+        dtype = schema.get(column)
+        if dtype is not None and str(values.dtype) != dtype:
+            try:
+                values = values.astype(dtype)
+            except (TypeError, ValueError) as e:
+                log_message(f"Keeping column '{column}' as {values.dtype}: {e}", "WARNING")
+        converted[column] = values
+    return pd.DataFrame(converted, index=data.index, copy=False)
+
+def load_csv(file_path, columns=None):
     """
-    Loads a CSV file into a Pandas DataFrame.
+    Loads a CSV file into a Pandas DataFrame with the compact review dtypes.
 
     Args:
         file_path (str): Path to the CSV file.
+        columns (list): Columns to load (defaults to every column).
 
     Returns:
         pd.DataFrame: Loaded DataFrame.
     """
     try:
-        data = pd.read_csv(file_path)
-        log_message(f"CSV file loaded successfully: {file_path}", "INFO")
+        # Text and datetime columns are parsed as objects first, then compacted
+        dtypes = {
+            column: dtype for column, dtype in REVIEW_SCHEMA.items()
+            if dtype in ("category", "string[pyarrow]")
+        }
+        data = pd.read_csv(file_path, usecols=columns, dtype=dtypes)
+        data = apply_review_schema(data)
+        log_message(f"CSV file loaded successfully: {file_path} ({frame_memory_mb(data):.1f} MB)", "INFO")
         return data
     except Exception as e:
         log_message(f"Error loading CSV file {file_path}: {e}", "ERROR")
         return pd.DataFrame()
+
+# Per-stage counters collected by track_stage, keyed by stage name
+_stage_metrics = {}
+_metrics_lock = threading.Lock()
+
+def _peak_rss_mb():
+    """
+    Returns the peak resident set size of this process and of its finished
+    child processes (e.g. cleaning workers), in megabytes.
+    """
+    # ru_maxrss is reported in kilobytes on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+def record_metrics(stage, seconds, rows_in=None, rows_out=None, bytes_processed=None, tracemalloc_peak=None,
+                   memory_before_mb=None, memory_after_mb=None):
+    """
+    Adds one measurement to the counters of a stage. Repeated measurements of
+    the same stage, such as one per chunk, are summed.
+
+    Args:
+        stage (str): Stage name.
+        seconds (float): Wall-clock time of the measurement.
+        rows_in (int): Rows consumed.
+        rows_out (int): Rows produced.
+        bytes_processed (int): Bytes read or produced.
+        tracemalloc_peak (int): Peak traced Python allocations in bytes.
+        memory_before_mb (float): Memory of the stage's input DataFrame (see frame_memory_mb).
+        memory_after_mb (float): Memory of the stage's output DataFrame.
+
+    Returns:
+        None
+    """
+    own_rss, children_rss = _peak_rss_mb()
+    with _metrics_lock:
+        metrics = _stage_metrics.setdefault(stage, {
+            "calls": 0, "seconds": 0.0, "rows_in": 0, "rows_out": 0, "bytes": 0,
+            "peak_rss_mb": 0.0, "children_peak_rss_mb": 0.0
+        })
+        metrics["calls"] += 1
+        metrics["seconds"] += seconds
+        metrics["rows_in"] += rows_in or 0
+        metrics["rows_out"] += rows_out or 0
+        metrics["bytes"] += bytes_processed or 0
+        rows = metrics["rows_out"] or metrics["rows_in"]
+        metrics["rows_per_sec"] = rows / metrics["seconds"] if metrics["seconds"] else 0.0
+        metrics["peak_rss_mb"] = max(metrics["peak_rss_mb"], own_rss)
+        metrics["children_peak_rss_mb"] = max(metrics["children_peak_rss_mb"], children_rss)
+        if memory_before_mb is not None:
+            metrics["memory_before_mb"] = metrics.get("memory_before_mb", 0.0) + memory_before_mb
+        if memory_after_mb is not None:
+            metrics["memory_after_mb"] = metrics.get("memory_after_mb", 0.0) + memory_after_mb
+        if tracemalloc_peak is not None:
+            metrics["tracemalloc_peak_mb"] = max(metrics.get("tracemalloc_peak_mb", 0.0), tracemalloc_peak / 1024 ** 2)
+
+@contextmanager
+def track_stage(stage, rows_in=None, profile=None, trace_memory=None):
+    """
+    Times a block of work and records its counters under a stage name.
+
+    The block can fill in the yielded dict with 'rows_in', 'rows_out', 'bytes',
+    and the DataFrame memory before and after the stage ('memory_before_mb',
+    'memory_after_mb'). Peak RSS is the process high-water mark when the block ends.
+    With profiling, the block's cProfile statistics are written to
+    METRICS_SETTINGS["profile_dir"]; with memory tracing, the peak of traced
+    Python allocations is recorded (tracemalloc is process-wide, so stages
+    running concurrently share the peak).
+
+    Args:
+        stage (str): Stage name.
+        rows_in (int): Rows consumed, if known up front.
+        profile (bool): Capture a cProfile profile (defaults to METRICS_SETTINGS).
+        trace_memory (bool): Trace Python allocations (defaults to METRICS_SETTINGS).
+
+    Yields:
+        dict: Counters for the caller to update.
+    """
+    profile = METRICS_SETTINGS["profile"] if profile is None else profile
+    trace_memory = METRICS_SETTINGS["trace_memory"] if trace_memory is None else trace_memory
+    counters = {"rows_in": rows_in, "rows_out": None, "bytes": None, "memory_before_mb": None, "memory_after_mb": None}
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Only one profiler can be active at a time
+            log_message(f"Profiling disabled for stage '{stage}': {e}", "WARNING")
+            profiler = None
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    start_time = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        seconds = time.perf_counter() - start_time
+        tracemalloc_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if started_tracing:
+            tracemalloc.stop()
+        if profiler is not None:
+            profiler.disable()
+            _save_profile(stage, profiler)
+        record_metrics(
+            stage, seconds,
+            rows_in=counters["rows_in"],
+            rows_out=counters["rows_out"],
+            bytes_processed=counters["bytes"],
+            tracemalloc_peak=tracemalloc_peak,
+            memory_before_mb=counters["memory_before_mb"],
+            memory_after_mb=counters["memory_after_mb"]
+        )
+
+def _save_profile(stage, profiler):
+    """
+    Writes a stage's cProfile statistics to disk and logs the top functions.
+    """
+    try:
+        os.makedirs(METRICS_SETTINGS["profile_dir"], exist_ok=True)
+        path = os.path.join(METRICS_SETTINGS["profile_dir"], f"{stage}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(10)
+        log_message(f"Profile for stage '{stage}' saved to {path}:\n{summary.getvalue()}", "DEBUG")
+    except Exception as e:
+        log_message(f"Error saving profile for stage '{stage}': {e}", "ERROR")
+
+def tracked(stage):
+    """
+    Decorator recording a function call under a stage name with track_stage.
+    Rows in and out, and the bytes produced, are taken from a DataFrame first
+    argument and a DataFrame return value.
+
+    Args:
+        stage (str): Stage name.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            rows_in = len(args[0]) if args and isinstance(args[0], pd.DataFrame) else None
+            with track_stage(stage, rows_in=rows_in) as counters:
+                result = func(*args, **kwargs)
+                if isinstance(result, pd.DataFrame):
+                    counters["rows_out"] = len(result)
+                    counters["bytes"] = int(result.memory_usage(index=True).sum())
+            return result
+        return wrapper
+    return decorator
+
+def get_metrics():
+    """
+    Returns:
+        dict: A copy of the counters of every tracked stage.
+    """
+    with _metrics_lock:
+        return {stage: dict(metrics) for stage, metrics in _stage_metrics.items()}
+
+def reset_metrics():
+    """
+    Clears the counters of every tracked stage.
+
+    Returns:
+        None
+    """
+    with _metrics_lock:
+        _stage_metrics.clear()
+
+def write_metrics(json_path=None, prometheus_path=None):
+    """
+    Writes the stage counters as JSON and in the Prometheus text exposition
+    format (suitable for the node_exporter textfile collector).
+
+    Args:
+        json_path (str): JSON output path (defaults to METRICS_SETTINGS).
+        prometheus_path (str): Prometheus output path (defaults to METRICS_SETTINGS).
+
+    Returns:
+        dict: The counters that were written.
+    """
+    metrics = get_metrics()
+    try:
+        json_path = json_path or METRICS_SETTINGS["json_path"]
+        prometheus_path = prometheus_path or METRICS_SETTINGS["prometheus_path"]
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        with open(json_path, "w") as f:
+            json.dump({"generated_at": time.time(), "stages": metrics}, f, indent=2)
+        lines = []
+        for name in ["calls", "seconds", "rows_in", "rows_out", "bytes", "rows_per_sec", "peak_rss_mb",
+                     "children_peak_rss_mb", "tracemalloc_peak_mb", "memory_before_mb", "memory_after_mb"]:
+            samples = [(stage, values[name]) for stage, values in metrics.items() if name in values]
+            if not samples:
+                continue
+            lines.append(f"# TYPE sentiment_pipeline_stage_{name} gauge")
+            lines.extend(f'sentiment_pipeline_stage_{name}{{stage="{stage}"}} {value}' for stage, value in samples)
+        os.makedirs(os.path.dirname(prometheus_path) or ".", exist_ok=True)
+        # Write then rename so a scraper never reads a partial file
+        with open(prometheus_path + ".tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(prometheus_path + ".tmp", prometheus_path)
+        log_message(f"Stage metrics written to {json_path} and {prometheus_path}.", "INFO")
+    except Exception as e:
+        log_message(f"Error writing stage metrics: {e}", "ERROR")
+    return metrics
@@ -1,33 +1,97 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from exploratory_data_analysis import load_pyplot, show_or_save_figure
+from rollups import load_daily_rollup, sentiment_counts_from_rollup, sentiment_trends_from_rollup, trend_window_start
 
-def plot_sentiment_distribution(data, sentiment_column):
+def count_sentiments(data, sentiment_column):
+    """
+    Counts the occurrences of each sentiment.
+
+    Args:
+        data (pd.DataFrame): Dataset containing sentiment predictions.
+        sentiment_column (str): Name of the column with sentiment labels.
+
+    Returns:
+        pd.Series: Review counts indexed by sentiment.
+    """
+    return data[sentiment_column].value_counts()
+
+def count_sentiment_trends(data, date_column, sentiment_column):
+    """
+    Counts reviews per day and sentiment.
+
+    Args:
+        data (pd.DataFrame): Dataset containing date and sentiment columns.
+        date_column (str): Name of the column with dates.
+        sentiment_column (str): Name of the column with sentiment labels.
+
+    Returns:
+        pd.DataFrame: Date, sentiment, and count columns.
+    """
+    # Convert the dates without modifying the caller's DataFrame
+    dates = pd.to_datetime(data[date_column]).rename(date_column)
+    return data.groupby([dates, data[sentiment_column]]).size().reset_index(name="count")
+
+def plot_sentiment_counts(sentiment_counts, output_path=None):
+    """
+    Plots precomputed sentiment counts.
+
+    Args:
+        sentiment_counts (pd.Series): Review counts indexed by sentiment.
+        output_path (str): Save the figure here instead of displaying it.
+
+    Returns:
+        None
+    """
+    import seaborn as sns
+    plt = load_pyplot()
+    plt.figure(figsize=(8, 6))
+    sns.barplot(x=sentiment_counts.index, y=sentiment_counts.values, palette="coolwarm")
+    plt.title("Sentiment Distribution", fontsize=16)
+    plt.xlabel("Sentiment")
+    plt.ylabel("Count")
+    show_or_save_figure(output_path)
+
+def plot_trend_counts(trends, date_column, sentiment_column, output_path=None):
+    """
+    Plots precomputed daily sentiment counts.
+
+    Args:
+        trends (pd.DataFrame): Date, sentiment, and count columns.
+        date_column (str): Name of the column with dates.
+        sentiment_column (str): Name of the column with sentiment labels.
+        output_path (str): Save the figure here instead of displaying it.
+
+    Returns:
+        None
+    """
+    import seaborn as sns
+    plt = load_pyplot()
+    plt.figure(figsize=(12, 6))
+    sns.lineplot(data=trends, x=date_column, y="count", hue=sentiment_column, marker="o")
+    plt.title("Sentiment Trends Over Time", fontsize=16)
+    plt.xlabel("Date")
+    plt.ylabel("Count")
+    plt.legend(title="Sentiment")
+    show_or_save_figure(output_path)
+
+def plot_sentiment_distribution(data, sentiment_column, output_path=None):
     """
     Plots the distribution of sentiments in the dataset.
 
     Args:
         data (pd.DataFrame): Dataset containing sentiment predictions.
         sentiment_column (str): Name of the column with sentiment labels.
+        output_path (str): Save the figure here instead of displaying it.
 
     Returns:
         None
     """
     try:
-        # Count the occurrences of each sentiment
-        sentiment_counts = data[sentiment_column].value_counts()
-        
-        # Plot the sentiment distribution
-        plt.figure(figsize=(8, 6))
-        sns.barplot(x=sentiment_counts.index, y=sentiment_counts.values, palette="coolwarm")
-        plt.title("Sentiment Distribution", fontsize=16)
-        plt.xlabel("Sentiment")
-        plt.ylabel("Count")
-        plt.show()
+        plot_sentiment_counts(count_sentiments(data, sentiment_column), output_path)
     except Exception as e:
         print(f"Error visualizing sentiment distribution: {e}")
 
-def plot_sentiment_trends(data, date_column, sentiment_column):
+def plot_sentiment_trends(data, date_column, sentiment_column, output_path=None):
     """
     Plots the trend of sentiments over time.
 
@@ -35,34 +99,24 @@ def plot_sentiment_trends(data, date_column, sentiment_column):
         data (pd.DataFrame): Dataset containing date and sentiment columns.
         date_column (str): Name of the column with dates.
         sentiment_column (str): Name of the column with sentiment labels.
+        output_path (str): Save the figure here instead of displaying it.
 
     Returns:
         None
     """
     try:
-        # Convert the date column to datetime format for better handling
-        data[date_column] = pd.to_datetime(data[date_column])
-        
-        # Group by date and sentiment to calculate daily sentiment counts
-        trends = data.groupby([date_column, sentiment_column]).size().reset_index(name="count")
-        
-        # Plot sentiment trends over time
-        plt.figure(figsize=(12, 6))
-        sns.lineplot(data=trends, x=date_column, y="count", hue=sentiment_column, marker="o")
-        plt.title("Sentiment Trends Over Time", fontsize=16)
-        plt.xlabel("Date")
-        plt.ylabel("Count")
-        plt.legend(title="Sentiment")
-        plt.show()
+        trends = count_sentiment_trends(data, date_column, sentiment_column)
+        plot_trend_counts(trends, date_column, sentiment_column, output_path)
     except Exception as e:
         print(f"Error visualizing sentiment trends: {e}")
 
 if __name__ == "__main__":
-    # Load the predictions dataset
-    predictions = pd.read_csv("sentiment_predictions.csv")
+    # Load the pre-aggregated daily counts instead of the raw predictions
+    rollup = load_daily_rollup()
     
     # Plot sentiment distribution
-    plot_sentiment_distribution(predictions, sentiment_column="predicted_sentiment")
+    plot_sentiment_counts(sentiment_counts_from_rollup(rollup))
     
-    # Plot sentiment trends
-    plot_sentiment_trends(predictions, date_column="review_date", sentiment_column="predicted_sentiment")
+    # Plot sentiment trends over the trend window
+    trends = sentiment_trends_from_rollup(rollup, start_date=trend_window_start())
+    plot_trend_counts(trends, date_column="review_date", sentiment_column="predicted_sentiment")